@@ -0,0 +1,61 @@
+"""
+PathCache benchmark
+
+Measures ZipFs path lookup and listing latency on archives with a large number of entries
+Usage: PYTHONPATH=. python benchmarks/bench_pathcache.py [entries]
+"""
+import sys
+import timeit
+
+from zipreport.fileutils import ZipFs
+from zipreport.fileutils.backend.zip import InMemoryZip
+
+
+def build_zip(entries: int) -> InMemoryZip:
+    """
+    Build a zip file with the given number of entries, spread over a 3-level tree
+    :param entries: number of entries
+    :return: InMemoryZip
+    """
+    zip = InMemoryZip()
+    for i in range(entries):
+        zip.writestr("assets/{}/{}/file{}.txt".format(i % 10, i % 100, i), b"")
+    return zip
+
+
+def bench(label: str, fn, number: int):
+    """
+    Run and print a single benchmark
+    :param label: benchmark name
+    :param fn: callable to time
+    :param number: number of calls
+    :return:
+    """
+    total = timeit.timeit(fn, number=number)
+    print("{:<32} {:>12.2f} us/call".format(label, total / number * 1e6))
+
+
+def main(entries: int = 20000):
+    zip = build_zip(entries)
+    print("{} entries".format(entries))
+
+    bench("build index", lambda: ZipFs(zip).exists("manifest.json"), 10)
+
+    zfs = ZipFs(zip)
+    file = "assets/9/99/file{}.txt".format(entries - 1)
+    bench("exists() - file", lambda: zfs.exists(file), 100000)
+    bench("exists() - dir", lambda: zfs.exists("assets/9/99"), 100000)
+    bench("exists() - missing", lambda: zfs.exists("assets/9/99/missing"), 100000)
+    bench("is_dir()", lambda: zfs.is_dir("assets/9"), 100000)
+    bench("list_files() - leaf dir", lambda: zfs.list_files("assets/9/99"), 10000)
+    bench("list_dirs() - root", lambda: zfs.list_dirs(""), 100000)
+    bench("list() - all", lambda: zfs.list(""), 10)
+
+    fork = zfs.fork()
+    fork.add("assets/9/99/other.txt", b"")
+    bench("exists() - fork, base file", lambda: fork.exists(file), 100000)
+    bench("list_files() - fork", lambda: fork.list_files("assets/9/99"), 10000)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,85 @@
+import io
+import os
+import tempfile
+from argparse import ArgumentParser
+from pathlib import Path
+from shutil import rmtree
+
+from tests.utils import RPT_SIMPLE_PATH, RPT_FILTER_EXAMPLE_PATH
+from zipreport.cli.command import build
+from zipreport.cli.command.build import BuildCommand
+from zipreport.report import ReportFileLoader
+
+
+def crash_target(*args) -> tuple:
+    # terminate the worker process, breaking the pool
+    os._exit(1)
+
+
+class BufferWriter:
+    def __init__(self):
+        self.output = io.StringIO()
+        self.errors = io.StringIO()
+
+    def message(self, message):
+        self.output.write("{}\n".format(message))
+
+    def error(self, message):
+        self.errors.write("{}\n".format(message))
+
+
+class TestBuildCommand:
+    temp_dir = "/tmp"
+
+    def setup_method(self, method):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def teardown_method(self, method):
+        if os.path.exists(self.temp_dir) and self.temp_dir != "/tmp":
+            rmtree(self.temp_dir)
+            self.temp_dir = "/tmp"
+
+    def run_build(self, *args) -> tuple:
+        writer = BufferWriter()
+        cmd = BuildCommand(writer=writer)
+        parser = ArgumentParser()
+        cmd.arguments(parser)
+        result = cmd.run(parser.parse_args(list(args)))
+        return result, writer.output.getvalue(), writer.errors.getvalue()
+
+    def test_build_many(self):
+        dest = Path(self.temp_dir) / "dist"
+        dest.mkdir()
+        # a folder without a manifest fails to build
+        invalid = Path(self.temp_dir) / "invalid"
+        invalid.mkdir()
+        targets = [str(RPT_SIMPLE_PATH), str(RPT_FILTER_EXAMPLE_PATH), str(invalid)]
+
+        result, output, errors = self.run_build(*targets, "-d", str(dest), "-p", "2")
+        assert result is False
+        assert "simple" in output and "filter_example" in output
+        assert "invalid" in errors and "FAILED" in errors
+        assert "2 built, 1 failed" in output
+        report = ReportFileLoader.load_file(dest / "simple.zpt")
+        assert report.exists("index.html") is True
+        assert (dest / "invalid.zpt").exists() is False
+
+        # existing report files are not overwritten without -f
+        mtime = (dest / "simple.zpt").stat().st_mtime_ns
+        result, output, errors = self.run_build(*targets[:2], "-d", str(dest))
+        assert result is False
+        assert "already exists" in errors
+        assert (dest / "simple.zpt").stat().st_mtime_ns == mtime
+        result, output, errors = self.run_build(*targets[:2], "-d", str(dest), "-f")
+        assert result is True
+        assert "2 built, 0 failed" in output
+
+    def test_build_crash(self, monkeypatch):
+        dest = Path(self.temp_dir)
+        monkeypatch.setattr(build, "build_target", crash_target)
+        result, output, errors = self.run_build(
+            str(RPT_SIMPLE_PATH), str(RPT_FILTER_EXAMPLE_PATH), "-d", str(dest)
+        )
+        assert result is False
+        assert "terminated abruptly" in errors
+        assert "0 built, 2 failed" in output
@@ -0,0 +1,89 @@
+import io
+import zipfile
+
+from zipreport.fileutils import ZipFs
+from zipreport.fileutils.backend.compression import CompressionPolicy
+from zipreport.fileutils.backend.zip import InMemoryZip, zip_write_stream
+
+
+class TestCompressionPolicy:
+    text = b"The quick brown fox jumped over the lazy dog " * 200
+
+    def test_select(self):
+        policy = CompressionPolicy()
+        assert policy.select("index.html", 1000) == (zipfile.ZIP_DEFLATED, None)
+        assert policy.select("data/image.PNG", 1000) == (zipfile.ZIP_STORED, None)
+        assert policy.select("fonts/font.woff2", 1000) == (zipfile.ZIP_STORED, None)
+
+        policy = CompressionPolicy(level=9, min_size=100, stored_extensions=[".txt"])
+        assert policy.select("index.html", 1000) == (zipfile.ZIP_DEFLATED, 9)
+        assert policy.select("index.html", 10) == (zipfile.ZIP_STORED, None)
+        assert policy.select("file.txt", 1000) == (zipfile.ZIP_STORED, None)
+        assert policy.select("image.png", 1000) == (zipfile.ZIP_DEFLATED, 9)
+
+        policy = CompressionPolicy.fast()
+        assert policy.select("index.html", 100) == (zipfile.ZIP_STORED, None)
+        assert policy.select("index.html", 10000) == (zipfile.ZIP_DEFLATED, 1)
+
+    def test_zipfs_policy(self):
+        zfs = ZipFs(InMemoryZip())
+        zfs.add("index.html", self.text)
+        zfs.add("image.png", self.text)
+        backend = zfs.get_backend()
+        assert backend.getinfo("index.html").compress_type == zipfile.ZIP_DEFLATED
+        assert backend.getinfo("image.png").compress_type == zipfile.ZIP_STORED
+
+        zfs.set_compression(CompressionPolicy(min_size=len(self.text) + 1))
+        zfs.add("other.html", self.text)
+        assert backend.getinfo("other.html").compress_type == zipfile.ZIP_STORED
+
+        zfs = ZipFs(InMemoryZip(), compression=CompressionPolicy(level=1))
+        zfs.add("index.html", self.text)
+        assert zfs.get("index.html").getbuffer() == self.text
+
+        # forks inherit the policy
+        fork = zfs.fork()
+        assert fork.get_backend().get_compression() is zfs.get_backend().get_compression()
+
+    def test_write_stream(self):
+        buffer = io.BytesIO()
+        chunks = [self.text[i : i + 1000] for i in range(0, len(self.text), 1000)]
+        with zipfile.ZipFile(buffer, "w") as zf:
+            for name, policy in [
+                ("fast.html", CompressionPolicy(level=1)),
+                ("best.html", CompressionPolicy(level=9)),
+                ("image.png", CompressionPolicy()),
+            ]:
+                info = zipfile.ZipInfo(name)
+                info.file_size = len(self.text)
+                info.compress_type, compressor = policy.compressor(name, info.file_size)
+                zip_write_stream(zf, info, iter(chunks), compressor)
+
+        zip = InMemoryZip(buffer)
+        assert zip.zip().testzip() is None
+        for name in ["fast.html", "best.html", "image.png"]:
+            assert zip.read(name) == self.text
+        # the compression level is applied
+        assert zip.getinfo("best.html").compress_size < zip.getinfo("fast.html").compress_size
+        assert zip.getinfo("image.png").compress_type == zipfile.ZIP_STORED
+
+    def test_compress_type(self):
+        # the policy level is applied to explicit compression methods
+        zip = InMemoryZip(compression=CompressionPolicy(level=1))
+        zip.writestr("fast.html", self.text, zipfile.ZIP_DEFLATED)
+        zip.writestr("stored.html", self.text, zipfile.ZIP_STORED)
+        zip.set_compression(CompressionPolicy(level=9))
+        zip.writestr("best.html", self.text, zipfile.ZIP_DEFLATED)
+        assert zip.getinfo("best.html").compress_size < zip.getinfo("fast.html").compress_size
+        assert zip.getinfo("stored.html").compress_size == len(self.text)
+
+        # LZMA entries are flagged as using an end-of-stream marker, as in zipfile
+        zip.writestr("data.lzma", self.text, zipfile.ZIP_LZMA)
+        info = zip.getinfo("data.lzma")
+        assert info.compress_type == zipfile.ZIP_LZMA
+        assert info.flag_bits & 0x02 == 0x02
+        zip = InMemoryZip(zip.save_stream())
+        assert zip.zip().testzip() is None
+        assert zip.getinfo("data.lzma").flag_bits & 0x02 == 0x02
+        for name in ["fast.html", "stored.html", "best.html", "data.lzma"]:
+            assert zip.read(name) == self.text
@@ -0,0 +1,145 @@
+import os
+import sys
+import threading
+import zlib
+
+from zipreport.fileutils import ZipFs
+from zipreport.fileutils.backend.mapped import MappedZip
+from zipreport.fileutils.backend.overlay import OverlayZip
+from zipreport.fileutils.backend.rwlock import RWLock
+from zipreport.fileutils.backend.zip import InMemoryZip
+
+
+class TestConcurrency:
+    entries = 64
+    readers = 8
+    iterations = 200
+    added = 100
+
+    def contents(self, i: int) -> bytes:
+        # compressible, but distinct, contents
+        return (b"entry %d " % i) * (100 + i * 37)
+
+    def run_threads(self, targets: list):
+        errors = []
+
+        def wrap(fn):
+            def run():
+                try:
+                    fn()
+                except Exception as e:
+                    errors.append(e)
+
+            return run
+
+        threads = [threading.Thread(target=wrap(fn)) for fn in targets]
+        # switch threads as often as possible, to maximize contention
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            sys.setswitchinterval(interval)
+        assert errors == []
+
+    def stress(self, zfs: ZipFs, base_names: list):
+        def reader(seed: int):
+            def run():
+                for n in range(self.iterations):
+                    i = (seed * 31 + n * 7) % self.entries
+                    expected = self.contents(i)
+                    if n % 3 == 0:
+                        with zfs.open_stream(base_names[i]) as f:
+                            assert f.read(10) == expected[:10]
+                            assert f.read() == expected[10:]
+                    else:
+                        assert zfs.get_bytes(base_names[i]) == expected
+                    assert zfs.exists(base_names[i]) is True
+
+            return run
+
+        def writer():
+            for i in range(self.added):
+                name = "new/{}.txt".format(i)
+                zfs.add(name, self.contents(i))
+                assert zfs.get_bytes(name) == self.contents(i)
+                if i % 10 == 0:
+                    # exports rewrite the central directory
+                    assert len(zfs.get_backend().getbuffer()) > 0
+
+        def adder():
+            # concurrent adds of the same contents are stored once
+            for i in range(self.added):
+                zfs.add_dedup("dedup/{}.bin".format(i), b"same contents")
+
+        self.run_threads(
+            [reader(i) for i in range(self.readers)] + [writer, adder, adder]
+        )
+
+        assert len(zfs.list_files("new")) == self.added
+        assert len(zfs.list_files("dedup")) == 1
+        for i in range(self.added):
+            assert zfs.get_bytes("new/{}.txt".format(i)) == self.contents(i)
+
+        # result is a valid zip file
+        zip = InMemoryZip(zfs.get_backend().get_buffer())
+        for info in zip.infolist():
+            assert zlib.crc32(zip.read(info.filename)) == info.CRC
+
+    def build(self) -> InMemoryZip:
+        zip = InMemoryZip()
+        for i in range(self.entries):
+            zip.writestr("base/{}.txt".format(i), self.contents(i))
+        return zip
+
+    def test_concurrent_inmemory(self):
+        zfs = ZipFs(self.build(), dedupe=True)
+        self.stress(zfs, ["base/{}.txt".format(i) for i in range(self.entries)])
+
+    def test_concurrent_overlay(self, tmp_path):
+        path = os.path.join(tmp_path, "base.zip")
+        self.build().save(path)
+        zfs = ZipFs(OverlayZip(MappedZip(path)), dedupe=True, entry_cache_size=64 * 1024)
+        self.stress(zfs, ["base/{}.txt".format(i) for i in range(self.entries)])
+
+    def test_concurrent_fork(self):
+        zfs = ZipFs(self.build(), dedupe=True)
+        forks = [zfs.fork() for _ in range(3)]
+        names = ["base/{}.txt".format(i) for i in range(self.entries)]
+        self.run_threads([lambda f=f: self.stress(f, names) for f in forks])
+
+    def test_rwlock(self):
+        lock = RWLock()
+        state = {"readers": 0, "max_readers": 0, "writing": False}
+        guard = threading.Lock()
+        barrier = threading.Barrier(4)
+
+        def reader():
+            barrier.wait()
+            for _ in range(200):
+                with lock.read():
+                    with guard:
+                        assert state["writing"] is False
+                        state["readers"] += 1
+                        state["max_readers"] = max(
+                            state["max_readers"], state["readers"]
+                        )
+                    with guard:
+                        state["readers"] -= 1
+
+        def writer():
+            barrier.wait()
+            for _ in range(200):
+                with lock.write():
+                    # write lock is reentrant, and allows reads by its owner
+                    with lock.write(), lock.read():
+                        with guard:
+                            assert state["readers"] == 0
+                            state["writing"] = True
+                        with guard:
+                            state["writing"] = False
+
+        self.run_threads([reader, reader, reader, writer])
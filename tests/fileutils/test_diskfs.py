@@ -16,7 +16,7 @@ class TestDiskFs(BaseFsTest):
     fcontents = b"The quick brown fox jumped over the lazy dog"
 
     temp_dir = "/tmp"
-    temp_methods = ["test_diskfs_tree", "test_diskfs_files"]
+    temp_methods = ["test_diskfs_tree", "test_diskfs_files", "test_diskfs_index"]
 
     def setup_method(self, method):
         if method.__name__ in self.temp_methods:
@@ -68,6 +68,18 @@ class TestDiskFs(BaseFsTest):
         # can we read the file?
         assert dfs.exists(self.fname) is True
         assert dfs.get(self.fname).getbuffer() == self.fcontents
+        assert dfs.get_bytes(self.fname) == self.fcontents
+        with dfs.open_stream(self.fname) as f:
+            assert f.read() == self.fcontents
+        with pytest.raises(FsError):
+            dfs.get_bytes("missing_" + self.fname)
+
+        # replace & remove
+        dfs.replace(self.fname, b"other contents")
+        assert dfs.get_bytes(self.fname) == b"other contents"
+        dfs.remove(self.fname)
+        assert dfs.exists(self.fname) is False
+        dfs.replace(self.fname, self.fcontents)
 
         # check if file was created
         fpath = path / self.fname
@@ -114,3 +126,90 @@ class TestDiskFs(BaseFsTest):
 
         # verify tree
         self.verify_tree(dfs)
+
+    def test_diskfs_index_list(self):
+        """
+        Indexed listings must match disk listings
+        :return:
+        """
+        dfs = DiskFs(SAMPLE1_PATH)
+        idfs = DiskFs(SAMPLE1_PATH, index=True)
+
+        assert sorted(idfs.list("")) == sorted(dfs.list(""))
+        assert sorted(idfs.list_dirs("/")) == sorted(dfs.list_dirs("/"))
+        assert sorted(idfs.list_files("/")) == sorted(dfs.list_files("/"))
+        for dir in dfs.list_dirs("/"):
+            assert idfs.is_dir(dir) is True
+            assert sorted(idfs.list(dir)) == sorted(dfs.list(dir))
+            assert sorted(idfs.list_files(dir)) == sorted(dfs.list_files(dir))
+        for name in dfs.list(""):
+            assert idfs.exists(name) is True
+            if not name.endswith(os.sep):
+                assert idfs.get_bytes(name) == dfs.get_bytes(name)
+
+        assert idfs.exists("missing_" + self.fname) is False
+        assert idfs.is_dir("missing_" + self.dname) is False
+        assert idfs.list("missing_" + self.dname) == []
+        with pytest.raises(FsError):
+            idfs.list_files("missing_" + self.dname)
+        with pytest.raises(FsError):
+            idfs.get_bytes(dfs.list_dirs("/")[0])
+
+    def test_diskfs_index(self):
+        """
+        Index validation and symlinks
+        :return:
+        """
+        path = Path(self.temp_dir)
+        dfs = DiskFs(self.temp_dir, index=True)
+        self.build_tree(dfs)
+        self.verify_tree(dfs)
+        assert sorted(dfs.list("")) == sorted(DiskFs(self.temp_dir).list(""))
+
+        dfs = DiskFs(self.temp_dir, index=True, index_ttl=0)
+
+        # external changes are detected
+        (path / self.fname).write_bytes(self.fcontents)
+        assert dfs.exists(self.fname) is True
+        assert dfs.get_bytes(self.fname) == self.fcontents
+        os.unlink(path / self.fname)
+        assert dfs.exists(self.fname) is False
+
+        # external changes are not detected until ttl expires
+        dfs = DiskFs(self.temp_dir, index=True, index_ttl=3600)
+        assert dfs.exists(self.fname) is False
+        (path / self.fname).write_bytes(self.fcontents)
+        assert dfs.exists(self.fname) is False
+        # own changes are always visible
+        dfs.replace(self.fname, self.fcontents)
+        assert dfs.exists(self.fname) is True
+        dfs.remove(self.fname)
+        assert dfs.exists(self.fname) is False
+        dfs.mkdir(self.dname)
+        assert dfs.is_dir(self.dname) is True
+        dfs.add(os.path.join(self.dname, self.fname), self.fcontents)
+        assert dfs.list_files(self.dname) == [self.fname]
+        os.unlink(path / self.dname / self.fname)
+        os.rmdir(path / self.dname)
+        dfs.invalidate_index()
+        assert dfs.exists(self.dname) is False
+
+        # symlinked dirs are listed, but their contents are only indexed if follow_links is True
+        os.symlink(path / self.tree_dirname.format(0, 0), path / self.dname)
+        os.symlink(path, path / self.tree_dirname.format(0, 0) / "loop")
+        loop = os.path.join(self.tree_dirname.format(0, 0), "loop")
+        dfs = DiskFs(self.temp_dir, index=True)
+        assert dfs.exists(self.dname) is True
+        assert dfs.is_dir(self.dname) is True
+        assert dfs.is_dir(loop) is True
+        assert self.dname + os.sep in dfs.list_dirs("")
+        assert dfs.list_files(self.dname) == []
+        assert sorted(dfs.list("")) == sorted(DiskFs(self.temp_dir).list(""))
+        dfs = DiskFs(self.temp_dir, index=True, follow_links=True)
+        assert dfs.is_dir(self.dname) is True
+        assert sorted(dfs.list_files(self.dname)) == sorted(
+            dfs.list_files(self.tree_dirname.format(0, 0))
+        )
+        # loops are not followed
+        assert dfs.is_dir(loop) is True
+        assert dfs.list(loop) == []
@@ -0,0 +1,93 @@
+from zipreport.fileutils import ZipFs
+from zipreport.fileutils.backend.zip import InMemoryZip
+from zipreport.fileutils.entrycache import EntryCache
+
+
+class TestEntryCache:
+    def test_entry_cache(self):
+        cache = EntryCache(10)
+        assert cache.get("a") is None
+        cache.put("a", b"1234")
+        cache.put("b", b"1234")
+        assert cache.get("a") == b"1234"
+        assert cache.size() == 8
+
+        # least recently used entry ("b") is evicted
+        cache.put("c", b"1234")
+        assert cache.get("b") is None
+        assert cache.get("a") == b"1234"
+        assert cache.get("c") == b"1234"
+        assert cache.size() == 8
+        assert len(cache) == 2
+
+        # entries larger than the budget are not stored
+        cache.put("d", b"01234567890")
+        assert cache.get("d") is None
+
+        # replacing an entry
+        cache.put("a", b"12")
+        assert cache.size() == 6
+
+        cache.invalidate("a")
+        assert cache.get("a") is None
+        assert cache.size() == 4
+        assert cache.hits == 3
+        assert cache.misses == 4
+
+        # entries invalidated after being read are not stored
+        generation = cache.generation("e")
+        cache.invalidate("e")
+        cache.put("e", b"stale", generation)
+        assert cache.get("e", count_miss=False) is None
+        cache.put("e", b"fresh", cache.generation("e"))
+        assert cache.get("e") == b"fresh"
+        assert cache.misses == 4
+
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.size() == 0
+        assert cache.hits == 0
+        cache.put("e", b"stale", generation)
+        assert cache.get("e") is None
+
+    def test_zipfs_entry_cache(self):
+        zfs = ZipFs(InMemoryZip())
+        assert zfs.get_entry_cache() is None
+
+        zfs = ZipFs(InMemoryZip(), entry_cache_size=1024)
+        zfs.add("a.txt", b"contents")
+        cache = zfs.get_entry_cache()
+        assert zfs.get_bytes("a.txt") == b"contents"
+        assert zfs.get("/a.txt").read() == b"contents"
+        with zfs.open_stream("a.txt") as f:
+            assert f.read() == b"contents"
+        assert cache.misses == 1
+        assert cache.hits == 2
+
+        # streamed files are not cached, and are not counted as misses
+        zfs.add("b.txt", b"streamed")
+        with zfs.open_stream("b.txt") as f:
+            assert f.read() == b"streamed"
+        assert cache.misses == 1
+
+        # contents replaced while being read are not cached
+        backend = zfs.get_backend()
+        read = backend.read
+
+        def concurrent_replace(name):
+            data = read(name)
+            zfs.replace(name, b"replaced")
+            return data
+
+        backend.read = concurrent_replace
+        assert zfs.get_bytes("b.txt") == b"streamed"
+        del backend.read
+        assert zfs.get_bytes("b.txt") == b"replaced"
+
+        # forks have their own cache
+        fork = zfs.fork()
+        assert fork.get_entry_cache() is not cache
+        assert fork.get_entry_cache().max_size() == 1024
+        fork.add("c.txt", b"other")
+        assert fork.get_bytes("c.txt") == b"other"
+        assert "c.txt" not in zfs.list_files("")
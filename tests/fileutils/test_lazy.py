@@ -0,0 +1,79 @@
+import io
+import os
+import tempfile
+from shutil import rmtree
+
+import pytest
+
+from zipreport.fileutils import ZipFs
+from zipreport.fileutils.backend.lazy import LazyZip
+from zipreport.fileutils.backend.overlay import OverlayZip
+from zipreport.fileutils.backend.zip import InMemoryZip, InMemoryZipError
+from .basezip import BaseZipTest
+
+
+class TestLazyZip(BaseZipTest):
+    fname = "some_stupid_file.file"
+    fcontents = b"the quick brown fox jumped over the lazy dog"
+
+    def setup_method(self, method):
+        self.temp_dir = tempfile.mkdtemp()
+        _, self.zipitems, zfs = self.create_sample1_zip()
+        self.zip_path = os.path.join(self.temp_dir, "sample1.zip")
+        zfs.get_backend().save(self.zip_path)
+
+    def teardown_method(self, method):
+        rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_lazy_read(self):
+        zip = LazyZip(self.zip_path, preload=["manifest.json"])
+        zfs = ZipFs(zip)
+        # listing and preloaded entries don't load the zip file
+        assert len(self.remove_dirs(zfs.list(""))) == self.zipitems
+        assert zfs.exists("index.html") is True
+        assert zfs.is_dir("partials") is True
+        assert len(zfs.get_bytes("manifest.json")) > 0
+        assert zip.get_buffer_size() == 0
+        assert zip.is_loaded() is False
+
+        # other entries load the zip file
+        index = zfs.get_bytes("index.html")
+        assert zip.is_loaded() is True
+        assert zip.get_buffer_size() == os.path.getsize(self.zip_path)
+        assert zfs.get_bytes("index.html") == index
+        assert len(self.remove_dirs(zfs.list(""))) == self.zipitems
+
+        with pytest.raises(InMemoryZipError):
+            LazyZip(os.path.join(self.temp_dir, "non_existing.zip"))
+
+    def test_lazy_write(self):
+        zip = LazyZip(self.zip_path)
+        zfs = ZipFs(zip)
+        zfs.add(self.fname, self.fcontents)
+        assert zip.is_loaded() is True
+        assert zfs.get_bytes(self.fname) == self.fcontents
+        assert len(self.remove_dirs(zfs.list(""))) == self.zipitems + 1
+
+        # exporting loads the zip file
+        zip = LazyZip(self.zip_path)
+        buf = zip.get_buffer()
+        assert zip.is_loaded() is True
+        assert len(InMemoryZip(buf).namelist()) == self.zipitems
+
+    def test_lazy_fork(self):
+        zip = LazyZip(self.zip_path, preload=["manifest.json"])
+        zfs = ZipFs(zip)
+        fork = zfs.fork()
+        assert isinstance(fork.get_backend(), OverlayZip) is True
+        fork.add(self.fname, self.fcontents)
+        assert len(fork.get_bytes("manifest.json")) > 0
+        assert zip.is_loaded() is False
+
+        # merging both layers loads the base
+        merged = ZipFs(InMemoryZip(io.BytesIO(fork.get_backend().getbuffer())))
+        assert zip.is_loaded() is True
+        assert merged.get_bytes(self.fname) == self.fcontents
+        assert len(self.remove_dirs(merged.list(""))) == self.zipitems + 1
+
+    def remove_dirs(self, dirlist: list):
+        return [i for i in dirlist if not i.endswith("/")]
@@ -0,0 +1,136 @@
+import io
+import os
+import socket
+import tempfile
+from shutil import rmtree
+
+import pytest
+
+from zipreport.fileutils import ZipFs, FsError
+from zipreport.fileutils.backend.mapped import MappedZip
+from zipreport.fileutils.backend.overlay import OverlayZip
+from zipreport.fileutils.backend.zip import InMemoryZip, InMemoryZipError
+from .basezip import BaseZipTest
+
+
+class TestMappedZip(BaseZipTest):
+    fname = "some_stupid_file.file"
+    fcontents = b"the quick brown fox jumped over the lazy dog"
+
+    def setup_method(self, method):
+        self.temp_dir = tempfile.mkdtemp()
+        _, self.zipitems, zfs = self.create_sample1_zip()
+        self.zip_path = os.path.join(self.temp_dir, "sample1.zip")
+        zfs.get_backend().save(self.zip_path)
+
+    def teardown_method(self, method):
+        rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_mapped_read(self):
+        zfs = ZipFs(MappedZip(self.zip_path))
+        assert len(self.remove_dirs(zfs.list(""))) == self.zipitems
+        assert zfs.exists("manifest.json") is True
+        assert len(zfs.get("manifest.json").getbuffer()) > 0
+
+        # mapped zip is read-only
+        with pytest.raises(FsError):
+            zfs.add(self.fname, self.fcontents)
+
+        with pytest.raises(InMemoryZipError):
+            MappedZip(os.path.join(self.temp_dir, "non_existing.zip"))
+
+    def test_mapped_view(self):
+        # saving or closing while a view is still in use
+        zip = MappedZip(self.zip_path)
+        view = zip.getbuffer()
+        dest = os.path.join(self.temp_dir, "copy.zip")
+        zip.save(dest)
+        assert zip.is_open() is False
+        assert bytes(view) == open(dest, "rb").read()
+        assert len(InMemoryZip(dest).namelist()) == len(InMemoryZip(self.zip_path).namelist())
+
+        zip = MappedZip(self.zip_path)
+        view2 = zip.getbuffer()
+        zip.close()
+        del zip
+        assert bytes(view2) == bytes(view)
+        view.release()
+        view2.release()
+
+    def test_overlay(self):
+        base = MappedZip(self.zip_path)
+        zfs = ZipFs(OverlayZip(base))
+        zfs.add(self.fname, self.fcontents)
+        assert zfs.get(self.fname).getbuffer() == self.fcontents
+        assert len(self.remove_dirs(zfs.list(""))) == self.zipitems + 1
+
+        # existing files cannot be overwritten
+        with pytest.raises(FsError):
+            zfs.add("manifest.json", self.fcontents)
+
+        # base is left untouched
+        assert self.fname not in base.namelist()
+
+        # merged copy contains both layers
+        buf = zfs.get_backend().get_buffer()
+        assert isinstance(buf, io.BytesIO) is True
+        merged = ZipFs(InMemoryZip(buf))
+        assert len(self.remove_dirs(merged.list(""))) == self.zipitems + 1
+        assert merged.get(self.fname).getbuffer() == self.fcontents
+        assert (
+            merged.get("manifest.json").getbuffer()
+            == zfs.get("manifest.json").getbuffer()
+        )
+
+        # export straight to a stream
+        out = io.BytesIO()
+        written = zfs.get_backend().write_to(out)
+        assert written == len(out.getbuffer()) == len(buf.getbuffer())
+        assert isinstance(zfs.get_backend().getbuffer(), memoryview) is True
+        assert base.getbuffer().nbytes == os.path.getsize(self.zip_path)
+
+        # overlay is still usable after get_buffer()
+        zfs.add("other_" + self.fname, self.fcontents)
+
+        # save to file
+        dest = os.path.join(self.temp_dir, "merged.zip")
+        zfs.get_backend().save(dest)
+        zfs = ZipFs(MappedZip(dest))
+        assert len(self.remove_dirs(zfs.list(""))) == self.zipitems + 2
+
+    def test_overlay_repack(self):
+        base = MappedZip(self.zip_path)
+        zfs = ZipFs(OverlayZip(base))
+        zfs.add(self.fname, self.fcontents * 100)
+
+        # unseekable destination
+        a, b = socket.socketpair()
+        try:
+            written = zfs.get_backend().write_to(a)
+            a.close()
+            received = b""
+            while True:
+                chunk = b.recv(65536)
+                if not chunk:
+                    break
+                received += chunk
+            assert len(received) == written
+        finally:
+            b.close()
+
+        repacked = InMemoryZip(io.BytesIO(received))
+        assert len(repacked.namelist()) == self.zipitems + 1
+        assert repacked.read(self.fname) == self.fcontents * 100
+
+        # base entries are copied verbatim, in compressed form
+        for info in base.infolist():
+            src_info, src_data = base.read_raw(info.filename)
+            dest_info, dest_data = repacked.read_raw(info.filename)
+            assert dest_data == src_data
+            assert dest_info.CRC == src_info.CRC
+            assert dest_info.compress_type == src_info.compress_type
+            assert dest_info.date_time == src_info.date_time
+            assert repacked.read(info.filename) == base.read(info.filename)
+
+    def remove_dirs(self, dirlist: list):
+        return [i for i in dirlist if not i.endswith("/")]
@@ -0,0 +1,81 @@
+import pytest
+
+from tests.utils import SAMPLE1_PATH
+from zipreport.fileutils import DiskFs, FsError, OverlayFs
+
+
+class TestOverlayFs:
+    fname = "this_test_file.txt"
+    fcontents = b"The quick brown fox jumped over the lazy dog"
+
+    def test_overlayfs(self):
+        base = DiskFs(SAMPLE1_PATH)
+        fs = OverlayFs(base)
+        files = [i for i in base.list("") if not i.endswith("/")]
+        assert fs.get_bytes("manifest.json") == base.get_bytes("manifest.json")
+        with fs.open_stream("/manifest.json") as f:
+            assert f.read() == base.get_bytes("manifest.json")
+
+        # new files go to the overlay
+        fs.add("dir/" + self.fname, self.fcontents)
+        assert fs.exists("dir/" + self.fname) is True
+        assert fs.is_dir("dir") is True
+        assert base.exists("dir") is False
+        assert "dir/" in fs.list_dirs("")
+        assert len([i for i in fs.list("") if not i.endswith("/")]) == len(files) + 1
+
+        # existing files cannot be added
+        with pytest.raises(FsError):
+            fs.add("manifest.json", self.fcontents)
+        with pytest.raises(FsError):
+            fs.mkdir("other_dir")
+
+        # replace and remove base files
+        fs.replace("index.html", self.fcontents)
+        assert fs.get_bytes("index.html") == self.fcontents
+        fs.remove("manifest.json")
+        assert fs.exists("manifest.json") is False
+        assert "manifest.json" not in fs.list_files("")
+        with pytest.raises(FsError):
+            fs.get_bytes("manifest.json")
+        with pytest.raises(FsError):
+            fs.remove("manifest.json")
+        assert base.exists("manifest.json") is True
+
+        # pack both layers
+        zfs = fs.pack()
+        assert zfs.exists("manifest.json") is False
+        assert zfs.get_bytes("index.html") == self.fcontents
+        assert zfs.get_bytes("dir/" + self.fname) == self.fcontents
+        assert len([i for i in zfs.list("") if not i.endswith("/")]) == len(files)
+
+    def test_overlayfs_fork(self):
+        fs = OverlayFs(DiskFs(SAMPLE1_PATH))
+        fs.add(self.fname, self.fcontents)
+        fork = fs.fork()
+        fork.add("other_" + self.fname, self.fcontents)
+        assert fork.exists(self.fname) is True
+        assert fs.exists("other_" + self.fname) is False
+
+        # forked OverlayFs is read-only
+        with pytest.raises(FsError):
+            fs.add("another_" + self.fname, self.fcontents)
+
+    def test_overlayfs_remove_dir(self):
+        fs = OverlayFs(DiskFs(SAMPLE1_PATH))
+        assert fs.is_dir("partials") is True
+
+        # directories are hidden once all their files are removed
+        fs.remove("partials/base.html")
+        assert fs.exists("partials") is False
+        assert fs.is_dir("partials") is False
+        assert "partials/" not in fs.list_dirs("")
+        assert [i for i in fs.list("") if i.startswith("partials")] == []
+        assert fs.exists("index.html") is True
+
+        # and visible again when files are added
+        fs.add("partials/" + self.fname, self.fcontents)
+        assert fs.exists("partials") is True
+        assert fs.is_dir("partials") is True
+        assert fs.list_dirs("") == ["partials/"]
+        assert fs.list_files("partials") == [self.fname]
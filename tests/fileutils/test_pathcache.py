@@ -48,3 +48,90 @@ class TestPathCache:
         items = cache.list_dirs("a")
         assert len(items) == 1
         assert items[0] == "b/"
+
+    def test_path_cache_fork(self):
+        cache = PathCache()
+        for i in self.items:
+            cache.add(i)
+
+        fork = cache.fork()
+        fork.add("a/b/item5.txt")
+        fork.add("e/item6.txt")
+
+        # parent is not affected
+        assert cache.file_exists("a/b/item5.txt") is False
+        assert cache.path_exists("e") is False
+        assert len(cache.list("")) == self.total_dirs + self.total_files
+
+        # fork sees both
+        assert fork.file_exists("a/b/item5.txt") is True
+        assert fork.file_exists("a/b/item2.txt") is True
+        assert fork.path_exists("e") is True
+        assert fork.path_exists("a/b/c/d") is True
+        assert len(fork.list("")) == self.total_dirs + self.total_files + 3
+        assert sorted(fork.list_files("a/b")) == ["item2.txt", "item5.txt"]
+        assert sorted(fork.list_dirs("")) == ["a/", "e/"]
+
+    def test_path_cache_source(self):
+        calls = []
+
+        def source():
+            calls.append(1)
+            return self.items + ["f/", "f/g/"]
+
+        # index is built on first use
+        cache = PathCache(source=source)
+        assert len(calls) == 0
+        assert cache.file_exists("/a/b/item2.txt") is True
+        assert cache.file_exists("a/b") is False
+        assert cache.path_exists("a/b/") is True
+        assert cache.path_exists("") is True
+        assert len(calls) == 1
+
+        # explicit directory entries
+        assert cache.path_exists("f/g") is True
+        assert cache.file_exists("f") is False
+        assert cache.list_dirs("f") == ["g/"]
+        assert cache.list_files("f") == []
+        assert len(cache.list("")) == self.total_dirs + self.total_files + 2
+
+        # listing is relative to the given path
+        assert sorted(cache.list("a/b/c")) == [
+            "d/",
+            "d/item1.txt",
+            "d/item4.txt",
+            "item3.txt",
+        ]
+        assert cache.list("a/b/c/item3.txt") == []
+        assert len(calls) == 1
+
+    def test_path_cache_remove(self):
+        cache = PathCache()
+        for i in self.items:
+            cache.add(i)
+
+        cache.remove("a/b/c/d/item1.txt")
+        assert cache.file_exists("a/b/c/d/item1.txt") is False
+        assert cache.path_exists("a/b/c/d") is True
+        cache.remove("a/b/c/d/item4.txt")
+        # empty dirs are removed
+        assert cache.path_exists("a/b/c/d") is False
+        assert cache.path_exists("a/b/c") is True
+        assert len(cache.list("")) == self.total_dirs + self.total_files - 3
+
+        # removing items from the parent
+        fork = cache.fork()
+        fork.add("e/item5.txt")
+        fork.remove("a/b/c/item3.txt")
+        assert fork.file_exists("a/b/c/item3.txt") is False
+        assert fork.path_exists("a/b/c") is False
+        assert fork.file_exists("e/item5.txt") is True
+        assert cache.file_exists("a/b/c/item3.txt") is True
+        assert sorted(fork.list("")) == [
+            "a/",
+            "a/b/",
+            "a/b/item2.txt",
+            "e/",
+            "e/item5.txt",
+            "item0.txt",
+        ]
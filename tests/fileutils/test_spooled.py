@@ -0,0 +1,81 @@
+import io
+import os
+import tempfile
+from shutil import rmtree
+
+import pytest
+
+from zipreport.fileutils import ZipFs
+from zipreport.fileutils.backend.spooled import SpooledZip, SpooledBuffer
+from zipreport.fileutils.backend.zip import InMemoryZip, InMemoryZipError
+from .basefs import BaseFsTest
+from .basezip import BaseZipTest
+
+
+class TestSpooledZip(BaseFsTest, BaseZipTest):
+    def setup_method(self, method):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def teardown_method(self, method):
+        rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_spooled_tree(self):
+        # small threshold, so the zip is moved to disk early
+        zfs = ZipFs(SpooledZip(max_size=4096))
+        assert zfs.get_backend().is_spooled() is False
+        self.build_tree(zfs)
+        assert zfs.get_backend().is_spooled() is True
+        self.verify_tree(zfs)
+
+        with pytest.raises(InMemoryZipError):
+            zfs.get_backend().getbuffer()
+
+        # export
+        buf = zfs.get_backend().get_buffer()
+        assert isinstance(buf, SpooledBuffer) is True
+        out = io.BytesIO()
+        written = zfs.get_backend().write_to(out)
+        assert written == len(out.getbuffer())
+        self.verify_tree(ZipFs(InMemoryZip(out)))
+
+        # save and reload
+        path = os.path.join(self.temp_dir, "tree.zip")
+        zfs.get_backend().save(path)
+        assert zfs.get_backend().is_open() is False
+        zfs = ZipFs(SpooledZip(path, max_size=4096))
+        self.verify_tree(zfs)
+        zfs.add("extra.txt", b"extra")
+        zfs.add("removed.txt", b"removed")
+        zfs.replace("extra.txt", b"replaced")
+        zfs.remove("removed.txt")
+        # contents moved to disk are not read back into memory
+        stream = zfs.get_backend().save_stream()
+        assert isinstance(stream, SpooledBuffer) is True
+        assert stream.is_rolled() is True
+        zfs = ZipFs(SpooledZip(stream))
+        assert zfs.get("extra.txt").getbuffer() == b"replaced"
+        assert zfs.exists("removed.txt") is False
+
+        # spooled buffers can be loaded by other backends
+        names = zfs.get_backend().namelist()
+        zfs = ZipFs(InMemoryZip(zfs.get_backend().get_buffer()))
+        assert zfs.get_backend().namelist() == names
+        assert zfs.get("extra.txt").getbuffer() == b"replaced"
+        zfs = ZipFs(InMemoryZip(SpooledZip(path, max_size=4096).save_stream()))
+        self.verify_tree(zfs)
+
+        with pytest.raises(TypeError):
+            SpooledZip(b"not a buffer")
+        with pytest.raises(TypeError):
+            InMemoryZip(b"not a buffer")
+
+    def test_spooled_memory(self):
+        _, zipitems, zfs = self.create_sample1_zip()
+        src = zfs.get_backend().save_stream()
+
+        # small zip is kept in memory
+        zfs = ZipFs(SpooledZip(src))
+        assert zfs.get_backend().is_spooled() is False
+        assert len([i for i in zfs.list("") if not i.endswith("/")]) == zipitems
+        view = zfs.get_backend().getbuffer()
+        assert view.nbytes > 0
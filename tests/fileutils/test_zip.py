@@ -1,5 +1,6 @@
 import io
 import os
+import socket
 import tempfile
 from pathlib import Path
 from shutil import rmtree
@@ -71,9 +72,110 @@ class TestZip(BaseZipTest):
         data = zfs.get(fname)
         assert bytes(data.getbuffer()) == fcontents
 
+    def test_export_zip(self):
+        _, zipitems, zfs = self.create_sample1_zip()
+        backend = zfs.get_backend()
+
+        view = backend.getbuffer()
+        assert isinstance(view, memoryview) is True
+        assert view.readonly is True
+
+        # zip is still usable, and the view is not affected by further changes
+        zfs.add("some_file.txt", b"abc")
+        size = view.nbytes
+        assert backend.getbuffer().nbytes > size
+
+        # the internal ZipFile is not reopened when exporting
+        zf = backend.zip()
+        view = backend.getbuffer()
+        assert backend.zip() is zf
+        assert len(InMemoryZip(io.BytesIO(view.tobytes())).namelist()) == len(backend.namelist())
+        zfs.add("other_file.txt", b"def")
+        assert backend.zip() is zf
+        assert zfs.get("other_file.txt").read() == b"def"
+        zip2 = InMemoryZip(backend.get_buffer())
+        assert zip2.read("some_file.txt") == b"abc"
+        assert zip2.read("other_file.txt") == b"def"
+
+        # write to file
+        tmp = tempfile.mkdtemp()
+        path = os.path.join(tmp, "sample1.zip")
+        with open(path, "wb") as f:
+            written = backend.write_to(f)
+        assert os.path.getsize(path) == written
+        zfs2 = ZipFs(InMemoryZip(path))
+        assert len(self.remove_dirs(zfs2.list(""))) == zipitems + 2
+        rmtree(tmp, ignore_errors=True)
+
+        # write to socket
+        a, b = socket.socketpair()
+        try:
+            written = backend.write_to(a)
+            a.close()
+            received = b""
+            while True:
+                chunk = b.recv(65536)
+                if not chunk:
+                    break
+                received += chunk
+            assert len(received) == written
+        finally:
+            b.close()
+
+        # save_stream() returns the internal buffer
+        internal = backend._buffer
+        assert backend.save_stream() is internal
+
+    def test_raw_copy(self):
+        _, zipitems, zfs = self.create_sample1_zip()
+        src = zfs.get_backend()
+        dest = InMemoryZip()
+        for info in src.infolist():
+            dest.write_raw(*src.read_raw(info.filename))
+
+        copied = ZipFs(InMemoryZip(dest.save_stream()))
+        assert len(self.remove_dirs(copied.list(""))) == zipitems
+        for info in src.infolist():
+            assert copied.get(info.filename).getbuffer() == src.read(info.filename)
+
     def remove_dirs(self, dirlist: list):
         result = []
         for i in dirlist:
             if not i.endswith("/"):
                 result.append(i)
         return result
+
+    def test_remove_zip(self):
+        zip = InMemoryZip()
+        zip.writestr("a.txt", b"first" * 100)
+        zip.writestr("b.txt", b"second")
+        size = len(zip.getbuffer())
+
+        # replace
+        zip.writestr("a.txt", b"third")
+        assert zip.read("a.txt") == b"third"
+        assert zip.namelist() == ["b.txt", "a.txt"]
+        assert zip.get_garbage_size() > 0
+
+        # remove
+        zip.remove("b.txt")
+        assert zip.namelist() == ["a.txt"]
+        with pytest.raises(KeyError):
+            zip.getinfo("b.txt")
+        with pytest.raises(KeyError):
+            zip.remove("b.txt")
+
+        # removed contents are discarded on export
+        buf = zip.get_buffer()
+        assert zip.get_garbage_size() == 0
+        assert len(buf.getbuffer()) < size
+        copy = InMemoryZip(buf)
+        assert copy.namelist() == ["a.txt"]
+        assert copy.read("a.txt") == b"third"
+
+        zip.writestr("c.txt", b"fourth")
+        zip.remove("c.txt")
+        assert InMemoryZip(zip.save_stream()).namelist() == ["a.txt"]
+
+        with pytest.raises(InMemoryZipError):
+            InMemoryZip().freeze().remove("a.txt")
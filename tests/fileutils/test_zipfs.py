@@ -27,6 +27,15 @@ class TestZipFs(BaseFsTest, BaseZipTest):
         zfs.add(self.fname, self.fcontents)
         assert zfs.get(self.fname).getbuffer() == self.fcontents
 
+        # streaming reads
+        assert zfs.get_bytes("/" + self.fname) == self.fcontents
+        with zfs.open_stream(self.fname) as f:
+            assert f.read(4) == self.fcontents[:4]
+            assert f.read() == self.fcontents[4:]
+        for method in [zfs.get, zfs.get_bytes, zfs.open_stream]:
+            with pytest.raises(FsError):
+                method("missing_" + self.fname)
+
     def test_zipfs_tree(self):
         """
         Test a full directory tree
@@ -48,3 +57,99 @@ class TestZipFs(BaseFsTest, BaseZipTest):
 
         # verify tree
         self.verify_tree(zfs)
+
+    def test_zipfs_fork(self):
+        _, zipitems, zfs = self.create_sample1_zip()
+
+        fork1 = zfs.fork()
+        fork2 = zfs.fork()
+        fork1.add(self.fname, self.fcontents)
+        assert fork1.exists(self.fname) is True
+        assert fork1.get(self.fname).getbuffer() == self.fcontents
+        assert fork2.exists(self.fname) is False
+        assert zfs.exists(self.fname) is False
+
+        # both forks can add the same file independently
+        fork2.add(self.fname, b"other contents")
+        assert fork2.get(self.fname).getbuffer() == b"other contents"
+        assert fork1.get(self.fname).getbuffer() == self.fcontents
+
+        # shared contents are readable from all instances
+        assert (
+            fork1.get("manifest.json").getbuffer()
+            == zfs.get("manifest.json").getbuffer()
+        )
+
+        # forked ZipFs is read-only
+        with pytest.raises(FsError):
+            zfs.add(self.fname, self.fcontents)
+
+        # fork of a fork
+        fork3 = fork1.fork()
+        fork3.add("other_" + self.fname, self.fcontents)
+        assert fork3.exists(self.fname) is True
+        assert fork1.exists("other_" + self.fname) is False
+
+        # forks export all contents
+        merged = ZipFs(InMemoryZip(fork3.get_backend().save_stream()))
+        assert merged.get(self.fname).getbuffer() == self.fcontents
+        assert len([i for i in merged.list("") if not i.endswith("/")]) == zipitems + 2
+
+    def test_zipfs_dedup(self):
+        zfs = ZipFs(InMemoryZip(), dedupe=True)
+        assert zfs.is_dedupe() is True
+        name = zfs.add_dedup("data/a.png", self.fcontents)
+        assert name == "data/a.png"
+
+        # identical contents are stored only once
+        assert zfs.add_dedup("/data/b.png", self.fcontents) == name
+        assert zfs.exists("data/b.png") is False
+        # extension is part of the key
+        assert zfs.add_dedup("data/c.gif", self.fcontents) == "data/c.gif"
+        assert zfs.add_dedup("data/d.png", b"other contents") == "data/d.png"
+
+        # forks share known contents
+        fork = zfs.fork()
+        assert fork.add_dedup("data/e.png", self.fcontents) == name
+
+        # dedup disabled by default
+        zfs = ZipFs(InMemoryZip())
+        assert zfs.is_dedupe() is False
+        zfs.add_dedup("data/a.png", self.fcontents)
+        assert zfs.add_dedup("data/b.png", self.fcontents) == "data/b.png"
+        assert zfs.exists("data/b.png") is True
+        zfs.set_dedupe(True)
+        assert zfs.add_dedup("data/c.png", self.fcontents) == "data/c.png"
+        assert zfs.add_dedup("data/d.png", self.fcontents) == "data/c.png"
+
+    def test_zipfs_replace(self):
+        _, zipitems, zfs = self.create_sample1_zip()
+
+        zfs.replace(self.fname, self.fcontents)
+        zfs.replace(self.fname, b"other contents")
+        assert zfs.get_bytes(self.fname) == b"other contents"
+        zfs.remove("/" + self.fname)
+        assert zfs.exists(self.fname) is False
+        with pytest.raises(FsError):
+            zfs.remove(self.fname)
+
+        # removing the last file of a dir removes the dir
+        zfs.add("some_dir/" + self.fname, self.fcontents)
+        assert zfs.is_dir("some_dir") is True
+        zfs.remove("some_dir/" + self.fname)
+        assert zfs.is_dir("some_dir") is False
+
+        # forks can replace and remove shared files
+        fork = zfs.fork()
+        fork.replace("manifest.json", b"{}")
+        assert fork.get_bytes("manifest.json") == b"{}"
+        assert zfs.get_bytes("manifest.json") != b"{}"
+        fork.remove("index.html")
+        assert fork.exists("index.html") is False
+        assert zfs.exists("index.html") is True
+        assert "index.html" not in fork.list_files("")
+
+        merged = ZipFs(InMemoryZip(fork.get_backend().save_stream()))
+        assert merged.exists("index.html") is False
+        assert merged.get_bytes("manifest.json") == b"{}"
+        assert len([i for i in merged.list("") if not i.endswith("/")]) == zipitems - 1
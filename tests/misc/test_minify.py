@@ -0,0 +1,95 @@
+from zipreport.misc.minify import minify, minify_css, minify_html, minify_js
+
+
+class TestMinify:
+    def test_minify_css(self):
+        css = """/* comment */
+a :hover , b > c {
+  color: red ;  /*! license */
+  content: "a  /* b */  c";
+  width: calc(1px + 2px);
+}
+"""
+        assert minify_css(css) == (
+            'a :hover,b>c{color:red;/*! license */ content:"a  /* b */  c";'
+            "width:calc(1px + 2px)}"
+        )
+
+    def test_minify_js(self):
+        js = """// comment
+var a = 1, b = 2; /* comment */
+function f(x) {
+    return x / 2 / /a\\/b[/]/g.test("a // b") ? `a ${ `b ${a}` } // c` : 1 .toString();
+}
+var c = a
++ +b
+"""
+        assert minify_js(js) == (
+            "var a=1,b=2;function f(x){return x/2/ /a\\/b[/]/g.test"
+            '("a // b")?`a ${ `b ${a}` } // c`:1 .toString();}\n'
+            "var c=a\n+ +b"
+        )
+
+    def test_minify_html(self):
+        html = """<html>
+  <!-- comment -->
+  <!-- {{ kept }} -->
+  <style> p { color : red; } </style>
+  <script>var x = "{{ value }}";  </script>
+  <body>
+    {% if a   >  b %}
+      <p>  Hello   {{ name  }}  </p>
+    {% endif %}
+    {% raw %}  {{ raw   }}  {% endraw %}
+    <pre>  keep   this  </pre>
+  </body>
+</html>"""
+        assert minify_html(html) == """<html>
+<!-- {{ kept }} -->
+<style>p{color :red}</style>
+<script>var x = "{{ value }}";  </script>
+<body>
+{% if a   >  b %}
+<p> Hello {{ name  }} </p>
+{% endif %}
+{% raw %}  {{ raw   }}  {% endraw %}
+<pre>  keep   this  </pre>
+</body>
+</html>"""
+
+    def test_minify_html_attributes(self):
+        # quoted attribute values are kept as-is
+        html = """<div   class="a   b"
+     title='x  >  y'   data-x=1>  text  </div>
+<textarea placeholder="  keep  "> a  b </textarea>"""
+        assert minify_html(html) == """<div class="a   b"
+title='x  >  y' data-x=1> text </div>
+<textarea placeholder="  keep  "> a  b </textarea>"""
+
+    def test_minify_html_jinja_attributes(self):
+        html = """{% for item in items %}
+  <span   class="{{ item.cls }}   {% if item.active %}  active  {% endif %}"
+        title="{{ "a  >  b" if x > y else '  c  ' }}"  {% if item.id %}  id="  {{ item.id }}"{% endif %}>
+    {{  item.name  }}
+  </span>
+{% endfor %}"""
+        assert minify_html(html) == """{% for item in items %}
+<span class="{{ item.cls }}   {% if item.active %}  active  {% endif %}"
+title="{{ "a  >  b" if x > y else '  c  ' }}" {% if item.id %} id="  {{ item.id }}"{% endif %}>
+{{  item.name  }}
+</span>
+{% endfor %}"""
+
+    def test_minify(self):
+        # unsupported types and files with jinja syntax are not modified
+        assert minify("a.txt", b"a    b") == b"a    b"
+        assert minify("a.css", b"a { b: {{ c }} }") == b"a { b: {{ c }} }"
+        assert minify("a.html", b"<p>  {{ a }}  </p>") == b"<p>  {{ a }}  </p>"
+        assert minify("a.html", b"<p>  a  </p>") == b"<p> a </p>"
+        # whitespace may be significant when rendering templates (eg. text output)
+        template = b"{% for a in b %}\n  - {{ a }}\n{% endfor %}\n<pre>{% include 'x' %}</pre>"
+        assert minify("a.html", template) == template
+        assert minify("a.CSS", b"a { b: c }") == b"a{b:c}"
+        # invalid contents are not modified
+        assert minify("a.js", b"var a = 'b") == b"var a = 'b"
+        assert minify("a.html", b"\xff   \xfe") == b"\xff   \xfe"
@@ -18,3 +18,11 @@ class TestJinjaRender(BaseTest):
 
         with pytest.raises(TemplateNotFound):
             loader.get_source(None, "non-existing-template.html")
+
+        # list templates
+        templates = loader.list_templates()
+        assert "index.html" in templates
+        assert "manifest.json" in templates
+        assert templates == sorted(templates)
+        for name in templates:
+            assert not name.endswith("/")
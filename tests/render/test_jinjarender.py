@@ -1,10 +1,16 @@
+import json
+from pathlib import Path
+from unittest import mock
+
 import markupsafe
 import pytest
 from jinja2 import Environment, pass_environment
 
 from tests.render.base import BaseTest
+from tests.utils import RPT_SIMPLE_PATH
 from zipreport.template import JinjaRender, EnvironmentWrapper
-from zipreport.report import REPORT_FILE_NAME
+from zipreport.report import REPORT_FILE_NAME, ReportFileBuilder, ReportFileLoader
+from zipreport.report.const import BYTECODE_CACHE_PATH
 
 
 @pass_environment
@@ -19,6 +25,18 @@ class CustomEnv(EnvironmentWrapper):
         return e
 
 
+class TrimEnv(EnvironmentWrapper):
+    def wrap(self, e: Environment):
+        e.trim_blocks = True
+        return e
+
+
+class FinalizeEnv(EnvironmentWrapper):
+    def wrap(self, e: Environment):
+        e.finalize = lambda value: "" if value is None else value
+        return e
+
+
 class TestJinjaRender(BaseTest):
     def test_render(self):
         # test render happy path
@@ -34,6 +52,10 @@ class TestJinjaRender(BaseTest):
         assert html_report == str(result)
         assert html_report.find("Lorem ipsum dolor sit amet") > 0
 
+        # render again on the same report
+        result = render.render()
+        assert str(zpt.get(REPORT_FILE_NAME).read(), "utf-8") == str(result)
+
     def test_exceptions(self):
         zpt = self.build_zpt()
 
@@ -76,3 +98,51 @@ class TestJinjaRender(BaseTest):
         result = engine.render({"title_text": "some sample text"})
         assert len(result) > 0
         assert result.find("<h1>lorem ipsum dolor sit</h1>") > -1
+
+    def test_precompile(self):
+        zptfile = Path(self.temp_dir) / "precompiled.zpt"
+        result = ReportFileBuilder.build_file(RPT_SIMPLE_PATH, zptfile, precompile=True)
+        assert result.success() is True
+        zpt = ReportFileLoader.load_file(zptfile)
+        assert len(zpt.get_fs().list_files(BYTECODE_CACHE_PATH)) > 0
+        expected = JinjaRender(self.build_zpt()).render()
+
+        # precompiled templates are used
+        with mock.patch.object(
+            Environment, "compile", side_effect=AssertionError("compiled")
+        ):
+            assert JinjaRender(zpt).render() == expected
+
+        # templates are compiled from source if disabled, or if the environment differs
+        for render in [
+            JinjaRender(zpt, {JinjaRender.OPT_BYTECODE_CACHE: False}),
+            JinjaRender(zpt, wrapper=TrimEnv()),
+        ]:
+            with mock.patch.object(
+                Environment, "compile", side_effect=AssertionError("compiled")
+            ):
+                with pytest.raises(AssertionError, match="compiled"):
+                    render.render()
+
+    def test_precompile_finalize(self):
+        src = Path(self.temp_dir) / "src"
+        src.mkdir()
+        manifest = {"author": "a", "title": "t", "description": "d", "version": "1.0", "params": ["value"]}
+        (src / "manifest.json").write_text(json.dumps(manifest))
+        (src / "index.html").write_text("<p>{{ value }}</p>")
+
+        results = []
+        for precompile in [False, True]:
+            zptfile = Path(self.temp_dir) / "finalize{}.zpt".format(int(precompile))
+            result = ReportFileBuilder.build_file(src, zptfile, precompile=precompile)
+            assert result.success() is True
+            zpt = ReportFileLoader.load_file(zptfile)
+            assert JinjaRender(zpt).render({"value": None}) == "<p>None</p>"
+            results.append(JinjaRender(zpt, wrapper=FinalizeEnv()).render({"value": None}))
+        # the wrapper finalize is applied regardless of precompiled templates
+        assert results == ["<p></p>", "<p></p>"]
+
+        # nothing is stored for environments with a finalize function
+        zpt = ReportFileLoader.load_file(Path(self.temp_dir) / "finalize0.zpt")
+        assert JinjaRender(zpt, wrapper=FinalizeEnv()).precompile() == {}
+        assert zpt.get_fs().exists(BYTECODE_CACHE_PATH) is False
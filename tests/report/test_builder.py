@@ -1,12 +1,15 @@
+import io
 import json
 import os
 import tempfile
 from pathlib import Path
-from shutil import rmtree
+from shutil import copytree, rmtree
 
-from tests.utils import SAMPLE1_PATH
+from tests.utils import SAMPLE1_PATH, RPT_SIMPLE_PATH
+from zipreport.fileutils.backend.zip import InMemoryZip
+from zipreport.report import builder
 from zipreport.report.builder import ReportFileBuilder
-from zipreport.report.const import ZIPREPORT_FILE_EXTENSION
+from zipreport.report.const import ZIPREPORT_FILE_EXTENSION, CONTENT_INDEX_FILE_NAME
 
 
 class TestReportFileBuilder:
@@ -15,6 +18,10 @@ class TestReportFileBuilder:
         "test_builder_success",
         "test_builder_fail",
         "test_builder_required_files",
+        "test_builder_incremental",
+        "test_builder_stream",
+        "test_builder_exclude",
+        "test_builder_deterministic",
     ]
 
     manifest = {
@@ -26,6 +33,19 @@ class TestReportFileBuilder:
         "config": {},
     }
 
+    @staticmethod
+    def read_entries(zip: InMemoryZip) -> dict:
+        """
+        Read all entries of a report file; source file information is removed from the content index
+        :param zip: report file
+        :return: dict of name: contents
+        """
+        result = {name: zip.read(name) for name in zip.namelist()}
+        index = json.loads(result[CONTENT_INDEX_FILE_NAME])
+        index.pop("sources", None)
+        result[CONTENT_INDEX_FILE_NAME] = index
+        return result
+
     def setup_method(self, method):
         if method.__name__ in self.temp_methods:
             self.temp_dir = tempfile.mkdtemp()
@@ -48,6 +68,236 @@ class TestReportFileBuilder:
         destfile = destfile.parent / (destfile.name + ZIPREPORT_FILE_EXTENSION)
         assert destfile.exists() is True
 
+    def test_builder_workers(self):
+        _, serial = ReportFileBuilder.build_zipfs(SAMPLE1_PATH, io.StringIO())
+        _, parallel = ReportFileBuilder.build_zipfs(
+            SAMPLE1_PATH, io.StringIO(), workers=4
+        )
+        # output does not depend on the number of workers
+        assert (
+            serial.get_backend().getbuffer() == parallel.get_backend().getbuffer()
+        )
+        assert len(serial.get_backend().namelist()) > 0
+
+    def test_builder_incremental(self, monkeypatch):
+        hashed = ReportFileBuilder._file_hash
+        src = Path(self.temp_dir) / "src"
+        copytree(SAMPLE1_PATH, src)
+        destfile = Path(self.temp_dir) / "test.zpt"
+
+        # existing file is not a valid zip
+        destfile.write_bytes(b"abc")
+        result = ReportFileBuilder.build_file(
+            src, destfile, console=io.StringIO(), incremental=True
+        )
+        assert result.success() is True
+
+        # source file sizes and modification times are stored
+        index = json.loads(InMemoryZip(str(destfile)).read(CONTENT_INDEX_FILE_NAME))
+        st = os.stat(src / "data.json")
+        assert index["sources"]["data.json"] == [st.st_size, st.st_mtime_ns]
+
+        # modify a file and touch another
+        (src / "index.html").write_bytes(b"<html>changed</html>")
+        os.utime(src / "data.json", (0, 0))
+        read = []
+        monkeypatch.setattr(
+            ReportFileBuilder,
+            "_file_hash",
+            staticmethod(lambda name: read.append(name) or hashed(name)),
+        )
+        console = io.StringIO()
+        result = ReportFileBuilder.build_file(
+            src, destfile, console=console, incremental=True
+        )
+        assert result.success() is True
+        output = console.getvalue()
+        assert "Copying index.html..." in output
+        assert "Unchanged data.json..." in output
+        assert "Unchanged manifest.json..." in output
+        # only files with a different modification time are read
+        assert read == [src / "data.json"]
+
+        # result is the same as a full build
+        zip = InMemoryZip(str(destfile))
+        _, full = ReportFileBuilder.build_zipfs(src, io.StringIO())
+        full = full.get_backend()
+        assert zip.namelist() == full.namelist()
+        assert self.read_entries(zip) == self.read_entries(full)
+        # entries are stored with fixed timestamps and attributes
+        for name in full.namelist():
+            assert zip.getinfo(name).date_time == full.getinfo(name).date_time
+            assert zip.getinfo(name).external_attr == full.getinfo(name).external_attr
+        assert zip.read("index.html") == b"<html>changed</html>"
+
+        # unchanged files are not read
+        read.clear()
+        result = ReportFileBuilder.build_file(
+            src, destfile, console=io.StringIO(), incremental=True
+        )
+        assert result.success() is True
+        assert read == []
+
+    def test_builder_stream(self, monkeypatch):
+        src = Path(self.temp_dir) / "src"
+        copytree(SAMPLE1_PATH, src)
+        (src / "large.bin").write_bytes(os.urandom(4096) * 16)
+        destfile = Path(self.temp_dir) / "test.zpt"
+
+        def verify():
+            zip = InMemoryZip(str(destfile))
+            _, full = ReportFileBuilder.build_zipfs(src, io.StringIO())
+            full = full.get_backend()
+            assert zip.namelist() == full.namelist()
+            assert self.read_entries(zip) == self.read_entries(full)
+
+        result = ReportFileBuilder.build_file(
+            src, destfile, console=io.StringIO(), stream=True
+        )
+        assert result.success() is True
+        verify()
+        # temporary file is removed
+        assert sorted(os.listdir(self.temp_dir)) == ["src", "test.zpt"]
+        assert oct(destfile.stat().st_mode & 0o777) != oct(0o600)
+
+        # large files are compressed and copied in chunks
+        monkeypatch.setattr(builder, "STREAM_FILE_SIZE", 1024)
+        result = ReportFileBuilder.build_file(
+            src, destfile, console=io.StringIO(), overwrite=True, stream=True
+        )
+        assert result.success() is True
+        verify()
+        (src / "index.html").write_bytes(b"<html>changed</html>")
+        os.utime(src / "large.bin", (0, 0))
+        console = io.StringIO()
+        result = ReportFileBuilder.build_file(
+            src, destfile, console=console, incremental=True, stream=True
+        )
+        assert result.success() is True
+        assert "Unchanged large.bin..." in console.getvalue()
+        verify()
+
+        # precompiled templates are appended
+        result = ReportFileBuilder.build_file(
+            src,
+            destfile,
+            console=io.StringIO(),
+            overwrite=True,
+            stream=True,
+            precompile=True,
+        )
+        assert result.success() is True
+        zip = InMemoryZip(str(destfile))
+        names = [name for name in zip.namelist() if name.startswith(".bytecode/")]
+        assert len(names) > 0
+
+        # failed builds leave the destination untouched
+        contents = destfile.read_bytes()
+        os.unlink(src / "manifest.json")
+        result = ReportFileBuilder.build_file(
+            src, destfile, console=io.StringIO(), overwrite=True, stream=True
+        )
+        assert result.success() is False
+        assert destfile.read_bytes() == contents
+        assert sorted(os.listdir(self.temp_dir)) == ["src", "test.zpt"]
+
+    def test_builder_exclude(self):
+        src = Path(self.temp_dir) / "src"
+        copytree(SAMPLE1_PATH, src)
+        (src / ".zptignore").write_text("*.swp\n.git/\nmanifest.json\n")
+        (src / ".index.html.swp").write_bytes(b"x" * 10)
+        (src / ".git").mkdir()
+        (src / ".git" / "HEAD").write_bytes(b"x" * 20)
+        (src / "used.png").write_bytes(b"x" * 30)
+        (src / "unused.png").write_bytes(b"x" * 40)
+        with open(src / "index.html", "a") as f:
+            f.write('<img src="used.png">')
+
+        console = io.StringIO()
+        status, zfs = ReportFileBuilder.build_zipfs(src, console)
+        assert status.success() is True
+        names = zfs.get_backend().namelist()
+        # manifest is never ignored
+        assert "manifest.json" in names
+        assert "unused.png" in names
+        for name in [".zptignore", ".index.html.swp", ".git/HEAD"]:
+            assert name not in names
+        assert "Excluded 3 files" in console.getvalue()
+
+        console = io.StringIO()
+        status, zfs = ReportFileBuilder.build_zipfs(src, console, prune=True)
+        assert status.success() is True
+        names = zfs.get_backend().namelist()
+        assert "used.png" in names
+        assert "unused.png" not in names
+        size = (src / ".zptignore").stat().st_size + 70
+        assert "Pruning unused.png..." in console.getvalue()
+        assert "Excluded 4 files, {} bytes saved".format(size) in console.getvalue()
+
+    def test_builder_deterministic(self, monkeypatch):
+        src1 = Path(self.temp_dir) / "src1"
+        src2 = Path(self.temp_dir) / "src2"
+        copytree(SAMPLE1_PATH, src1)
+        copytree(SAMPLE1_PATH, src2)
+        (src1 / "large.bin").write_bytes(os.urandom(4096))
+        (src2 / "large.bin").write_bytes((src1 / "large.bin").read_bytes())
+        for name in src2.rglob("*"):
+            os.utime(name, (1000000000, 1000000000))
+        os.chmod(src2 / "data.json", 0o600)
+
+        def build(src, name, **kwargs):
+            dest = Path(self.temp_dir) / name
+            result = ReportFileBuilder.build_file(
+                src, dest, console=io.StringIO(), overwrite=True, **kwargs
+            )
+            assert result.success() is True
+            return dest.read_bytes()
+
+        # same contents, different timestamps and permissions
+        contents = build(src1, "test1.zpt")
+        assert build(src2, "test2.zpt") == contents
+        assert build(src2, "test2.zpt", workers=4) == contents
+        assert build(src2, "test3.zpt", stream=True) == contents
+        monkeypatch.setattr(builder, "STREAM_FILE_SIZE", 1024)
+        assert build(src1, "test3.zpt", stream=True) == contents
+
+        # incremental builds only differ in the source file information of the content index
+        entries = self.read_entries(InMemoryZip(io.BytesIO(contents)))
+        incremental = InMemoryZip(io.BytesIO(build(src1, "test1.zpt", incremental=True)))
+        assert self.read_entries(incremental) == entries
+        assert build(src1, "test1.zpt") == contents
+        incremental = build(src2, "test3.zpt", stream=True, incremental=True)
+        assert self.read_entries(InMemoryZip(io.BytesIO(incremental))) == entries
+
+        zip = InMemoryZip(io.BytesIO(contents))
+        names = zip.namelist()
+        assert names[-1] == CONTENT_INDEX_FILE_NAME
+        assert names[:-1] == sorted(names[:-1])
+        for info in zip.infolist():
+            assert info.date_time == builder.ARCHIVE_DATE_TIME
+        index = json.loads(zip.read(CONTENT_INDEX_FILE_NAME))
+        assert sorted(index["files"].keys()) == names[:-1]
+
+        # different contents change the fingerprint
+        (src2 / "data.json").write_text("{}")
+        zip = InMemoryZip(io.BytesIO(build(src2, "test2.zpt")))
+        assert json.loads(zip.read(CONTENT_INDEX_FILE_NAME))["fingerprint"] != (
+            index["fingerprint"]
+        )
+
+    def test_builder_minify(self):
+        _, zfs = ReportFileBuilder.build_zipfs(RPT_SIMPLE_PATH, io.StringIO())
+        _, minified = ReportFileBuilder.build_zipfs(
+            RPT_SIMPLE_PATH, io.StringIO(), minify=True
+        )
+        zip, minified = zfs.get_backend(), minified.get_backend()
+        assert zip.namelist() == minified.namelist()
+        # stylesheets are smaller
+        assert len(minified.read("css/style.css")) < len(zip.read("css/style.css"))
+        # templates and other files are not modified
+        for name in ["index.html", "partials/base.html", "data.json"]:
+            assert minified.read(name) == zip.read(name)
+
     def test_builder_fail(self):
         destfile = Path(self.temp_dir) / "test.zpt"
 
@@ -3,17 +3,25 @@ import tempfile
 from pathlib import Path
 from shutil import rmtree
 
-from tests.utils import SAMPLE1_PATH
+from tests.utils import SAMPLE1_PATH, RPT_SIMPLE_PATH
+from zipreport.fileutils import OverlayFs, ZipFs
+from zipreport.fileutils.backend.lazy import LazyZip
+from zipreport.fileutils.backend.zip import InMemoryZip
 from zipreport.report.builder import ReportFileBuilder
 from zipreport.report.const import MANIFEST_AUTHOR
 from zipreport.report.loader import ReportFileLoader
+from zipreport.report.const import REPORT_FILE_NAME, CONTENT_INDEX_FILE_NAME
 from zipreport.report.reportfile import ReportFile
+from zipreport.template import JinjaRender
 
 
 class TestLoader:
     temp_dir = "/tmp"
     temp_methods = [
         "test_loader_pass",
+        "test_loader_mapped",
+        "test_loader_cache",
+        "test_loader_lazy",
     ]
 
     def setup_method(self, method):
@@ -46,3 +54,118 @@ class TestLoader:
         assert bundle is not None
         assert isinstance(bundle, ReportFile) is True
         assert bundle.get_param(MANIFEST_AUTHOR) is not None
+
+    def test_loader_mapped(self):
+        destfile = Path(self.temp_dir) / "test.zpt"
+        result = ReportFileBuilder.build_file(SAMPLE1_PATH, destfile)
+        assert result.success() is True
+
+        bundle = ReportFileLoader.load(destfile, mapped=True)
+        assert isinstance(bundle, ReportFile) is True
+        assert bundle.get_param(MANIFEST_AUTHOR) is not None
+
+        # new files go to the in-memory layer
+        bundle.add("report.html", b"<html></html>")
+        assert bundle.get("report.html").getbuffer() == b"<html></html>"
+
+    def test_loader_dir(self):
+        bundle = ReportFileLoader.load(RPT_SIMPLE_PATH, pack=False)
+        assert isinstance(bundle.get_fs(), OverlayFs) is True
+        assert bundle.get_param(MANIFEST_AUTHOR) is not None
+
+        # render to the in-memory layer; the template dir is not modified
+        job = bundle.fork()
+        contents = JinjaRender(job).render()
+        assert job.get_bytes(REPORT_FILE_NAME) == contents.encode("utf-8")
+        assert bundle.exists(REPORT_FILE_NAME) is False
+        assert (RPT_SIMPLE_PATH / REPORT_FILE_NAME).exists() is False
+
+        # saving packs both layers
+        packed = ReportFileBuilder.build_zipfs(RPT_SIMPLE_PATH)[1]
+        packed.remove(CONTENT_INDEX_FILE_NAME)
+        zfs = ZipFs(InMemoryZip(job.save()))
+        assert sorted(zfs.list("")) == sorted(packed.list("") + [REPORT_FILE_NAME])
+        assert zfs.get_bytes(REPORT_FILE_NAME) == contents.encode("utf-8")
+        assert zfs.get_bytes("index.html") == packed.get_bytes("index.html")
+
+    def test_loader_cache(self):
+        destfile = Path(self.temp_dir) / "test.zpt"
+        result = ReportFileBuilder.build_file(SAMPLE1_PATH, destfile)
+        assert result.success() is True
+
+        cache = ReportFileLoader.enable_cache()
+        try:
+            job1 = ReportFileLoader.load(destfile)
+            job2 = ReportFileLoader.load(destfile)
+            stats = cache.stats()
+            assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+            assert stats.size > 0
+
+            # mutations are private to each instance
+            JinjaRender(job1).render()
+            assert job1.exists(REPORT_FILE_NAME) is True
+            assert job2.exists(REPORT_FILE_NAME) is False
+            assert ReportFileLoader.load(destfile).exists(REPORT_FILE_NAME) is False
+
+            # load options are part of the key
+            ReportFileLoader.load(destfile, mapped=True)
+            assert cache.stats().misses == 2
+
+            # modified files are reloaded
+            result = ReportFileBuilder.build_file(
+                RPT_SIMPLE_PATH, destfile, overwrite=True
+            )
+            assert result.success() is True
+            job3 = ReportFileLoader.load(destfile)
+            assert job3.exists("css/style.css") is True
+            assert cache.stats().misses == 3
+            assert cache.stats().entries == 2
+
+            # directories
+            ReportFileLoader.load(RPT_SIMPLE_PATH)
+            ReportFileLoader.load(RPT_SIMPLE_PATH)
+            stats = cache.stats()
+            assert (stats.hits, stats.misses) == (3, 4)
+            # directories loaded in place are not cached
+            ReportFileLoader.load(RPT_SIMPLE_PATH, pack=False)
+            assert cache.stats().misses == 4
+
+            # least recently used templates are evicted
+            cache = ReportFileLoader.enable_cache()
+            ReportFileLoader.load(destfile)
+            size1 = cache.stats().size
+            ReportFileLoader.load(SAMPLE1_PATH)
+            size2 = cache.stats().size - size1
+            cache = ReportFileLoader.enable_cache(max(size1, size2) + 1)
+            ReportFileLoader.load(destfile)
+            ReportFileLoader.load(SAMPLE1_PATH)
+            stats = cache.stats()
+            assert (stats.evictions, stats.entries) == (1, 1)
+            assert stats.size == size2
+            ReportFileLoader.load(SAMPLE1_PATH)
+            assert cache.stats().hits == 1
+
+            # templates larger than the cache are not cached
+            cache = ReportFileLoader.enable_cache(1)
+            ReportFileLoader.load(destfile)
+            assert cache.stats().entries == 0
+        finally:
+            ReportFileLoader.disable_cache()
+        assert ReportFileLoader.get_cache() is None
+
+    def test_loader_lazy(self):
+        destfile = Path(self.temp_dir) / "test.zpt"
+        result = ReportFileBuilder.build_file(RPT_SIMPLE_PATH, destfile)
+        assert result.success() is True
+
+        bundle = ReportFileLoader.load(destfile, lazy=True)
+        backend = bundle.get_fs().get_backend()
+        assert isinstance(backend, LazyZip) is True
+        assert bundle.get_param(MANIFEST_AUTHOR) is not None
+        assert bundle.get_fingerprint() is not None
+        assert backend.is_loaded() is False
+
+        # rendering loads the report file
+        contents = JinjaRender(bundle).render()
+        assert backend.is_loaded() is True
+        assert bundle.get_bytes(REPORT_FILE_NAME) == contents.encode("utf-8")
@@ -0,0 +1,110 @@
+from pathlib import Path
+
+from zipreport.report.prune import (
+    IgnoreRules,
+    find_literals,
+    find_references,
+    resolve_reference,
+    unreferenced_assets,
+)
+
+
+class TestPrune:
+    def test_ignore_rules(self):
+        rules = IgnoreRules(
+            [
+                "# comment",
+                "",
+                "*.swp",
+                ".git/",
+                "/build",
+                "assets/**/*.map",
+                "src/*",
+                "!src/keep.css",
+            ]
+        )
+        assert rules.ignored("index.html") is False
+        assert rules.ignored(".index.html.swp") is True
+        assert rules.ignored("partials/.base.html.swp") is True
+        assert rules.ignored(".git/HEAD") is True
+        assert rules.ignored("partials/.git/HEAD") is True
+        # .git/ only matches directories
+        assert rules.ignored("partials/.git") is False
+        assert rules.ignored("build/a.js") is True
+        assert rules.ignored("partials/build/a.js") is False
+        assert rules.ignored("assets/a.map") is True
+        assert rules.ignored("assets/js/vendor/a.map") is True
+        assert rules.ignored("a.map") is False
+        assert rules.ignored("src/style.css") is True
+        assert rules.ignored("src/keep.css") is False
+
+    def test_find_references(self):
+        html = """<img src="img/a.png?v=1"><link href='style.css' rel=stylesheet>
+<a href="#top">top</a><a href="https://example.com/x.png">x</a><script src=//cdn/x.js></script>
+<img srcset="img/b.png 1x, img/c.png 2x"><div style="background: url( 'img/d.png' )"></div>
+<img src="data:image/png;base64,AAAA"><img src="img/{{ name }}.png">"""
+        assert find_references(html) == [
+            "img/a.png?v=1",
+            "style.css",
+            "img/b.png",
+            "img/c.png",
+            "img/d.png",
+            "img/{{ name }}.png",
+        ]
+        css = '@import "base.css"; a { background: url(../img/e.png) }'
+        assert find_references(css) == ["base.css", "../img/e.png"]
+
+    def test_find_literals(self):
+        html = """<p>don't</p>{{ 'images/x.png'|png(width=100) }}<span title="a.png">it's</span>
+{% set logo = "img/logo.svg" %}{{ chart|svg(alt='a chart', url="https://example.com/x.png") }}"""
+        assert find_literals(html) == ["images/x.png", "img/logo.svg"]
+
+    def test_resolve_reference(self):
+        files = {"img/a.png", "img/b.png", "img/b.jpg", "css/img/c.png", "style.css"}
+        assert resolve_reference("", "img/a.png?v=1#x", files) == {"img/a.png"}
+        assert resolve_reference("css", "../style.css", files) == {"style.css"}
+        assert resolve_reference("css", "/img/a.png", files) == {"img/a.png"}
+        assert resolve_reference("", "img/x.png", files) == set()
+        assert resolve_reference("", "img/{{ name }}.png", files) == {
+            "img/a.png",
+            "img/b.png",
+        }
+        assert resolve_reference("", "{{ path }}", files) == files
+
+    def test_unreferenced_assets(self, tmp_path):
+        files = {
+            "index.html": '{% include "partials/base.html" %}<img src="img/a.png">',
+            "partials/base.html": '<link href="css/style.css"><img src="img/{{ i }}.svg">',
+            "css/style.css": "@import 'fonts.css'; a { background: url(../img/b.png) }",
+            "css/fonts.css": "@font-face { src: url(font.woff2) }",
+            "css/font.woff2": "",
+            "css/unused.css": "a { background: url(../img/unused.png) }",
+            "img/a.png": "",
+            "img/b.png": "",
+            "img/c.svg": "",
+            "img/unused.png": "",
+            "js/app.js": "load('img/d.jpg');\n//# sourceMappingURL=app.js.map",
+            "js/app.js.map": "{}",
+            "img/d.jpg": "",
+            "data.json": '{"logo": "logo.gif"}',
+            "img/logo.gif": "",
+            "partials/images.html": "{{ 'images/x.png'|png(alt='x') }}",
+            "images/x.png": "",
+            "images/y.png": "",
+        }
+        files["index.html"] += '{% include "partials/images.html" %}'
+        files["index.html"] += '<script src="js/app.js"></script>'
+        for name, content in files.items():
+            (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / name).write_text(content)
+
+        names = [tmp_path / name for name in files.keys()]
+        result = unreferenced_assets(tmp_path, names)
+        assert result == sorted(
+            [
+                tmp_path / "css/unused.css",
+                tmp_path / "img/unused.png",
+                tmp_path / "images/y.png",
+                tmp_path / "js/app.js.map",
+            ]
+        )
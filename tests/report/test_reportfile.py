@@ -0,0 +1,130 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from shutil import rmtree
+
+import pytest
+
+from tests.utils import RPT_SIMPLE_PATH
+from zipreport.fileutils import FsError, ZipFs
+from zipreport.fileutils.backend.spooled import SpooledZip, SpooledBuffer
+from zipreport.report import ReportFileBuilder, ReportFileLoader, ReportFile
+from zipreport.report.const import REPORT_FILE_NAME, MANIFEST_TITLE
+from zipreport.template import JinjaRender
+
+
+class TestReportFile:
+    temp_dir = "/tmp"
+
+    def setup_method(self, method):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def teardown_method(self, method):
+        if os.path.exists(self.temp_dir) and self.temp_dir != "/tmp":
+            rmtree(self.temp_dir)
+            self.temp_dir = "/tmp"
+
+    def build_zpt(self) -> ReportFile:
+        zptfile = Path(self.temp_dir) / "test.zpt"
+        result = ReportFileBuilder.build_file(RPT_SIMPLE_PATH, zptfile)
+        assert result.success() is True
+        return ReportFileLoader.load_file(zptfile)
+
+    def test_fork(self):
+        template = self.build_zpt()
+
+        job1 = template.fork()
+        job2 = template.fork()
+        assert isinstance(job1, ReportFile) is True
+        assert job1.get_param(MANIFEST_TITLE) == template.get_param(MANIFEST_TITLE)
+
+        # render both forks; output is private to each one
+        JinjaRender(job1).render()
+        assert job1.exists(REPORT_FILE_NAME) is True
+        assert job2.exists(REPORT_FILE_NAME) is False
+        assert template.exists(REPORT_FILE_NAME) is False
+        JinjaRender(job2).render()
+        assert job2.exists(REPORT_FILE_NAME) is True
+
+        # template is now read-only
+        with pytest.raises(FsError):
+            template.add(REPORT_FILE_NAME, "")
+
+        # forks can be saved without affecting the template
+        buf = job1.save()
+        assert len(buf.getbuffer()) > 0
+        job3 = template.fork()
+        assert job3.exists("index.html") is True
+
+    def test_save_spooled(self):
+        zptfile = Path(self.temp_dir) / "test.zpt"
+        self.build_zpt()
+        names = ReportFileLoader.load_file(zptfile).get_fs().get_backend().namelist()
+
+        # rolled over reports are saved without being read back into memory
+        report = ReportFileLoader.load_zipfs(ZipFs(SpooledZip(zptfile, max_size=1024)))
+        assert report.get_fs().get_backend().is_spooled() is True
+        JinjaRender(report).render()
+        buf = report.save()
+        assert isinstance(buf, SpooledBuffer) is True
+        assert buf.is_rolled() is True
+        assert ReportFileLoader.load_zipfs(ZipFs(SpooledZip(buf))).exists(REPORT_FILE_NAME) is True
+
+        # or copied directly to a file
+        dest = Path(self.temp_dir) / "saved.zpt"
+        report = ReportFileLoader.load_zipfs(ZipFs(SpooledZip(zptfile, max_size=1024)))
+        report.save_file(dest)
+        assert ReportFileLoader.load_file(dest).get_fs().get_backend().namelist() == names
+
+    def test_fingerprint(self):
+        template = self.build_zpt()
+        fingerprint = template.get_fingerprint()
+        assert isinstance(fingerprint, str) and len(fingerprint) == 64
+        index = template.get_content_index()
+        assert index["fingerprint"] == fingerprint
+        assert ReportFileBuilder.fingerprint(index["files"]) == fingerprint
+        for name, digest in index["files"].items():
+            assert hashlib.sha256(template.get_bytes(name)).hexdigest() == digest
+
+        # rendering doesn't change the fingerprint
+        job = template.fork()
+        JinjaRender(job).render()
+        assert job.get_fingerprint() == fingerprint
+
+        # reports loaded from a directory have no content index
+        bundle = ReportFileLoader.load_dir(RPT_SIMPLE_PATH, pack=False)
+        assert bundle.get_fingerprint() is None
+        # packed reports are built with a content index
+        bundle = ReportFileLoader.load_dir(RPT_SIMPLE_PATH)
+        assert bundle.get_fingerprint() == fingerprint
+
+    def test_stats(self):
+        template = self.build_zpt()
+        stats = template.stats()
+        infos = template.get_fs().get_backend().infolist()
+        assert stats.entries == len(infos)
+        assert stats.uncompressed_size == sum(i.file_size for i in infos)
+        assert stats.compressed_size == sum(i.compress_size for i in infos)
+        assert stats.added_size == 0
+        assert stats.buffer_size == os.path.getsize(Path(self.temp_dir) / "test.zpt")
+        assert stats.peak_buffer_size >= stats.buffer_size
+
+        # largest entries first
+        assert len(template.stats(top=2).largest) == 2
+        sizes = [size for _, size, _ in stats.largest]
+        assert sizes == sorted(sizes, reverse=True)
+        assert sizes[0] == max(i.file_size for i in infos)
+
+        # bytes added during rendering
+        job = template.fork()
+        contents = JinjaRender(job).render()
+        stats = job.stats()
+        assert stats.entries == len(infos) + 1
+        assert stats.added_size == len(contents.encode("utf-8"))
+        assert stats.peak_buffer_size >= stats.buffer_size > 0
+
+        # replaced contents are accounted until export
+        JinjaRender(job).render()
+        assert job.stats().garbage_size > 0
+        assert job.stats().entries == len(infos) + 1
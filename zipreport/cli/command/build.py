@@ -1,18 +1,96 @@
+import glob
+import io
+import os
+import time
 from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 
 from .base import CliCommand
 from zipreport.report import ReportFileBuilder
 
 
+def build_target(
+    src: str,
+    dest: str,
+    follow_links: bool,
+    workers: int,
+    incremental: bool,
+    minify: bool,
+    precompile: bool,
+    stream: bool,
+    prune: bool,
+    overwrite: bool,
+) -> tuple:
+    """
+    Build a single report file, discarding build output
+    Module-level function, so it can be used from a process pool
+    :param src: report dir path
+    :param dest: destination report file
+    :param follow_links: if True, symlinks are followed
+    :param workers: number of compression threads
+    :param incremental: if True, update destination if exists
+    :param minify: if True, minify HTML, CSS and JavaScript files
+    :param precompile: if True, store precompiled Jinja templates
+    :param stream: if True, write entries directly to disk
+    :param prune: if True, skip unreferenced assets
+    :param overwrite: if True, overwrite destination if exists
+    :return: (list of errors, elapsed time in seconds)
+    """
+    start = time.perf_counter()
+    try:
+        result = ReportFileBuilder.build_file(
+            src,
+            dest,
+            console=io.StringIO(),
+            overwrite=overwrite,
+            follow_links=follow_links,
+            workers=workers,
+            incremental=incremental,
+            minify=minify,
+            precompile=precompile,
+            stream=stream,
+            prune=prune,
+        )
+        errors = result.get_errors()
+    except Exception as e:
+        errors = [str(e)]
+    return errors, time.perf_counter() - start
+
+
 class BuildCommand(CliCommand):
     ext = ".zpt"
-    usage = "<directory> [file] [-s]"
-    description = "Build zpt file bundle"
+    usage = (
+        "<directory> [file] | <directory|glob>... [-d <dir>] [-p <procs>] [-s] [-j <workers>] [-i] [-m] [-c] "
+        "[--stream] [--prune] [-f]"
+    )
+    description = "Build zpt file bundle(s)"
 
     def arguments(self, parser: ArgumentParser):
-        parser.add_argument("directory", type=str, help="directory to build")
-        parser.add_argument("file", type=str, help="output file", nargs="?", default="")
+        parser.add_argument(
+            "directory",
+            type=str,
+            help="directories (or glob patterns) to build; if a single directory is followed by a path that is not "
+            "a directory, the path is used as output file",
+            nargs="+",
+        )
+        parser.add_argument(
+            "-d",
+            "--dest",
+            type=str,
+            help="output directory when building multiple reports",
+            required=False,
+            default="",
+        )
+        parser.add_argument(
+            "-p",
+            "--processes",
+            type=int,
+            help="number of reports to build in parallel",
+            required=False,
+            default=os.cpu_count(),
+        )
         parser.add_argument(
             "-s",
             "--symlinks",
@@ -21,23 +99,185 @@ class BuildCommand(CliCommand):
             default=False,
             action="store_true",
         )
+        parser.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            help="number of compression threads",
+            required=False,
+            default=1,
+        )
+        parser.add_argument(
+            "-i",
+            "--incremental",
+            help="only compress new or modified files, if file exists",
+            required=False,
+            default=False,
+            action="store_true",
+        )
+        parser.add_argument(
+            "-m",
+            "--minify",
+            help="minify html, css and javascript files",
+            required=False,
+            default=False,
+            action="store_true",
+        )
+        parser.add_argument(
+            "-c",
+            "--compile",
+            help="store precompiled templates",
+            required=False,
+            default=False,
+            action="store_true",
+        )
+        parser.add_argument(
+            "--stream",
+            help="write files directly to disk instead of building in memory",
+            required=False,
+            default=False,
+            action="store_true",
+        )
+        parser.add_argument(
+            "--prune",
+            help="skip assets not referenced by templates, stylesheets or scripts",
+            required=False,
+            default=False,
+            action="store_true",
+        )
+        parser.add_argument(
+            "-f",
+            "--force",
+            help="overwrite existing report files",
+            required=False,
+            default=False,
+            action="store_true",
+        )
 
     def run(self, args) -> bool:
-        src = Path(args.directory).resolve()
+        paths = args.directory
+        # single report form: <directory> <file>
+        if len(paths) == 2 and not glob.has_magic(paths[1]):
+            if not Path(paths[1]).is_dir():
+                return self.build_single(paths[0], paths[1], args)
+
+        sources = []
+        for item in paths:
+            matches = sorted(glob.glob(item)) if glob.has_magic(item) else [item]
+            if len(matches) == 0:
+                self.tty.error("Error: {} does not match any folder".format(item))
+                return False
+            sources.extend(matches)
+
+        if len(sources) == 1 and args.dest == "":
+            return self.build_single(sources[0], "", args)
+        return self.build_many(sources, args)
+
+    def build_single(self, directory: str, file: str, args) -> bool:
+        """
+        Build a single report file, with build output
+        :param directory: report dir path
+        :param file: optional destination report file
+        :param args: parsed arguments
+        :return: bool
+        """
+        src = Path(directory).resolve()
         if not src.exists() or not src.is_dir():
             self.tty.error("Error: {path} is not a valid folder".format(path=str(src)))
             return False
 
         dest = Path(src.name)
-        if args.file != "":
-            dest = Path(args.file).resolve()
+        if file != "":
+            dest = Path(file).resolve()
 
         if dest.suffix == "":
             dest = dest.with_suffix(self.ext)
 
         result = ReportFileBuilder.build_file(
-            str(src), str(dest), follow_links=args.symlinks
+            str(src),
+            str(dest),
+            follow_links=args.symlinks,
+            workers=args.jobs,
+            incremental=args.incremental,
+            minify=args.minify,
+            precompile=args.compile,
+            stream=args.stream,
+            prune=args.prune,
+            overwrite=args.force,
         )
         if not result.success():
             self.tty.error(" ".join(result.get_errors()))
         return result.success()
+
+    def build_many(self, directories: list, args) -> bool:
+        """
+        Build multiple report files in parallel, and print a summary with build times
+        :param directories: list of report dir paths
+        :param args: parsed arguments
+        :return: True if all reports were built
+        """
+        dest_dir = Path(args.dest) if args.dest != "" else Path(".")
+        if not dest_dir.is_dir():
+            self.tty.error("Error: {} is not a valid folder".format(dest_dir))
+            return False
+
+        targets = {}
+        for directory in directories:
+            src = Path(directory).resolve()
+            if not src.is_dir():
+                self.tty.error("Error: {path} is not a valid folder".format(path=src))
+                return False
+            if src in targets:
+                continue
+            dest = (dest_dir / (src.name + self.ext)).resolve()
+            if dest in targets.values():
+                self.tty.error("Error: duplicate output file {}".format(dest))
+                return False
+            targets[src] = dest
+
+        start = time.perf_counter()
+        failed = 0
+        with ProcessPoolExecutor(max_workers=max(1, args.processes or 1)) as pool:
+            futures = {
+                src: pool.submit(
+                    build_target,
+                    str(src),
+                    str(dest),
+                    args.symlinks,
+                    args.jobs,
+                    args.incremental,
+                    args.minify,
+                    args.compile,
+                    args.stream,
+                    args.prune,
+                    args.force,
+                )
+                for src, dest in targets.items()
+            }
+            for src, future in futures.items():
+                try:
+                    errors, elapsed = future.result()
+                except BrokenProcessPool as e:
+                    # a worker process crashed; pending builds cannot complete
+                    errors = ["build process terminated abruptly: {}".format(e)]
+                    elapsed = time.perf_counter() - start
+                if len(errors) == 0:
+                    self.tty.message(
+                        "{:30} OK     {:8.3f}s {}".format(
+                            src.name, elapsed, targets[src]
+                        )
+                    )
+                else:
+                    failed += 1
+                    self.tty.error(
+                        "{:30} FAILED {:8.3f}s {}".format(
+                            src.name, elapsed, " ".join(errors)
+                        )
+                    )
+
+        self.tty.message(
+            "\n{} built, {} failed in {:.3f}s".format(
+                len(targets) - failed, failed, time.perf_counter() - start
+            )
+        )
+        return failed == 0
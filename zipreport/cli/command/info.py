@@ -32,7 +32,7 @@ class InfoCommand(CliCommand):
 
             try:
                 path = str(path)
-                zpt = ReportFileLoader.load_file(path)
+                zpt = ReportFileLoader.load_file(path, lazy=True)
                 self.tty.message(
                     "{:30} {}".format(path, zpt.get_param(const.MANIFEST_TITLE, ""))
                 )
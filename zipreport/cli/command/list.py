@@ -42,7 +42,7 @@ class ListCommand(CliCommand):
                 if f.endswith(".zpt"):
                     try:
                         fpath = os.path.join(dirpath, f)
-                        zpt = ReportFileLoader.load_file(fpath)
+                        zpt = ReportFileLoader.load_file(fpath, lazy=True)
                         self.tty.message(
                             "{:30} {}".format(
                                 f, zpt.get_param(const.MANIFEST_TITLE, "")
@@ -12,7 +12,7 @@ from http import HTTPStatus
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from io import BytesIO
 
-from zipreport.report import ReportFile, ReportFileLoader, ReportFileBuilder, const
+from zipreport.report import ReportFile, ReportFileLoader, ReportFileLoaderError, const
 from zipreport.template import JinjaRender, EnvironmentWrapper
 
 # shared ReportFile Object to be reused between requests
@@ -96,19 +96,18 @@ class ReportFileHandler(BaseHTTPRequestHandler):
                 sys.stdout.write("Reloading report file...\n")
                 _zpt = ReportFileLoader.load_file(self.report_path)
             else:
-                sys.stdout.write("Rebuilding report from path...\n")
-                bresult, zpt = ReportFileBuilder.build_zipfs(
-                    self.report_path, follow_links=self.follow_links
+                sys.stdout.write("Reloading report from path...\n")
+                # template files are read directly from the directory
+                _zpt = ReportFileLoader.load_dir(
+                    self.report_path, follow_links=self.follow_links, pack=False
                 )
-                if not bresult.success():
-                    return False, self.error_500(";".join(bresult.get_errors()))
-                # create ReportFile from zipfs
-                _zpt = ReportFileLoader.load_zipfs(zpt)
             # render template to REPORT_FILE_NAME
             # returns a dummy BytesIO object
             JinjaRender(_zpt, wrapper=self.wrapper).render()
             return True, io.BytesIO()
 
+        except ReportFileLoaderError as e:
+            return False, self.error_500(str(e))
         except Exception as e:
             return False, self.error_500(str(e), info=traceback.format_exc())
 
@@ -156,7 +155,9 @@ class ReportFileHandler(BaseHTTPRequestHandler):
             path = "/" + const.REPORT_FILE_NAME
 
         if _zpt.exists(path):
-            return self.handle_file(Path(path).name, _zpt.get(path))
+            return self.handle_file(
+                Path(path).name, io.BytesIO(_zpt.get_bytes(path))
+            )
 
         # path not found
         return self.error_404(path)
@@ -1,3 +1,4 @@
 from .interface import FsInterface, FsError
 from .diskfs import DiskFs
-from .zipfs import ZipFs
+from .zipfs import ZipFs, ZipStats
+from .overlayfs import OverlayFs
@@ -0,0 +1,123 @@
+import posixpath
+import zipfile
+import zlib
+from typing import Tuple, Union
+
+# general purpose flag: compression option (eg. LZMA end-of-stream marker)
+FLAG_COMPRESS_OPTION_1 = 0x02
+
+# file types that are already compressed, and don't benefit from deflate
+PRECOMPRESSED_EXTENSIONS = [
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".gif",
+    ".webp",
+    ".avif",
+    ".ico",
+    ".woff",
+    ".woff2",
+    ".zip",
+    ".gz",
+    ".bz2",
+    ".xz",
+    ".zpt",
+    ".mp3",
+    ".mp4",
+    ".webm",
+]
+
+
+class CompressionPolicy:
+    """
+    Per-entry compression settings for zip backends
+    Entries are either stored or compressed, depending on their extension and size
+    """
+
+    def __init__(
+        self,
+        level: int = None,
+        min_size: int = 0,
+        stored_extensions: list = None,
+        compress_type: int = zipfile.ZIP_DEFLATED,
+    ):
+        """
+        Constructor
+        :param level: compression level (default None, uses zlib default)
+        :param min_size: entries smaller than min_size bytes are stored
+        :param stored_extensions: list of file extensions to store without compression
+        (default PRECOMPRESSED_EXTENSIONS)
+        :param compress_type: compression method for compressed entries
+        """
+        if stored_extensions is None:
+            stored_extensions = PRECOMPRESSED_EXTENSIONS
+        self.level = level
+        self.min_size = min_size
+        self.stored_extensions = set(ext.lower() for ext in stored_extensions)
+        self.compress_type = compress_type
+
+    @staticmethod
+    def fast():
+        """
+        Fast compression preset
+        Suitable for short-lived reports (eg. uploaded once to a local zipreport-server): small files are stored, and
+        everything else uses the fastest compression level
+        :return: CompressionPolicy
+        """
+        return CompressionPolicy(level=1, min_size=4096)
+
+    def select(self, name: str, size: int) -> Tuple[int, Union[int, None]]:
+        """
+        Select compression method and level for a given entry
+        :param name: entry name
+        :param size: uncompressed size
+        :return: (compress_type, compress_level)
+        """
+        if self.compress_type == zipfile.ZIP_STORED or size < self.min_size:
+            return zipfile.ZIP_STORED, None
+        if posixpath.splitext(name)[1].lower() in self.stored_extensions:
+            return zipfile.ZIP_STORED, None
+        return self.compress_type, self.level
+
+    def compressor(self, name: str, size: int, compress_type: int = None) -> tuple:
+        """
+        Create a compressor for a given entry
+        The compression level is passed explicitly to the compressor, as ZipInfo has no public attribute for it
+        :param name: entry name
+        :param size: uncompressed size
+        :param compress_type: optional compression method; if None, select() is used; the policy level is applied to
+        either method
+        :return: (compress_type, compressor object, or None if the entry is stored)
+        """
+        if compress_type is None:
+            compress_type, level = self.select(name, size)
+        else:
+            level = None if compress_type == zipfile.ZIP_STORED else self.level
+        return compress_type, zipfile._get_compressor(compress_type, level)
+
+    def compress(
+        self, info: zipfile.ZipInfo, content: bytes, compress_type: int = None
+    ) -> Tuple[zipfile.ZipInfo, bytes]:
+        """
+        Compress the contents of an entry
+        Safe to call from several threads, as zlib releases the GIL while compressing
+        :param info: entry ZipInfo; CRC, sizes, compression method and flags are updated in-place
+        :param content: uncompressed contents
+        :param compress_type: optional compression method; if None, select() is used
+        :return: (ZipInfo, compressed contents)
+        """
+        compress_type, compressor = self.compressor(
+            info.filename, len(content), compress_type
+        )
+        info.compress_type = compress_type
+        if compress_type == zipfile.ZIP_LZMA:
+            # compressed data includes an end-of-stream marker, as in zipfile
+            info.flag_bits |= FLAG_COMPRESS_OPTION_1
+        info.file_size = len(content)
+        info.CRC = zlib.crc32(content)
+        if compressor is None:
+            data = content
+        else:
+            data = compressor.compress(content) + compressor.flush()
+        info.compress_size = len(data)
+        return info, data
@@ -0,0 +1,130 @@
+import io
+import threading
+import zipfile
+from typing import Tuple
+
+from .compression import CompressionPolicy
+from .zip import InMemoryZip, InMemoryZipError
+
+
+class LazyZip(InMemoryZip):
+    """
+    Zip file loaded on demand
+    Only the central directory is read when the zip is opened, so entries can be listed without reading the archive;
+    entries named in preload (eg. a manifest) are read straight from disk. The whole zip file is loaded into memory
+    on first access to any other entry, or when the zip is modified or exported; from then on, it behaves as an
+    InMemoryZip
+    """
+
+    def __init__(
+        self,
+        source: str,
+        preload: list = None,
+        compression: CompressionPolicy = None,
+    ):
+        """
+        Constructor
+        :param source: path to zip file
+        :param preload: optional list of entry names that can be read without loading the zip file
+        :param compression: optional compression policy for new entries
+        """
+        self._source = source
+        self._index = None
+        self._preload = set(preload or [])
+        self._load_lock = threading.Lock()
+        super().__init__(source, compression=compression)
+
+    def load(self, disk_file: str):
+        """
+        Read the central directory of a zip file from disk
+        :param disk_file: path to zip file
+        :return:
+        """
+        self._source = disk_file
+        try:
+            self._index = zipfile.ZipFile(disk_file, mode="r")
+        except Exception as e:
+            raise InMemoryZipError("Error reading Zip file: {}".format(e))
+
+    def is_loaded(self) -> bool:
+        """
+        Check if the zip file was loaded into memory
+        :return: bool
+        """
+        return self._zip is not None
+
+    def is_open(self):
+        return self._zip is not None or self._index is not None
+
+    def zip(self) -> zipfile.ZipFile:
+        """
+        Retrieve internal ZipFile object
+        Until the zip file is loaded, the returned ZipFile reads from disk and must not be modified
+        :return: ZipFile
+        """
+        if self._zip is not None:
+            return self._zip
+        if self._index is None:
+            raise InMemoryZipError("Cannot zip(); Zip is already closed.")
+        return self._index
+
+    def read_raw(self, name: str) -> Tuple[zipfile.ZipInfo, bytes]:
+        if name not in self._preload:
+            self._materialize()
+        return super().read_raw(name)
+
+    def write_raw(self, info: zipfile.ZipInfo, data):
+        self._materialize()
+        super().write_raw(info, data)
+
+    def remove(self, name: str):
+        self._materialize()
+        super().remove(name)
+
+    def get_buffer(self) -> io.BytesIO:
+        self._materialize()
+        return super().get_buffer()
+
+    def getbuffer(self) -> memoryview:
+        self._materialize()
+        return super().getbuffer()
+
+    def save_stream(self) -> io.BytesIO:
+        self._materialize()
+        return super().save_stream()
+
+    def save(self, dest_file: str):
+        self._materialize()
+        super().save(dest_file)
+
+    def get_buffer_size(self) -> int:
+        """
+        Get the current size of the internal buffer
+        :return: size in bytes; 0 if the zip file was not loaded yet or is closed
+        """
+        if self._zip is None:
+            return 0
+        return super().get_buffer_size()
+
+    def _materialize(self):
+        """
+        Load the zip file into memory, if not loaded yet
+        :return:
+        """
+        if self._zip is not None:
+            return
+        with self._load_lock:
+            if self._zip is not None:
+                return
+            if self._index is None:
+                raise InMemoryZipError("Cannot load Zip file; Zip is already closed.")
+            # wait for pending reads from disk
+            with self._lock.write():
+                InMemoryZip.load(self, self._source)
+                self._index.close()
+                self._index = None
+
+    def __del__(self):
+        if self._index is not None:
+            self._index.close()
+        super().__del__()
@@ -0,0 +1,146 @@
+import io
+import mmap
+import os
+import zipfile
+
+from .zip import InMemoryZip, InMemoryZipError
+
+
+class MappedFile(mmap.mmap):
+    """
+    mmap object usable as a ZipFile file object
+    """
+
+    def seekable(self) -> bool:
+        return True
+
+
+class MappedZip(InMemoryZip):
+    """
+    Read-only, memory-mapped zip file
+    Entries are read straight from the mapped pages, so the archive is never copied into process memory, and
+    pages are shared between processes through the OS page cache.
+    Use OverlayZip on top of a MappedZip to add new entries.
+    """
+
+    def __init__(self, source: str):
+        """
+        Constructor
+        :param source: path to zip file
+        """
+        self._mmap = None
+        super().__init__(source)
+
+    def new(self, buffer: io.BytesIO = None):
+        raise InMemoryZipError("Cannot new(); MappedZip is read-only")
+
+    def load(self, disk_file: str):
+        """
+        Map zip file from disk
+        :param disk_file: path to zip file
+        :return:
+        """
+        if not os.path.exists(disk_file) or not os.path.isfile(disk_file):
+            raise InMemoryZipError(
+                "Zip file '{}' does not exist or is not a valid file".format(disk_file)
+            )
+
+        try:
+            with open(disk_file, "rb") as f:
+                self._mmap = MappedFile(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._buffer = self._mmap
+            self._zip = zipfile.ZipFile(self._mmap, mode="r")
+            self._track_size()
+        except Exception as e:
+            self._close()
+            raise InMemoryZipError("Error reading Zip file: {}".format(e))
+
+    def writestr(self, name: str, content, compress_type: int = None):
+        raise InMemoryZipError("Cannot add '{}'; MappedZip is read-only".format(name))
+
+    def write_raw(self, info: zipfile.ZipInfo, data):
+        raise InMemoryZipError(
+            "Cannot add '{}'; MappedZip is read-only".format(info.filename)
+        )
+
+    def remove(self, name: str):
+        raise InMemoryZipError("Cannot remove '{}'; MappedZip is read-only".format(name))
+
+    def get_buffer(self) -> io.BytesIO:
+        """
+        Get a copy of the mapped zip file
+        :return: io.BytesIO
+        """
+        if not self.is_open():
+            raise InMemoryZipError("Cannot get_buffer(); Zip is already closed.")
+        return io.BytesIO(self._mmap[:])
+
+    def getbuffer(self) -> memoryview:
+        """
+        Get a read-only view of the mapped zip file, without copying it
+        If the view is still in use when the zip file is closed, the mapping is released once the view is released
+        :return: memoryview
+        """
+        if not self.is_open():
+            raise InMemoryZipError("Cannot getbuffer(); Zip is already closed.")
+        return memoryview(self._mmap)
+
+    def save_stream(self) -> io.BytesIO:
+        """
+        Get a copy of the mapped zip file and clean state
+        :return: io.BytesIO
+        """
+        if self._frozen:
+            raise InMemoryZipError("Cannot save_stream(); Zip is frozen.")
+        result = self.get_buffer()
+        self._close()
+        return result
+
+    def save(self, dest_file: str):
+        """
+        Save mapped zip file to a file
+        :param dest_file: path to destination file
+        :return:
+        """
+        if not self.is_open():
+            raise InMemoryZipError("Cannot save(); Zip is already closed.")
+        if self._frozen:
+            raise InMemoryZipError("Cannot save(); Zip is frozen.")
+        try:
+            with open(dest_file, "wb", buffering=0) as f:
+                f.write(self._mmap)
+        except Exception as e:
+            raise InMemoryZipError("Error saving Zip file: {}".format(e))
+        finally:
+            self._close()
+
+    def close(self):
+        """
+        Close zip file and release mapping, without saving
+        :return:
+        """
+        self._close()
+
+    def _buffer_size(self) -> int:
+        return len(self._mmap)
+
+    def _close(self):
+        """
+        Close zip file and release mapping
+        :return:
+        """
+        with self._lock.write():
+            if self._zip is not None:
+                self._zip.close()
+            if self._mmap is not None:
+                try:
+                    self._mmap.close()
+                except BufferError:
+                    # exported views (see getbuffer()) still exist; the mapping is released with the last one
+                    pass
+            self._zip = None
+            self._mmap = None
+            self._buffer = None
+
+    def __del__(self):
+        self._close()
@@ -0,0 +1,216 @@
+import io
+import zipfile
+from typing import Tuple
+
+from .compression import CompressionPolicy
+from .zip import InMemoryZip, InMemoryZipError, zip_write_raw
+
+
+class OverlayZip(InMemoryZip):
+    """
+    Writable in-memory layer on top of a read-only zip backend
+    New entries are written to the overlay; reads fall through to the base backend. Removed base entries are hidden
+    by tombstones.
+    Exporting (get_buffer(), save_stream(), save()) merges both layers into a single zip file.
+    """
+
+    def __init__(self, base: InMemoryZip, compression: CompressionPolicy = None):
+        """
+        Constructor
+        :param base: read-only zip backend
+        :param compression: optional compression policy for new entries (default: same as base)
+        """
+        self._base = base
+        # names of removed base entries
+        self._deleted = set()
+        if compression is None:
+            compression = base.get_compression()
+        super().__init__(None, compression=compression)
+
+    def get_base(self) -> InMemoryZip:
+        """
+        Retrieve base backend
+        :return: InMemoryZip
+        """
+        return self._base
+
+    def namelist(self) -> list:
+        """
+        List all entry names from both layers
+        :return: list
+        """
+        return [info.filename for info in self.infolist()]
+
+    def infolist(self) -> list:
+        """
+        List all entries from both layers
+        Overlay entries shadow base entries with the same name; removed entries are skipped
+        :return: list of ZipInfo
+        """
+        with self._lock.read():
+            overlay = self.zip()
+            result = [
+                info
+                for info in self._base.infolist()
+                if info.filename not in overlay.NameToInfo
+                and info.filename not in self._deleted
+            ]
+            result.extend(overlay.infolist())
+            return result
+
+    def getinfo(self, name: str) -> zipfile.ZipInfo:
+        return self._layer(name).getinfo(name)
+
+    def get_buffer(self) -> io.BytesIO:
+        """
+        Get a merged copy of both layers
+        Unlike InMemoryZip, the zip file remains open
+        :return: io.BytesIO
+        """
+        if not self.is_open():
+            raise InMemoryZipError("Cannot get_buffer(); Zip is already closed.")
+        result = io.BytesIO()
+        self._merge(result)
+        result.seek(0)
+        return result
+
+    def getbuffer(self) -> memoryview:
+        """
+        Get a read-only view of the merged zip file
+        :return: memoryview
+        """
+        return memoryview(self.get_buffer().getvalue())
+
+    def write_to(self, dest) -> int:
+        """
+        Merge both layers straight into a caller-supplied file-like object or socket
+        The zip file remains open
+        :param dest: writable file-like object or socket
+        :return: number of bytes written
+        """
+        if not self.is_open():
+            raise InMemoryZipError("Cannot write_to(); Zip is already closed.")
+        if hasattr(dest, "sendall"):
+            with dest.makefile("wb") as f:
+                return self._merge(f)
+        return self._merge(dest)
+
+    def save_stream(self) -> io.BytesIO:
+        """
+        Merge both layers into a buffer and clean state
+        Note: the base backend is left untouched
+        :return: io.BytesIO
+        """
+        if not self.is_open():
+            raise InMemoryZipError("Cannot save_stream(); Zip is already closed.")
+        if self._frozen:
+            raise InMemoryZipError("Cannot save_stream(); Zip is frozen.")
+        result = io.BytesIO()
+        self._merge(result)
+        result.seek(0)
+        self._close()
+        return result
+
+    def save(self, dest_file: str):
+        """
+        Merge both layers into a file
+        :param dest_file: path to destination file
+        :return:
+        """
+        if not self.is_open():
+            raise InMemoryZipError("Cannot save(); Zip is already closed.")
+        if self._frozen:
+            raise InMemoryZipError("Cannot save(); Zip is frozen.")
+        try:
+            with open(dest_file, "wb") as f:
+                self._merge(f)
+            self._close()
+        except Exception as e:
+            raise InMemoryZipError("Error saving Zip file: {}".format(e))
+
+    def remove(self, name: str):
+        """
+        Remove an entry from either layer
+        Base entries are hidden, and the base backend is left untouched
+        Raises KeyError if entry does not exist
+        :param name: entry name
+        :return:
+        """
+        if self._frozen:
+            raise InMemoryZipError("Cannot remove '{}'; Zip is frozen".format(name))
+        with self._lock.write():
+            overlay = self.zip()
+            found = False
+            if name in overlay.NameToInfo:
+                self._discard(overlay, name)
+                found = True
+            if name not in self._deleted:
+                try:
+                    self._base.getinfo(name)
+                    self._deleted.add(name)
+                    found = True
+                except KeyError:
+                    pass
+            if not found:
+                raise KeyError(
+                    "There is no item named '{}' in the archive".format(name)
+                )
+
+    def _in_overlay(self, name: str) -> bool:
+        """
+        Check if a given entry is resolved by the overlay (either an overlay entry, or a removed base entry)
+        :param name: entry name
+        :return: bool
+        """
+        return name in self.zip().NameToInfo or name in self._deleted
+
+    def _layer(self, name: str):
+        """
+        Find the layer holding a given entry
+        :param name: entry name
+        :return: overlay ZipFile or base backend
+        """
+        if self._in_overlay(name):
+            return self.zip()
+        return self._base
+
+    def read_raw(self, name: str) -> Tuple[zipfile.ZipInfo, bytes]:
+        if self._in_overlay(name):
+            return super().read_raw(name)
+        return self._base.read_raw(name)
+
+    def _open(self, name: str):
+        if self._in_overlay(name):
+            return super()._open(name)
+        return self._base.open(name)
+
+    def _read(self, name: str) -> bytes:
+        if self._in_overlay(name):
+            return super()._read(name)
+        return self._base.read(name)
+
+    def _merge(self, dest) -> int:
+        """
+        Write entries from both layers into a new zip file
+        Entries are copied in compressed form, without being recompressed
+        :param dest: writable file-like object
+        :return: number of bytes written
+        """
+        with self._lock.write():
+            with zipfile.ZipFile(dest, "w") as zf:
+                # ZipFile wraps non-seekable streams to keep track of the written size
+                fp = zf.fp
+                start = fp.tell()
+                for info in self.infolist():
+                    zip_write_raw(zf, *self.read_raw(info.filename))
+            return fp.tell() - start
+
+    def _close(self):
+        """
+        Close overlay
+        :return:
+        """
+        with self._lock.write():
+            self._zip.close()
+            self._zip = None
+            self._buffer = None
@@ -0,0 +1,66 @@
+import threading
+from contextlib import contextmanager
+
+
+class RWLock:
+    """
+    Readers-writer lock
+    Any number of threads may hold the read lock at the same time; the write lock is exclusive.
+    Waiting writers block new readers, so writers are not starved by a steady stream of reads.
+    The write lock is reentrant, and its owner may also acquire the read lock.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writers_waiting = 0
+        self._owner = None
+        self._depth = 0
+
+    @contextmanager
+    def read(self):
+        """
+        Acquire read (shared) lock
+        :return:
+        """
+        if self._owner == threading.get_ident():
+            # write lock owner already has exclusive access
+            yield
+            return
+        with self._cond:
+            while self._owner is not None or self._writers_waiting > 0:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        """
+        Acquire write (exclusive) lock
+        :return:
+        """
+        me = threading.get_ident()
+        with self._cond:
+            if self._owner != me:
+                self._writers_waiting += 1
+                try:
+                    while self._owner is not None or self._readers > 0:
+                        self._cond.wait()
+                finally:
+                    self._writers_waiting -= 1
+                self._owner = me
+            self._depth += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._owner = None
+                    self._cond.notify_all()
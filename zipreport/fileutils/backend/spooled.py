@@ -0,0 +1,230 @@
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from typing import Union
+
+from .compression import CompressionPolicy
+from .zip import InMemoryZip, InMemoryZipError
+
+# copy buffer size
+CHUNK_SIZE = 1024 * 1024
+
+
+class SpooledBuffer(tempfile.SpooledTemporaryFile):
+    """
+    SpooledTemporaryFile usable as a ZipFile file object
+    """
+
+    def seekable(self) -> bool:
+        return True
+
+    def readable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return True
+
+    def is_rolled(self) -> bool:
+        """
+        Check if contents were moved to disk
+        :return: bool
+        """
+        return self._rolled
+
+    def getvalue(self) -> bytes:
+        """
+        Get buffer contents; only valid if contents are still in memory
+        :return: bytes
+        """
+        if self._rolled:
+            raise InMemoryZipError("Cannot getvalue(); buffer was moved to disk")
+        return self._file.getvalue()
+
+
+class SpooledZip(InMemoryZip):
+    """
+    Manages a zip file in memory, up to a given size
+    Once the zip file grows larger than max_size, contents are moved to a temporary file on disk, keeping memory usage
+    bounded regardless of the report size
+    """
+
+    DEFAULT_MAX_SIZE = 32 * 1024 * 1024
+
+    def __init__(
+        self,
+        source: Union[str, io.BytesIO] = None,
+        max_size: int = DEFAULT_MAX_SIZE,
+        compression: CompressionPolicy = None,
+    ):
+        """
+        Constructor
+        :param source: optional buffer or path to a zip file
+        :param max_size: maximum size, in bytes, to keep in memory
+        :param compression: optional compression policy for new entries
+        """
+        self._max_size = max_size
+        super().__init__(source, compression=compression)
+
+    def new(self, buffer: io.BytesIO = None):
+        """
+        Initialize new zip file
+        :param buffer: optional buffer with zip contents; contents are copied to a spooled buffer
+        :return:
+        """
+        flags = "w"
+        if isinstance(buffer, SpooledBuffer):
+            self._buffer = buffer
+            flags = "a"
+        elif buffer is not None and not (hasattr(buffer, "read") and hasattr(buffer, "seek")):
+            raise TypeError(
+                "Invalid zip buffer type '{}'; expected a seekable binary file object".format(
+                    type(buffer).__name__
+                )
+            )
+        else:
+            self._buffer = self._create_buffer()
+            if buffer is not None:
+                buffer.seek(0)
+                shutil.copyfileobj(buffer, self._buffer, CHUNK_SIZE)
+                flags = "a"
+        self._buffer.seek(0)
+        self._zip = zipfile.ZipFile(self._buffer, flags, zipfile.ZIP_DEFLATED)
+        self._track_size()
+
+    def load(self, disk_file: str):
+        """
+        Load zip from disk
+        :param disk_file: path to zip file
+        :return:
+        """
+        if not os.path.exists(disk_file) or not os.path.isfile(disk_file):
+            raise InMemoryZipError(
+                "Zip file '{}' does not exist or is not a valid file".format(disk_file)
+            )
+
+        try:
+            self._buffer = self._create_buffer()
+            with open(disk_file, "rb") as f:
+                shutil.copyfileobj(f, self._buffer, CHUNK_SIZE)
+            self._buffer.seek(0)
+            self._zip = zipfile.ZipFile(self._buffer, mode="a")
+            self._track_size()
+        except Exception as e:
+            raise InMemoryZipError("Error reading Zip file: {}".format(e))
+
+    def _create_buffer(self) -> SpooledBuffer:
+        return SpooledBuffer(max_size=self._max_size)
+
+    def _compact(self):
+        with self._lock.write():
+            old = self._buffer
+            super()._compact()
+            if self._buffer is not old:
+                # release temporary file
+                old.close()
+
+    def is_spooled(self) -> bool:
+        """
+        Check if zip contents were moved to disk
+        :return: bool
+        """
+        return self._buffer is not None and self._buffer.is_rolled()
+
+    def get_buffer(self) -> SpooledBuffer:
+        """
+        Get a copy of the zip file
+        The copy is also a spooled buffer, using the same max_size
+        :return: SpooledBuffer
+        """
+        if not self.is_open():
+            raise InMemoryZipError("Cannot get_buffer(); Zip is already closed.")
+        with self._lock.write():
+            self._flush()
+            result = self._create_buffer()
+            self._buffer.seek(0)
+            shutil.copyfileobj(self._buffer, result, CHUNK_SIZE)
+        result.seek(0)
+        return result
+
+    def getbuffer(self) -> memoryview:
+        """
+        Get a read-only view of the zip file contents
+        Only available while the zip file is kept in memory
+        :return: memoryview
+        """
+        if not self.is_open():
+            raise InMemoryZipError("Cannot getbuffer(); Zip is already closed.")
+        if self.is_spooled():
+            raise InMemoryZipError("Cannot getbuffer(); Zip was moved to disk.")
+        return super().getbuffer()
+
+    def write_to(self, dest) -> int:
+        """
+        Write zip file contents to a caller-supplied file-like object or socket, in chunks
+        The zip file remains open
+        :param dest: writable file-like object or socket
+        :return: number of bytes written
+        """
+        if not self.is_open():
+            raise InMemoryZipError("Cannot write_to(); Zip is already closed.")
+        write = dest.sendall if hasattr(dest, "sendall") else dest.write
+        size = 0
+        with self._lock.write():
+            self._flush()
+            self._buffer.seek(0)
+            while True:
+                chunk = self._buffer.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                write(chunk)
+                size += len(chunk)
+        return size
+
+    def save_stream(self) -> Union[io.BytesIO, SpooledBuffer]:
+        """
+        Flush zip file and clean state
+        The internal buffer is returned without being copied: an io.BytesIO if the zip file is still in memory, or
+        the spooled buffer if it was moved to disk, so contents are not read back into memory; the caller is
+        responsible for closing it
+        Note: this will force a close on the internal zip file; no other operations can be done afterwards
+        :return: io.BytesIO or SpooledBuffer
+        """
+        if not self.is_open():
+            raise InMemoryZipError("Cannot save_stream(); Zip is already closed.")
+        if self._frozen:
+            raise InMemoryZipError("Cannot save_stream(); Zip is frozen.")
+        with self._lock.write():
+            self._compact()
+            self._zip.close()
+            result = self._buffer
+            self._buffer = None
+            self._zip = None
+        if not result.is_rolled():
+            result = result._file
+        result.seek(0)
+        return result
+
+    def save(self, dest_file: str):
+        """
+        Save zip file to disk
+        :param dest_file: path to destination file
+        :return:
+        """
+        if not self.is_open():
+            raise InMemoryZipError("Cannot save(); Zip is already closed.")
+        if self._frozen:
+            raise InMemoryZipError("Cannot save(); Zip is frozen.")
+        try:
+            with self._lock.write():
+                self._compact()
+                self._zip.close()
+                self._buffer.seek(0)
+                with open(dest_file, "wb") as f:
+                    shutil.copyfileobj(self._buffer, f, CHUNK_SIZE)
+                self._buffer.close()
+                self._buffer = None
+                self._zip = None
+        except Exception as e:
+            raise InMemoryZipError("Error saving Zip file: {}".format(e))
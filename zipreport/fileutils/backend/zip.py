@@ -1,45 +1,277 @@
 import io
 import os
+import struct
+import time
 import zipfile
-from typing import Union
+import zlib
+from copy import copy
+from typing import Tuple, Union
+
+from .compression import CompressionPolicy, FLAG_COMPRESS_OPTION_1
+from .rwlock import RWLock
+
+# zip64 extended information extra field id
+ZIP64_EXTRA_ID = 0x0001
+# general purpose flag: sizes and crc are stored in a data descriptor after the entry data
+FLAG_DATA_DESCRIPTOR = 0x08
+# general purpose flag: entry is encrypted
+FLAG_ENCRYPTED = 0x01
+# chunk size when copying compressed contents
+RAW_CHUNK_SIZE = 1024 * 1024
 
 
 class InMemoryZipError(Exception):
     pass
 
 
+def zip_read_raw(zf: zipfile.ZipFile, info: zipfile.ZipInfo) -> bytes:
+    """
+    Read the compressed contents of a zip entry, without decompressing it
+    :param zf: ZipFile
+    :param info: entry ZipInfo
+    :return: bytes
+    """
+    with zf._lock:
+        zf.fp.seek(_zip_data_offset(zf, info))
+        return zf.fp.read(info.compress_size)
+
+
+def zip_iter_raw(
+    zf: zipfile.ZipFile, info: zipfile.ZipInfo, chunk_size: int = RAW_CHUNK_SIZE
+):
+    """
+    Read the compressed contents of a zip entry in chunks, without decompressing it
+    The ZipFile may be used by other readers between chunks
+    :param zf: ZipFile
+    :param info: entry ZipInfo
+    :param chunk_size: maximum chunk size
+    :return: iterator of bytes
+    """
+    with zf._lock:
+        offset = _zip_data_offset(zf, info)
+    end = offset + info.compress_size
+    while offset < end:
+        with zf._lock:
+            zf.fp.seek(offset)
+            chunk = zf.fp.read(min(chunk_size, end - offset))
+        if len(chunk) == 0:
+            raise zipfile.BadZipFile("Truncated entry '{}'".format(info.filename))
+        offset += len(chunk)
+        yield chunk
+
+
+def zip_open_raw(info: zipfile.ZipInfo, data: bytes) -> zipfile.ZipExtFile:
+    """
+    Open the compressed contents of a zip entry (eg. from zip_read_raw()) for reading
+    The returned object decompresses incrementally and checks the CRC; it doesn't depend on the ZipFile the entry
+    was read from, so it can be safely used concurrently with other readers and writers
+    :param info: entry ZipInfo
+    :param data: compressed contents
+    :return: file-like object
+    """
+    if info.flag_bits & FLAG_ENCRYPTED:
+        raise RuntimeError(
+            "File '{}' is encrypted, password required for extraction".format(
+                info.filename
+            )
+        )
+    return zipfile.ZipExtFile(io.BytesIO(data), "r", info, None, True)
+
+
+def zip_write_raw(zf: zipfile.ZipFile, info: zipfile.ZipInfo, data):
+    """
+    Append an entry with already-compressed contents to a ZipFile
+    info must have valid CRC, sizes and compression method; it is copied, not modified
+    :param zf: ZipFile opened for writing
+    :param info: entry ZipInfo
+    :param data: compressed contents, or iterable of compressed content chunks (eg. from zip_iter_raw())
+    :return:
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = [data]
+    info = copy(info)
+    # sizes are known beforehand, so data descriptors are not needed
+    info.flag_bits &= ~FLAG_DATA_DESCRIPTOR
+    info.extra = _strip_extra(info.extra, ZIP64_EXTRA_ID)
+    zip64 = (
+        info.file_size > zipfile.ZIP64_LIMIT or info.compress_size > zipfile.ZIP64_LIMIT
+    )
+    with zf._lock:
+        if zf._writing:
+            raise ValueError("Can't write to zip while an open writing handle exists")
+        zf._writecheck(info)
+        zf._didModify = True
+        if zf._seekable:
+            zf.fp.seek(zf.start_dir)
+        info.header_offset = zf.fp.tell()
+        zf.fp.write(info.FileHeader(zip64))
+        for chunk in data:
+            zf.fp.write(chunk)
+        zf.filelist.append(info)
+        zf.NameToInfo[info.filename] = info
+        zf.start_dir = zf.fp.tell()
+
+
+def zip_write_stream(zf: zipfile.ZipFile, info: zipfile.ZipInfo, chunks, compressor):
+    """
+    Compress and append an entry to a seekable ZipFile, in chunks
+    CRC and sizes are computed while writing, and the local header is rewritten afterwards
+    info must have the expected uncompressed size and the compression method; it is copied, not modified
+    :param zf: ZipFile opened for writing, on a seekable file
+    :param info: entry ZipInfo
+    :param chunks: iterable of uncompressed content chunks
+    :param compressor: compressor object (eg. from CompressionPolicy.compressor()), or None to store the contents
+    :return:
+    """
+    info = copy(info)
+    info.flag_bits &= ~FLAG_DATA_DESCRIPTOR
+    if info.compress_type == zipfile.ZIP_LZMA:
+        # compressed data includes an end-of-stream marker
+        info.flag_bits |= FLAG_COMPRESS_OPTION_1
+    info.extra = _strip_extra(info.extra, ZIP64_EXTRA_ID)
+    # compressed size can be larger than uncompressed size
+    zip64 = info.file_size * 1.05 > zipfile.ZIP64_LIMIT
+    with zf._lock:
+        if zf._writing:
+            raise ValueError("Can't write to zip while an open writing handle exists")
+        if not zf._seekable:
+            raise ValueError("Can't stream entries to a non-seekable zip file")
+        info.CRC = 0
+        info.compress_size = 0
+        zf._writecheck(info)
+        zf._didModify = True
+        zf.fp.seek(zf.start_dir)
+        info.header_offset = zf.fp.tell()
+        zf.fp.write(info.FileHeader(zip64))
+        crc = 0
+        size = 0
+        compress_size = 0
+        for chunk in chunks:
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            if compressor is not None:
+                chunk = compressor.compress(chunk)
+            compress_size += len(chunk)
+            zf.fp.write(chunk)
+        if compressor is not None:
+            chunk = compressor.flush()
+            compress_size += len(chunk)
+            zf.fp.write(chunk)
+        if not zip64 and max(size, compress_size) > zipfile.ZIP64_LIMIT:
+            raise InMemoryZipError("File size changed while writing '{}'".format(info.filename))
+        info.CRC = crc
+        info.file_size = size
+        info.compress_size = compress_size
+        # rewrite local header with the final CRC and sizes
+        zf.start_dir = zf.fp.tell()
+        zf.fp.seek(info.header_offset)
+        zf.fp.write(info.FileHeader(zip64))
+        zf.fp.seek(zf.start_dir)
+        zf.filelist.append(info)
+        zf.NameToInfo[info.filename] = info
+
+
+def _zip_data_offset(zf: zipfile.ZipFile, info: zipfile.ZipInfo) -> int:
+    """
+    Find the offset of the compressed contents of a zip entry
+    Must be called with the ZipFile lock held
+    :param zf: ZipFile
+    :param info: entry ZipInfo
+    :return: offset
+    """
+    fp = zf.fp
+    fp.seek(info.header_offset)
+    header = fp.read(zipfile.sizeFileHeader)
+    if len(header) != zipfile.sizeFileHeader or header[0:4] != zipfile.stringFileHeader:
+        raise zipfile.BadZipFile(
+            "Bad local file header for entry '{}'".format(info.filename)
+        )
+    fields = struct.unpack(zipfile.structFileHeader, header)
+    # skip filename and extra field
+    return info.header_offset + zipfile.sizeFileHeader + fields[10] + fields[11]
+
+
+def _strip_extra(extra: bytes, xid: int) -> bytes:
+    """
+    Remove a given field from a zip extra data block
+    :param extra: extra data
+    :param xid: field id to remove
+    :return: bytes
+    """
+    result = []
+    i = 0
+    while i + 4 <= len(extra):
+        tp, ln = struct.unpack("<HH", extra[i : i + 4])
+        j = i + 4 + ln
+        if tp != xid:
+            result.append(extra[i:j])
+        i = j
+    return b"".join(result)
+
+
 class InMemoryZip:
     """
     Manages a zip file in memory
     """
 
-    def __init__(self, source: Union[str, io.BytesIO] = None):
+    def __init__(
+        self,
+        source: Union[str, io.IOBase] = None,
+        compression: CompressionPolicy = None,
+    ):
         """
         Constructor
-        :param source: optional buffer with zip contents to use
+        :param source: optional path to zip file, or buffer with zip contents to use
+        :param compression: optional compression policy for new entries
         """
         self._zip = None
         self._buffer = None
-        if isinstance(source, io.BytesIO) or source is None:
-            # create new zip or from buffer
-            self.new(source)
-        else:
+        self._frozen = False
+        self._entries = {}
+        # size of removed or replaced entries still present in the buffer
+        self._garbage = 0
+        # largest buffer size seen
+        self._peak_size = 0
+        # entries are read concurrently; writes and exports are exclusive
+        self._lock = RWLock()
+        self._compression = compression if compression is not None else CompressionPolicy()
+        if isinstance(source, (str, os.PathLike)):
             # source may be str or Path
             self.load(source)
+        else:
+            # create new zip or from buffer
+            self.new(source)
 
-    def new(self, buffer: io.BytesIO = None):
+    def new(self, buffer: io.IOBase = None):
         """
         Initialize new zip file in memory
-        :param buffer: optional buffer with zip contents
+        io.BytesIO buffers are used as-is; the contents of other seekable binary file objects are copied
+        :param buffer: optional buffer or seekable binary file object with zip contents
         :return:
         """
         flags = "w"
         if isinstance(buffer, io.BytesIO):
             self._buffer = buffer
             flags = "a"
+        elif buffer is None:
+            self._buffer = self._create_buffer()
+        elif hasattr(buffer, "read") and hasattr(buffer, "seek"):
+            self._buffer = self._create_buffer()
+            buffer.seek(0)
+            while True:
+                chunk = buffer.read(RAW_CHUNK_SIZE)
+                if not chunk:
+                    break
+                self._buffer.write(chunk)
+            flags = "a"
         else:
-            self._buffer = io.BytesIO()
+            raise TypeError(
+                "Invalid zip buffer type '{}'; expected a seekable binary file object".format(
+                    type(buffer).__name__
+                )
+            )
         self._zip = zipfile.ZipFile(self._buffer, flags, zipfile.ZIP_DEFLATED)
+        self._track_size()
 
     def load(self, disk_file: str):
         """
@@ -56,37 +288,66 @@ class InMemoryZip:
             with open(disk_file, "rb", buffering=0) as f:
                 self._buffer = io.BytesIO(f.read())
                 self._zip = zipfile.ZipFile(self._buffer, mode="a")
+            self._track_size()
         except Exception as e:
             raise InMemoryZipError("Error reading Zip file: {}".format(e))
 
     def get_buffer(self) -> io.BytesIO:
         """
-        Get internal buffer
-        Note: this will force a close on the internal zip file; no other operations can be done afterwards
-        :return:
+        Get a copy of the internal buffer
+        The copy shares memory with the internal buffer until either one is modified
+        :return: io.BytesIO
         """
         if not self.is_open():
             raise InMemoryZipError("Cannot get_buffer(); Zip is already closed.")
-        # flush file, clone stream, reopen file
-        self._zip.close()
-        self._buffer.seek(0)
-        result = io.BytesIO(self._buffer.read())
-        self.new(self._buffer)
-        return result
+        with self._lock.write():
+            self._flush()
+            return io.BytesIO(self._buffer.getvalue())
+
+    def getbuffer(self) -> memoryview:
+        """
+        Get a read-only view of the zip file contents, without copying the internal buffer
+        The zip file remains open; further modifications are not reflected in the returned view
+        :return: memoryview
+        """
+        if not self.is_open():
+            raise InMemoryZipError("Cannot getbuffer(); Zip is already closed.")
+        with self._lock.write():
+            self._flush()
+            return memoryview(self._buffer.getvalue())
+
+    def write_to(self, dest) -> int:
+        """
+        Write zip file contents to a caller-supplied file-like object or socket, without copying the internal buffer
+        The zip file remains open
+        :param dest: writable file-like object or socket
+        :return: number of bytes written
+        """
+        view = self.getbuffer()
+        if hasattr(dest, "sendall"):
+            dest.sendall(view)
+        else:
+            dest.write(view)
+        return view.nbytes
 
     def save_stream(self) -> io.BytesIO:
         """
         Flush internal buffer and clean state
+        The internal buffer is returned as-is, without being copied
         Note: this will force a close on the internal zip file; no other operations can be done afterwards
         """
         if not self.is_open():
-            raise InMemoryZipError("Cannot get_buffer(); Zip is already closed.")
-        self._zip.close()
-        self._buffer.seek(0)
-        result = io.BytesIO(self._buffer.read())
-        self._buffer = None
-        self._zip = None
-        return result
+            raise InMemoryZipError("Cannot save_stream(); Zip is already closed.")
+        if self._frozen:
+            raise InMemoryZipError("Cannot save_stream(); Zip is frozen.")
+        with self._lock.write():
+            self._compact()
+            self._zip.close()
+            result = self._buffer
+            result.seek(0)
+            self._buffer = None
+            self._zip = None
+            return result
 
     def save(self, dest_file: str):
         """
@@ -96,16 +357,185 @@ class InMemoryZip:
         """
         if not self.is_open():
             raise InMemoryZipError("Cannot save(); Zip is already closed.")
+        if self._frozen:
+            raise InMemoryZipError("Cannot save(); Zip is frozen.")
         try:
-            self._zip.close()
-            self._buffer.seek(0)
-            with open(dest_file, "wb", buffering=0) as f:
-                f.write(self._buffer.read())
-            self._buffer = None
-            self._zip = None
+            with self._lock.write():
+                self._compact()
+                self._zip.close()
+                with open(dest_file, "wb", buffering=0) as f:
+                    f.write(self._buffer.getbuffer())
+                self._buffer = None
+                self._zip = None
         except Exception as e:
             raise InMemoryZipError("Error saving Zip file: {}".format(e))
 
+    def namelist(self) -> list:
+        """
+        List all entry names
+        :return: list
+        """
+        with self._lock.read():
+            return self.zip().namelist()
+
+    def infolist(self) -> list:
+        """
+        List all entries
+        :return: list of ZipInfo
+        """
+        with self._lock.read():
+            return list(self.zip().infolist())
+
+    def getinfo(self, name: str) -> zipfile.ZipInfo:
+        """
+        Retrieve entry information
+        Raises KeyError if entry does not exist
+        :param name: entry name
+        :return: ZipInfo
+        """
+        with self._lock.read():
+            return self.zip().getinfo(name)
+
+    def open(self, name: str):
+        """
+        Open an entry for reading
+        Safe to call from several threads
+        :param name: entry name
+        :return: file-like object
+        """
+        if self._frozen:
+            return io.BytesIO(self.read(name))
+        return self._open(name)
+
+    def read(self, name: str) -> bytes:
+        """
+        Read an entry
+        Safe to call from several threads; if the zip is frozen, decompressed contents are kept and shared between
+        readers
+        :param name: entry name
+        :return: bytes
+        """
+        if not self._frozen:
+            return self._read(name)
+        data = self._entries.get(name, None)
+        if data is None:
+            data = self._entries.setdefault(name, self._read(name))
+        return data
+
+    def read_raw(self, name: str) -> Tuple[zipfile.ZipInfo, bytes]:
+        """
+        Read the compressed contents of an entry, without decompressing it
+        :param name: entry name
+        :return: (ZipInfo, bytes)
+        """
+        with self._lock.read():
+            zf = self.zip()
+            info = zf.getinfo(name)
+            return info, zip_read_raw(zf, info)
+
+    def write_raw(self, info: zipfile.ZipInfo, data):
+        """
+        Add an entry with already-compressed contents (eg. from read_raw())
+        Existing entries with the same name are replaced
+        :param info: entry ZipInfo
+        :param data: compressed contents
+        :return:
+        """
+        if self._frozen:
+            raise InMemoryZipError("Cannot add '{}'; Zip is frozen".format(info.filename))
+        with self._lock.write():
+            zf = self.zip()
+            if info.filename in zf.NameToInfo:
+                self._discard(zf, info.filename)
+            zip_write_raw(zf, info, data)
+            self._track_size()
+
+    def writestr(self, name: str, content, compress_type: int = None):
+        """
+        Add a new entry
+        Contents are compressed before acquiring the write lock, so concurrent readers are only blocked while the
+        entry is appended
+        :param name: entry name
+        :param content: entry contents
+        :param compress_type: optional compression method; if None, the compression policy is used
+        :return:
+        """
+        if self._frozen:
+            raise InMemoryZipError("Cannot add '{}'; Zip is frozen".format(name))
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        info = zipfile.ZipInfo(name, date_time=time.localtime(time.time())[:6])
+        info.external_attr = 0o600 << 16
+        self.write_raw(*self._compression.compress(info, content, compress_type))
+
+    def remove(self, name: str):
+        """
+        Remove an entry
+        The entry is only dropped from the index; its contents are discarded when the zip file is compacted on export
+        Raises KeyError if entry does not exist
+        :param name: entry name
+        :return:
+        """
+        if self._frozen:
+            raise InMemoryZipError("Cannot remove '{}'; Zip is frozen".format(name))
+        with self._lock.write():
+            self._discard(self.zip(), name)
+
+    def get_buffer_size(self) -> int:
+        """
+        Get the current size of the internal buffer
+        :return: size in bytes; 0 if the zip is closed
+        """
+        if not self.is_open():
+            return 0
+        with self._lock.write():
+            return self._buffer_size()
+
+    def get_peak_buffer_size(self) -> int:
+        """
+        Get the largest size of the internal buffer since the zip was created or loaded
+        :return: size in bytes
+        """
+        return self._peak_size
+
+    def get_garbage_size(self) -> int:
+        """
+        Get the size of removed or replaced entries, pending compaction
+        :return: size in bytes
+        """
+        return self._garbage
+
+    def set_compression(self, compression: CompressionPolicy):
+        """
+        Set compression policy for new entries
+        :param compression: CompressionPolicy
+        :return:
+        """
+        self._compression = compression
+
+    def get_compression(self) -> CompressionPolicy:
+        """
+        Get compression policy
+        :return: CompressionPolicy
+        """
+        return self._compression
+
+    def freeze(self):
+        """
+        Make the zip read-only, so it can be safely shared (eg. as the base of OverlayZip instances)
+        :return: self
+        """
+        with self._lock.write():
+            self._frozen = True
+        return self
+
+    def is_frozen(self) -> bool:
+        """
+        Check if zip is read-only
+        :return: bool
+        """
+        return self._frozen
+
     def zip(self) -> zipfile.ZipFile:
         """
         Retrieve internal ZipFile object
@@ -115,6 +545,101 @@ class InMemoryZip:
             raise InMemoryZipError("Cannot zip(); Zip is already closed.")
         return self._zip
 
+    def _flush(self):
+        """
+        Write the zip central directory to the internal buffer, without closing the zip file
+        The central directory is written after the last entry, and is overwritten by the next write
+        :return:
+        """
+        with self._lock.write():
+            self._compact()
+            zf = self._zip
+            with zf._lock:
+                if zf._writing:
+                    raise InMemoryZipError("Cannot flush zip while an open writing handle exists")
+                if not zf._didModify:
+                    return
+                zf.fp.seek(zf.start_dir)
+                zf._write_end_record()
+                zf.fp.truncate()
+                zf._didModify = False
+
+    def _discard(self, zf: zipfile.ZipFile, name: str):
+        """
+        Drop an entry from a ZipFile index
+        Raises KeyError if entry does not exist
+        :param zf: ZipFile
+        :param name: entry name
+        :return:
+        """
+        info = zf.NameToInfo.pop(name)
+        zf.filelist.remove(info)
+        zf._didModify = True
+        self._entries.pop(name, None)
+        self._garbage += (
+            zipfile.sizeFileHeader
+            + len(info.filename.encode("utf-8"))
+            + len(info.extra)
+            + info.compress_size
+        )
+
+    def _compact(self):
+        """
+        Rewrite the zip file without removed or replaced entries, if any
+        Entries are copied in compressed form
+        :return:
+        """
+        with self._lock.write():
+            if self._garbage == 0:
+                return
+            buffer = self._create_buffer()
+            with zipfile.ZipFile(buffer, "w") as zf:
+                for info in self._zip.infolist():
+                    zip_write_raw(zf, info, zip_read_raw(self._zip, info))
+            self._zip.close()
+            self._garbage = 0
+            self.new(buffer)
+
+    def _buffer_size(self) -> int:
+        """
+        Compute the size of the internal buffer
+        :return: size in bytes
+        """
+        return self._buffer.seek(0, os.SEEK_END)
+
+    def _track_size(self):
+        """
+        Update peak buffer size
+        :return:
+        """
+        with self._lock.write():
+            self._peak_size = max(self._peak_size, self._buffer_size())
+
+    def _create_buffer(self):
+        """
+        Create an empty buffer for the zip file contents
+        :return: io.BytesIO
+        """
+        return io.BytesIO()
+
+    def _open(self, name: str):
+        """
+        Open an entry from the internal ZipFile
+        The compressed contents are copied, so the returned object doesn't share state with the ZipFile
+        :param name: entry name
+        :return: file-like object
+        """
+        return zip_open_raw(*self.read_raw(name))
+
+    def _read(self, name: str) -> bytes:
+        """
+        Read an entry from the internal ZipFile
+        :param name: entry name
+        :return: bytes
+        """
+        with self._open(name) as f:
+            return f.read()
+
     def is_open(self):
         """
         Check if ZipFile is opened
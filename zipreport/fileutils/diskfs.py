@@ -2,6 +2,7 @@ import io
 import os
 from pathlib import Path
 
+from .diskindex import DiskIndex
 from .interface import FsError, FsInterface
 
 
@@ -9,17 +10,33 @@ class DiskFs(FsInterface):
     """
     Disk-based file operations
     Note: due to the way path separators are handled, one should assume compatibility with unix-os only
+
+    If index is True, the directory tree is scanned once and kept in memory; existence checks and listings are
+    served from the index, which is re-validated using directory modification times at most once every index_ttl
+    seconds. The contents of symlinked directories are only indexed (and listed) if follow_links is True
     """
 
-    def __init__(self, path):
+    def __init__(
+        self,
+        path,
+        index: bool = False,
+        follow_links: bool = False,
+        index_ttl: float = 1.0,
+    ):
         """
         Constructor
         :param path: filesystem path to use as root
+        :param index: if True, use an in-memory directory index
+        :param follow_links: if True, the contents of symlinked directories are indexed
+        :param index_ttl: minimum interval between index validations, in seconds
         """
         if isinstance(path, Path):
             self._basepath = str(path)
         else:
             self._basepath = path
+        self._index = None
+        if index:
+            self._index = DiskIndex(self._basepath, follow_links, index_ttl)
 
     def get(self, name: str) -> io.BytesIO:
         """
@@ -27,15 +44,25 @@ class DiskFs(FsInterface):
         :param name: filename with full path
         :return: io.BytesIO
         """
-        path = self._build_path(name)
-        if not os.path.exists(path):
-            raise FsError("Path '{}' does not exist".format(path))
+        return io.BytesIO(self.get_bytes(name))
 
-        if os.path.isfile(path):
-            with open(path, "rb", buffering=0) as f:
-                return io.BytesIO(f.read())
-        else:
-            raise FsError("Path '{}' is not a file".format(path))
+    def open_stream(self, name: str):
+        """
+        Open a file for reading
+        The caller is responsible for closing the returned object
+        :param name: filename with full path
+        :return: file-like object
+        """
+        return open(self._file_path(name), "rb")
+
+    def get_bytes(self, name: str) -> bytes:
+        """
+        Read the contents of a file
+        :param name: filename with full path
+        :return: bytes
+        """
+        with open(self._file_path(name), "rb", buffering=0) as f:
+            return f.read()
 
     def add(self, name: str, content):
         """
@@ -44,6 +71,7 @@ class DiskFs(FsInterface):
         :param content: file contents
         :return:
         """
+        key = self._index_key(name)
         name = self._build_path(name)
         if not self._can_create(os.path.dirname(name), name):
             raise FsError(
@@ -53,6 +81,36 @@ class DiskFs(FsInterface):
             )
         with open(name, "wb", buffering=0) as f:
             f.write(content)
+        if key is not None:
+            self._index.add(key)
+
+    def replace(self, name: str, content):
+        """
+        Add a new file, or overwrite an existing one
+        :param name: filename with full path
+        :param content: file contents
+        :return:
+        """
+        key = self._index_key(name)
+        name = self._build_path(name)
+        path = os.path.dirname(name)
+        if not os.path.isdir(path) or os.path.isdir(name):
+            raise FsError("Cannot replace file '{}'; Invalid path".format(name))
+        with open(name, "wb", buffering=0) as f:
+            f.write(content)
+        if key is not None:
+            self._index.add(key)
+
+    def remove(self, name: str):
+        """
+        Remove a file
+        :param name: filename with full path
+        :return:
+        """
+        os.unlink(self._file_path(name))
+        key = self._index_key(name)
+        if key is not None:
+            self._index.remove(key)
 
     def mkdir(self, name: str):
         """
@@ -60,6 +118,7 @@ class DiskFs(FsInterface):
         :param name: full directory path
         :return:
         """
+        key = self._index_key(name)
         name = self._build_path(name)
         if not self._can_create(os.path.dirname(name), name):
             raise FsError(
@@ -68,6 +127,8 @@ class DiskFs(FsInterface):
                 )
             )
         os.mkdir(name)
+        if key is not None:
+            self._index.add(key, is_dir=True)
 
     def exists(self, path: str) -> bool:
         """
@@ -75,6 +136,9 @@ class DiskFs(FsInterface):
         :param path:
         :return:
         """
+        key = self._index_key(path)
+        if key is not None:
+            return key in self._index.files() or self._index.children(key) is not None
         return os.path.exists(self._build_path(path))
 
     def is_dir(self, path: str) -> bool:
@@ -83,6 +147,9 @@ class DiskFs(FsInterface):
         :param path: path to check
         :return: bool
         """
+        key = self._index_key(path)
+        if key is not None:
+            return self._index.children(key) is not None
         path = self._build_path(path)
         return os.path.exists(path) and os.path.isdir(path)
 
@@ -92,6 +159,9 @@ class DiskFs(FsInterface):
         :param path: path
         :return: list
         """
+        key = self._index_key(path)
+        if key is not None:
+            return list(self._children(key)[0])
         path = self._build_path(path)
         if os.path.exists(path) and os.path.isdir(path):
             for _, _, filenames in os.walk(path):
@@ -106,6 +176,9 @@ class DiskFs(FsInterface):
         :param path: root path to start listing
         :return: list
         """
+        key = self._index_key(path)
+        if key is not None:
+            return self._index_list(key)
         path = Path(self._build_path(path))
         result = []
         for dirname, dirs, files in os.walk(path):
@@ -125,6 +198,9 @@ class DiskFs(FsInterface):
         :param path: path to check
         :return: list
         """
+        key = self._index_key(path)
+        if key is not None:
+            return [name + os.sep for name in self._children(key)[1]]
         path = self._build_path(path)
         result = []
         if os.path.exists(path) and os.path.isdir(path):
@@ -143,6 +219,14 @@ class DiskFs(FsInterface):
         """
         return None
 
+    def invalidate_index(self):
+        """
+        Discard the directory index, if enabled; it is rebuilt on next use
+        :return:
+        """
+        if self._index is not None:
+            self._index.invalidate()
+
     def _can_create(self, path, name: str) -> bool:
         """
         Verify if a file/dir can be created on a given path
@@ -152,6 +236,26 @@ class DiskFs(FsInterface):
         """
         return os.path.exists(path) and os.path.isdir(path) and not os.path.exists(name)
 
+    def _file_path(self, name: str) -> str:
+        """
+        Build absolute path for an existing file
+        :param name: filename with full path
+        :return: absolute path
+        """
+        path = self._build_path(name)
+        key = self._index_key(name)
+        if key is not None:
+            if key in self._index.files():
+                return path
+            exists = self._index.children(key) is not None
+        else:
+            exists = os.path.exists(path)
+        if not exists:
+            raise FsError("Path '{}' does not exist".format(path))
+        if key is not None or not os.path.isfile(path):
+            raise FsError("Path '{}' is not a file".format(path))
+        return path
+
     def _build_path(self, path):
         """
         Cleans and build absolute path for internal use
@@ -159,3 +263,59 @@ class DiskFs(FsInterface):
         :return: absolute path
         """
         return os.path.join(self._basepath, path.lstrip(os.sep))
+
+    def _index_key(self, path: str):
+        """
+        Build index key for a path
+        :param path: relative path
+        :return: index key, or None if the index is disabled or the path is outside the root path
+        """
+        if self._index is None:
+            return None
+        path = path.strip(os.sep)
+        if path == "":
+            return ""
+        path = os.path.normpath(path)
+        if path == os.curdir:
+            return ""
+        if path == os.pardir or path.startswith(os.pardir + os.sep):
+            return None
+        return path
+
+    def _children(self, key: str) -> tuple:
+        """
+        Retrieve indexed contents of a directory
+        :param key: index key
+        :return: tuple of (file names, dir names)
+        """
+        children = self._index.children(key)
+        if children is None:
+            raise FsError(
+                "Cannot stat '{}'; Invalid path".format(
+                    os.path.join(self._basepath, key)
+                )
+            )
+        return children
+
+    def _index_list(self, key: str) -> list:
+        """
+        List all contents of an indexed directory and its subdirectories, in os.walk() order
+        :param key: index key
+        :return: list
+        """
+        result = []
+        prefix = key + os.sep if key else ""
+        pending = [""]
+        while pending:
+            dirname = pending.pop()
+            children = self._index.children(prefix + dirname if dirname else key)
+            if children is None:
+                continue
+            files, dirs = children
+            base = dirname + os.sep if dirname else ""
+            for name in dirs:
+                result.append(base + name + os.sep)
+            for name in files:
+                result.append(base + name)
+            pending.extend(base + name for name in reversed(dirs))
+        return result
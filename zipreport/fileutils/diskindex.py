@@ -0,0 +1,196 @@
+import os
+import threading
+import time
+
+
+class DiskIndex:
+    """
+    DiskFs directory index
+    The directory tree is scanned once with os.scandir(); the index is validated by comparing the modification
+    time of every indexed directory, at most once every ttl seconds
+    Index paths are relative to the root path, use os.sep as separator and have no leading or trailing separator;
+    the root directory is ""
+    Symlinked directories are always indexed as directories, but their contents are only indexed if follow_links is
+    True; directories that would create a loop are not descended into
+    """
+
+    def __init__(self, path: str, follow_links: bool = False, ttl: float = 1.0):
+        """
+        Constructor
+        :param path: root path to index
+        :param follow_links: if True, descend into symlinked directories
+        :param ttl: minimum interval between validations, in seconds
+        """
+        self._path = path
+        self._follow_links = follow_links
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._checked = None
+        # (files, children, mtimes) snapshot; replaced as a whole on rebuild
+        self._index = None
+
+    def files(self) -> set:
+        """
+        Indexed file paths
+        :return: set
+        """
+        return self._get()[0]
+
+    def children(self, path: str):
+        """
+        Retrieve direct contents of an indexed directory
+        :param path: relative directory path
+        :return: tuple of (file names, dir names), or None if path is not an indexed directory
+        """
+        return self._get()[1].get(path, None)
+
+    def add(self, path: str, is_dir: bool = False):
+        """
+        Register a file or directory created through the owner DiskFs
+        Changes to a directory that was not indexed are ignored
+        :param path: relative path
+        :param is_dir: True if path is a directory
+        :return:
+        """
+        with self._lock:
+            if self._index is None:
+                return
+            files, children, mtimes = self._index
+            parent, name = os.path.split(path)
+            if parent not in children:
+                return
+            dir_files, dir_dirs = children[parent]
+            if is_dir:
+                abs_path = os.path.join(self._path, path)
+                children[path] = ([], [])
+                mtimes[abs_path] = self._mtime(abs_path)
+                dir_dirs.append(name)
+            elif path not in files:
+                files.add(path)
+                dir_files.append(name)
+            self._touch(parent)
+
+    def remove(self, path: str):
+        """
+        Unregister a file removed through the owner DiskFs
+        :param path: relative path
+        :return:
+        """
+        with self._lock:
+            if self._index is None:
+                return
+            files, children, _ = self._index
+            parent, name = os.path.split(path)
+            if path not in files:
+                return
+            files.discard(path)
+            children[parent][0].remove(name)
+            self._touch(parent)
+
+    def invalidate(self):
+        """
+        Discard the index; it will be rebuilt on next use
+        :return:
+        """
+        with self._lock:
+            self._index = None
+
+    def _get(self):
+        """
+        Retrieve a valid index snapshot, scanning the directory tree if required
+        :return: tuple of (files, children, mtimes)
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._index is not None and now - self._checked < self._ttl:
+                return self._index
+            if self._index is None or not self._valid(self._index[2]):
+                self._index = self._scan()
+            self._checked = now
+            return self._index
+
+    def _touch(self, path: str):
+        """
+        Update the stored modification time of an indexed directory
+        Must be called with the lock held
+        :param path: relative directory path
+        :return:
+        """
+        abs_path = os.path.join(self._path, path) if path else self._path
+        self._index[2][abs_path] = self._mtime(abs_path)
+
+    def _mtime(self, path: str):
+        """
+        Retrieve modification time of a path
+        :param path: absolute path
+        :return: mtime, or None if path cannot be accessed
+        """
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _valid(self, mtimes: dict) -> bool:
+        """
+        Check if indexed directories were not modified since the index was built
+        :param mtimes: dict of absolute dir path: mtime
+        :return: bool
+        """
+        for path, mtime in mtimes.items():
+            try:
+                if os.stat(path).st_mtime_ns != mtime:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def _scan(self):
+        """
+        Scan the directory tree
+        :return: tuple of (files, children, mtimes)
+        """
+        files = set()
+        children = {}
+        mtimes = {}
+        try:
+            st = os.stat(self._path)
+        except OSError:
+            return files, children, mtimes
+        pending = [("", self._path, st, frozenset())]
+        while pending:
+            rel, path, st, parents = pending.pop()
+            # (device, inode) of this directory and its parents, to avoid symlink loops
+            parents = parents | {(st.st_dev, st.st_ino)}
+            mtimes[path] = st.st_mtime_ns
+            prefix = rel + os.sep if rel else ""
+            dir_files = []
+            dir_dirs = []
+            try:
+                with os.scandir(path) as it:
+                    entries = list(it)
+            except OSError:
+                entries = []
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    dir_dirs.append(entry.name)
+                    # symlinked directories are not descended into unless follow_links is set
+                    descend = self._follow_links or not entry.is_symlink()
+                    if descend:
+                        try:
+                            est = entry.stat()
+                            descend = (est.st_dev, est.st_ino) not in parents
+                        except OSError:
+                            descend = False
+                    if descend:
+                        pending.append((prefix + entry.name, entry.path, est, parents))
+                    else:
+                        children[prefix + entry.name] = ([], [])
+                else:
+                    dir_files.append(entry.name)
+                    files.add(prefix + entry.name)
+            children[rel] = (dir_files, dir_dirs)
+        return files, children, mtimes
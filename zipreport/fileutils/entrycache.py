@@ -0,0 +1,120 @@
+import threading
+from collections import OrderedDict
+
+
+class EntryCache:
+    """
+    ZipFs decompressed entry cache
+    Keeps the most recently used entries, up to a total size in bytes
+    """
+
+    def __init__(self, max_size: int):
+        """
+        Constructor
+        :param max_size: maximum total size of cached entries, in bytes
+        """
+        self._max_size = max_size
+        self._size = 0
+        self._entries = OrderedDict()
+        # invalidation counters, so entries read before an invalidation are not stored afterwards
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: str, count_miss: bool = True):
+        """
+        Retrieve an entry
+        :param name: entry name
+        :param count_miss: if False, a missing entry is not counted as a cache miss
+        :return: bytes or None
+        """
+        with self._lock:
+            data = self._entries.get(name, None)
+            if data is None:
+                if count_miss:
+                    self.misses += 1
+                return None
+            self._entries.move_to_end(name)
+            self.hits += 1
+            return data
+
+    def generation(self, name: str) -> tuple:
+        """
+        Retrieve the invalidation generation of an entry
+        Must be called before reading the entry contents to store with put()
+        :param name: entry name
+        :return: tuple
+        """
+        with self._lock:
+            return self._epoch, self._generations.get(name, 0)
+
+    def put(self, name: str, data: bytes, generation: tuple = None):
+        """
+        Store an entry, evicting the least recently used ones if necessary
+        Entries larger than max_size are not stored, nor entries invalidated after generation was retrieved
+        :param name: entry name
+        :param data: entry contents
+        :param generation: optional generation of the entry when its contents were read (see generation())
+        :return:
+        """
+        size = len(data)
+        if size > self._max_size:
+            return
+        with self._lock:
+            if generation is not None and generation != (
+                self._epoch,
+                self._generations.get(name, 0),
+            ):
+                # contents are stale
+                return
+            old = self._entries.pop(name, None)
+            if old is not None:
+                self._size -= len(old)
+            while self._size + size > self._max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+            self._entries[name] = data
+            self._size += size
+
+    def invalidate(self, name: str):
+        """
+        Remove an entry
+        :param name: entry name
+        :return:
+        """
+        with self._lock:
+            self._generations[name] = self._generations.get(name, 0) + 1
+            old = self._entries.pop(name, None)
+            if old is not None:
+                self._size -= len(old)
+
+    def clear(self):
+        """
+        Remove all entries and reset counters
+        :return:
+        """
+        with self._lock:
+            self._entries.clear()
+            self._epoch += 1
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def size(self) -> int:
+        """
+        Total size of cached entries
+        :return: size in bytes
+        """
+        return self._size
+
+    def max_size(self) -> int:
+        """
+        Maximum total size of cached entries
+        :return: size in bytes
+        """
+        return self._max_size
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -14,6 +14,22 @@ class FsInterface:
         """
         pass
 
+    def open_stream(self, name: str):
+        """
+        Open file for reading
+        :param name:
+        :return: file-like object
+        """
+        pass
+
+    def get_bytes(self, name: str) -> bytes:
+        """
+        Read file contents
+        :param name:
+        :return: bytes
+        """
+        pass
+
     def add(self, name: str, content):
         """
         Create file
@@ -23,6 +39,23 @@ class FsInterface:
         """
         pass
 
+    def replace(self, name: str, content):
+        """
+        Create or overwrite file
+        :param name:
+        :param content:
+        :return:
+        """
+        pass
+
+    def remove(self, name: str):
+        """
+        Remove file
+        :param name:
+        :return:
+        """
+        pass
+
     def mkdir(self, name: str):
         """
         Make directory
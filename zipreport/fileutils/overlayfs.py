@@ -0,0 +1,297 @@
+import io
+
+from zipreport.fileutils.backend.compression import CompressionPolicy
+from zipreport.fileutils.backend.zip import InMemoryZip
+from .interface import FsError, FsInterface
+from .zipfs import ZipFs, ZipStats
+
+
+class OverlayFs(FsInterface):
+    """
+    Writable in-memory layer on top of a read-only FsInterface (typically a DiskFs with a report template)
+    New files are written to a private ZipFs; reads fall through to the base FsInterface. The base is never modified;
+    removed base files are hidden by tombstones, as well as base directories whose files were all removed.
+    Use pack() to assemble both layers into a single zip file.
+    """
+
+    def __init__(self, base: FsInterface, overlay: ZipFs = None):
+        """
+        Constructor
+        :param base: read-only FsInterface
+        :param overlay: optional ZipFs to use as writable layer
+        """
+        self._sep = "/"
+        self._base = base
+        self._overlay = overlay if overlay is not None else ZipFs(InMemoryZip())
+        # names of removed base files
+        self._deleted = set()
+
+    def get(self, name: str) -> io.BytesIO:
+        """
+        Read a file
+        :param name: file path
+        :return: io.BytesIO
+        """
+        return io.BytesIO(self.get_bytes(name))
+
+    def open_stream(self, name: str):
+        """
+        Open a file for reading
+        The caller is responsible for closing the returned object
+        :param name: file path
+        :return: file-like object
+        """
+        return self._layer(name).open_stream(name)
+
+    def get_bytes(self, name: str) -> bytes:
+        """
+        Read the contents of a file
+        :param name: file path
+        :return: bytes
+        """
+        return self._layer(name).get_bytes(name)
+
+    def add(self, name: str, content):
+        """
+        Add a file to the overlay
+        :param name: filename to create
+        :param content: file contents
+        :return:
+        """
+        if self._base_file_exists(name):
+            raise FsError("File'{}' already exists".format(self._clean_path(name)))
+        self._overlay.add(name, content)
+
+    def add_dedup(self, name: str, content) -> str:
+        """
+        Add a file to the overlay, reusing an existing overlay file with the same contents if possible
+        :param name: filename to create
+        :param content: file contents
+        :return: path of the stored file
+        """
+        if self._base_file_exists(name):
+            raise FsError("File'{}' already exists".format(self._clean_path(name)))
+        return self._overlay.add_dedup(name, content)
+
+    def replace(self, name: str, content):
+        """
+        Add a file to the overlay, replacing it if it already exists in either layer
+        :param name: filename to create or replace
+        :param content: file contents
+        :return:
+        """
+        self._overlay.replace(name, content)
+
+    def remove(self, name: str):
+        """
+        Remove a file
+        Base files are hidden, and the base FsInterface is left untouched
+        :param name: filename to remove
+        :return:
+        """
+        found = False
+        if self._overlay.exists(name) and not self._overlay.is_dir(name):
+            self._overlay.remove(name)
+            found = True
+        if self._base_file_exists(name):
+            self._deleted.add(self._clean_path(name))
+            found = True
+        if not found:
+            raise FsError("File '{}' does not exist".format(self._clean_path(name)))
+
+    def mkdir(self, name: str):
+        raise FsError("OverlayFs does not support creation of explicit directories")
+
+    def exists(self, path: str) -> bool:
+        """
+        Check if a given path (file or dir) exists
+        :param path:
+        :return:
+        """
+        if self._overlay.exists(path):
+            return True
+        if self._clean_path(path) in self._deleted:
+            return False
+        if not self._base.exists(path):
+            return False
+        return not self._base.is_dir(path) or self._base_dir_visible(path)
+
+    def is_dir(self, path: str) -> bool:
+        """
+        Check if path is a dir
+        :param path:
+        :return:
+        """
+        if self._overlay.is_dir(path):
+            return True
+        return self._base.is_dir(path) and self._base_dir_visible(path)
+
+    def list_dirs(self, path: str) -> list:
+        """
+        List dirs on a given path
+        :param path:
+        :return:
+        """
+        prefix = self._clean_path(path).rstrip(self._sep)
+        if prefix != "":
+            prefix = prefix + self._sep
+        result = [
+            name
+            for name in self._base_list(self._base.list_dirs, path)
+            if self._base_dir_visible(prefix + name)
+        ]
+        result.extend(self._overlay.list_dirs(path))
+        return list(dict.fromkeys(result))
+
+    def list_files(self, path: str) -> list:
+        """
+        List files on a given path
+        :param path:
+        :return:
+        """
+        prefix = self._clean_path(path).rstrip(self._sep)
+        if prefix != "":
+            prefix = prefix + self._sep
+        result = [
+            name
+            for name in self._base_list(self._base.list_files, path)
+            if prefix + name not in self._deleted
+        ]
+        result.extend(self._overlay.list_files(path))
+        return list(dict.fromkeys(result))
+
+    def list(self, path: str) -> list:
+        """
+        List all contents (files and dirs) on the specified path and subpaths
+        directories are listed with trailing slash (/)
+        :param path: root path to start listing
+        :return: list
+        """
+        prefix = self._clean_path(path).rstrip(self._sep)
+        if prefix != "":
+            prefix = prefix + self._sep
+        result = []
+        for name in self._base_list(self._base.list, path):
+            if name.endswith(("/", "\\")):
+                if self._base_dir_visible(prefix + name):
+                    result.append(name)
+            elif prefix + name.replace("\\", self._sep) not in self._deleted:
+                result.append(name)
+        result.extend(self._overlay.list(path))
+        return list(dict.fromkeys(result))
+
+    def get_backend(self) -> any:
+        """
+        Retrieve base FsInterface
+        :return: FsInterface
+        """
+        return self._base
+
+    def get_overlay(self) -> ZipFs:
+        """
+        Retrieve writable layer
+        :return: ZipFs
+        """
+        return self._overlay
+
+    def stats(self, top: int = 5) -> ZipStats:
+        """
+        Compute size information for the writable layer
+        Files from the base FsInterface are not accounted for
+        :param top: number of largest files to include
+        :return: ZipStats
+        """
+        return self._overlay.stats(top)
+
+    def fork(self):
+        """
+        Create a copy-on-write OverlayFs sharing the contents of this one
+        Forking freezes this OverlayFs - no files can be added to it afterwards
+        :return: OverlayFs
+        """
+        result = OverlayFs(self._base, self._overlay.fork())
+        result._deleted = set(self._deleted)
+        return result
+
+    def pack(self, compression: CompressionPolicy = None) -> ZipFs:
+        """
+        Assemble the contents of both layers into a new ZipFs
+        Base files are compressed; overlay files are copied in compressed form
+        :param compression: optional compression policy for base files
+        :return: ZipFs
+        """
+        zip = InMemoryZip(compression=compression)
+        overlay = self._overlay.get_backend()
+        overlay_names = set(overlay.namelist())
+        for name in self._base_list(self._base.list, ""):
+            name = name.replace("\\", self._sep)
+            if (
+                name.endswith(self._sep)
+                or name in overlay_names
+                or name in self._deleted
+            ):
+                continue
+            zip.writestr(name, self._base.get_bytes(name))
+        for name in overlay.namelist():
+            zip.write_raw(*overlay.read_raw(name))
+        return ZipFs(zip)
+
+    def _layer(self, name: str) -> FsInterface:
+        """
+        Find the layer holding a given file
+        :param name: file path
+        :return: FsInterface
+        """
+        if self._overlay.exists(name) or self._clean_path(name) in self._deleted:
+            return self._overlay
+        return self._base
+
+    def _base_file_exists(self, name: str) -> bool:
+        """
+        Check if a file exists in the base FsInterface, and was not removed
+        :param name: file path
+        :return: bool
+        """
+        if self._clean_path(name) in self._deleted:
+            return False
+        return self._base.exists(name) and not self._base.is_dir(name)
+
+    def _base_dir_visible(self, path: str) -> bool:
+        """
+        Check if a base directory is visible
+        Directories holding files are hidden once all of them are removed; empty directories are always visible
+        :param path: directory path
+        :return: bool
+        """
+        prefix = self._clean_path(path).rstrip(self._sep)
+        if prefix == "":
+            return True
+        prefix = prefix + self._sep
+        if not any(name.startswith(prefix) for name in self._deleted):
+            return True
+        files = [
+            name.replace("\\", self._sep)
+            for name in self._base_list(self._base.list, path)
+            if not name.endswith(("/", "\\"))
+        ]
+        return len(files) == 0 or any(prefix + name not in self._deleted for name in files)
+
+    def _base_list(self, method, path: str) -> list:
+        """
+        Call a list method on the base FsInterface, ignoring invalid paths
+        :param method: list method
+        :param path: path to list
+        :return: list
+        """
+        try:
+            return method(path)
+        except FsError:
+            return []
+
+    def _clean_path(self, path) -> str:
+        """
+        Remove self._sep from starting of path, if exists
+        :param path:
+        :return:
+        """
+        return str(path).replace("\\", self._sep).lstrip(self._sep)
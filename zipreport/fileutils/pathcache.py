@@ -1,30 +1,75 @@
-from pathlib import Path
+import threading
+from bisect import insort
+from typing import Callable
 
 
 class PathCache:
     """
     ZipFs content cache
+    Paths are kept in a flat index - a set of file paths, a set of directory paths and a sorted list of children per
+    directory - so lookups don't depend on the path depth or on the number of entries
     """
 
-    def __init__(self, trailing="/"):
+    def __init__(self, trailing="/", parent=None, source: Callable = None):
+        """
+        Constructor
+        :param trailing: directory separator
+        :param parent: optional read-only PathCache to layer on top of (see fork())
+        :param source: optional callable returning a list of paths to add; it is only called when the cache is first
+        used
+        """
         self._sep = trailing
-        self._cache = {}
+        self._parent = parent
+        self._source = source
+        self._source_lock = threading.Lock()
+        self._files = set()
+        # the root directory always exists
+        self._dirs = {""}
+        # directory path -> ([file names], [dir names]), both sorted
+        self._children = {"": ([], [])}
+
+    def fork(self):
+        """
+        Create a new PathCache on top of this one
+        Items added to the fork are not visible in this PathCache, and this PathCache should not be modified afterwards
+        :return: PathCache
+        """
+        self._build()
+        return PathCache(self._sep, parent=self)
 
     def add(self, item: str):
         """
         Add a file to the path cache
+        Items ending with the directory separator are added as directories
         :param item:
         :return:
         """
-        item = Path(item)
-        root = self._cache
-        parts = list(item.parts)
-        file = parts.pop()
-        for p in parts:
-            if not p in root.keys():
-                root[p] = {}
-            root = root[p]
-        root[file] = None
+        self._build()
+        self._add(item)
+
+    def remove(self, item: str):
+        """
+        Remove a file from the path cache
+        Directories left empty are removed as well
+        :param item:
+        :return:
+        """
+        self._build()
+        item = self._clean(item)
+        if self._parent is not None and self._parent.file_exists(item):
+            # items from the parent cannot be masked; copy them to this cache instead
+            self._flatten()
+        if item not in self._files:
+            return
+        self._files.remove(item)
+        parent, name = self._split(item)
+        self._children[parent][0].remove(name)
+        while parent != "" and self._children[parent] == ([], []):
+            path = parent
+            parent, name = self._split(path)
+            self._dirs.remove(path)
+            del self._children[path]
+            self._children[parent][1].remove(name)
 
     def path_exists(self, path: str) -> bool:
         """
@@ -32,14 +77,11 @@ class PathCache:
         :param path:
         :return:
         """
-        path = Path(path)
-        root = self._cache
-        for p in path.parts:
-            if p not in root.keys():
-                return False
-            root = root[p]
-
-        return type(root) is dict
+        self._build()
+        path = self._clean(path)
+        return path in self._dirs or (
+            self._parent is not None and self._parent.path_exists(path)
+        )
 
     def file_exists(self, path: str) -> bool:
         """
@@ -47,13 +89,11 @@ class PathCache:
         :param path:
         :return:
         """
-        path = Path(path)
-        root = self._cache
-        for p in path.parts:
-            if p not in root.keys():
-                return False
-            root = root[p]
-        return root is None
+        self._build()
+        path = self._clean(path)
+        return path in self._files or (
+            self._parent is not None and self._parent.file_exists(path)
+        )
 
     def list_files(self, path: str) -> list:
         """
@@ -61,22 +101,16 @@ class PathCache:
         :param path:
         :return:
         """
-        result = []
-        root = self._cache
-        path = Path(path)
-        for p in path.parts:
-            if p in root.keys():
-                root = root[p]
-            else:
-                # invalid path
-                return result
-        if root is None:
-            # its a file, not a dir
+        self._build()
+        path = self._clean(path)
+        result = self._parent.list_files(path) if self._parent is not None else []
+        children = self._children.get(path, None)
+        if children is None:
+            # invalid path or not a dir
             return result
-        for k in root.keys():
-            if root[k] is None:
-                result.append(k)
-        return result
+        if len(result) == 0:
+            return list(children[0])
+        return list(dict.fromkeys(result + children[0]))
 
     def list_dirs(self, path: str) -> list:
         """
@@ -84,22 +118,15 @@ class PathCache:
         :param path:
         :return:
         """
-        result = []
-        root = self._cache
-        path = Path(path)
-        for p in path.parts:
-            if p in root.keys():
-                root = root[p]
-            else:
-                # invalid path
-                return result
-        if root is None:
-            # its a file, not a dir
+        self._build()
+        path = self._clean(path)
+        result = self._parent.list_dirs(path) if self._parent is not None else []
+        children = self._children.get(path, None)
+        if children is None:
+            # invalid path or not a dir
             return result
-        for k in root.keys():
-            if root[k] is not None:
-                result.append(k + self._sep)
-        return result
+        result.extend([name + self._sep for name in children[1]])
+        return list(dict.fromkeys(result))
 
     def list(self, path) -> list:
         """
@@ -107,42 +134,137 @@ class PathCache:
         :param path:
         :return:
         """
-        result = []
-        root = self._cache
-        path = Path(path)
-        for p in path.parts:
-            if p in root.keys():
-                root = root[p]
-            else:
-                # invalid path
-                return result
-        if root is None:
-            # its a file, not a dir
+        self._build()
+        path = self._clean(path)
+        result = self._parent.list(path) if self._parent is not None else []
+        if path not in self._children:
+            # invalid path or not a dir
             return result
+        self._path_transversal(path, "", result)
+        return list(dict.fromkeys(result))
 
-        return self._path_transversal(root, Path(""))
-
-    def _path_transversal(self, root: dict, path: Path) -> list:
+    def _path_transversal(self, path: str, prefix: str, result: list):
         """
         Internal path transversal routine
-        :param root:
-        :param path:
+        :param path: directory path
+        :param prefix: prefix for names in result, relative to the listing root
+        :param result: list to append names to
         :return:
         """
-        result = []
-
-        for k, v in root.items():
-            if root[k] is None:
-                result.append(str(path / k))
-            else:
-                dir = path / k
-                result.append(str(dir) + self._sep)
-                result.extend(self._path_transversal(root[k], dir))
-        return result
+        files, dirs = self._children[path]
+        for name in files:
+            result.append(prefix + name)
+        for name in dirs:
+            result.append(prefix + name + self._sep)
+            self._path_transversal(
+                self._join(path, name), prefix + name + self._sep, result
+            )
 
     def clear(self):
         """
         Clear path cache
         :return:
         """
-        self._cache = {}
+        self._source = None
+        self._files = set()
+        self._dirs = {""}
+        self._children = {"": ([], [])}
+
+    def _build(self):
+        """
+        Populate the index from source, if not done yet
+        :return:
+        """
+        if self._source is not None:
+            with self._source_lock:
+                # another thread may have built the index while waiting
+                if self._source is not None:
+                    for item in self._source():
+                        self._add(item)
+                    self._source = None
+
+    def _flatten(self):
+        """
+        Merge the contents of the parent PathCache into this one, and detach it
+        :return:
+        """
+        parent = self._parent
+        self._parent = None
+        for item in parent.list(""):
+            self._add(item)
+
+    def _add(self, item: str):
+        """
+        Add an item to the index
+        :param item:
+        :return:
+        """
+        is_dir = str(item).endswith(self._sep)
+        item = self._clean(item)
+        if item == "":
+            return
+        if is_dir:
+            self._add_dir(item)
+            return
+        if item in self._files:
+            return
+        parent, name = self._split(item)
+        self._add_dir(parent)
+        self._files.add(item)
+        insort(self._children[parent][0], name)
+
+    def _add_dir(self, path: str):
+        """
+        Add a directory and all missing parent directories to the index
+        :param path: clean directory path
+        :return:
+        """
+        if path in self._dirs:
+            return
+        parent, name = self._split(path)
+        self._add_dir(parent)
+        self._dirs.add(path)
+        self._children[path] = ([], [])
+        insort(self._children[parent][1], name)
+
+    def _clean(self, path) -> str:
+        """
+        Normalize a path: remove empty and "." components, as well as leading and trailing separators
+        :param path:
+        :return: str
+        """
+        path = str(path)
+        sep = self._sep
+        if (
+            path.startswith(sep)
+            or path.endswith(sep)
+            or (sep + sep) in path
+            or path == "."
+            or path.startswith("." + sep)
+            or path.endswith(sep + ".")
+            or (sep + "." + sep) in path
+        ):
+            return sep.join([p for p in path.split(sep) if p not in ("", ".")])
+        return path
+
+    def _split(self, path: str) -> tuple:
+        """
+        Split a clean path into (parent, name)
+        :param path:
+        :return: tuple
+        """
+        idx = path.rfind(self._sep)
+        if idx < 0:
+            return "", path
+        return path[:idx], path[idx + 1 :]
+
+    def _join(self, path: str, name: str) -> str:
+        """
+        Join a clean directory path and a name
+        :param path:
+        :param name:
+        :return: str
+        """
+        if path == "":
+            return name
+        return path + self._sep + name
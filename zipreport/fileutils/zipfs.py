@@ -1,27 +1,77 @@
+import collections
+import hashlib
 import io
+import posixpath
+import threading
 from pathlib import Path
-from zipfile import ZIP_DEFLATED
 
+from zipreport.fileutils.backend.compression import CompressionPolicy
+from zipreport.fileutils.backend.overlay import OverlayZip
 from zipreport.fileutils.backend.zip import InMemoryZip
+from .entrycache import EntryCache
 from .interface import FsError, FsInterface
 from .pathcache import PathCache
 
+# Size information returned by ZipFs.stats()
+# entries:int; compressed_size:int; uncompressed_size:int; largest:list of (name, size, compressed_size);
+# added_size:int, uncompressed bytes written by add()/replace(); garbage_size:int; buffer_size:int; peak_buffer_size:int
+ZipStats = collections.namedtuple(
+    "ZipStats",
+    [
+        "entries",
+        "compressed_size",
+        "uncompressed_size",
+        "largest",
+        "added_size",
+        "garbage_size",
+        "buffer_size",
+        "peak_buffer_size",
+    ],
+)
+
 
 class ZipFs(FsInterface):
     """
     Implement FsInterface operations on zipfiles
-    Note: the list_*() operations and is_dir() can be quite slow, due to implementation restrictions
+    Paths are indexed in a PathCache, built on first use; the list_*() operations, is_dir() and exists() don't depend
+    on the number of entries in the zip file
     """
 
-    def __init__(self, zip: InMemoryZip):
+    def __init__(
+        self,
+        zip: InMemoryZip,
+        cache: PathCache = None,
+        compression: CompressionPolicy = None,
+        dedupe: bool = False,
+        entry_cache_size: int = 0,
+    ):
         """
         Constructor
         :param zip: Zip Backend
+        :param cache: optional pre-built PathCache for the backend contents
+        :param compression: optional compression policy for new files
+        :param dedupe: if True, add_dedup() reuses existing files with the same contents; otherwise, it behaves as add()
+        :param entry_cache_size: maximum size, in bytes, of decompressed files to keep in memory; 0 disables caching
         """
         self._sep = "/"
         self._zip = zip
-        self._cache = PathCache(self._sep)
-        self._build_cache()
+        self._dedupe = dedupe
+        self._entry_cache = None
+        # uncompressed size of files written to this ZipFs
+        self._added_size = 0
+        # serializes add operations
+        self._write_lock = threading.RLock()
+        if entry_cache_size > 0:
+            self._entry_cache = EntryCache(entry_cache_size)
+        # content digest -> file path, for files added via add_dedup()
+        self._digests = {}
+        if compression is not None:
+            zip.set_compression(compression)
+        if cache is None:
+            # path cache is built on first use
+            self._cache = PathCache(self._sep, source=self._zip.namelist)
+        else:
+            self._cache = cache
 
     def get(self, name: str) -> io.BytesIO:
         """
@@ -29,39 +79,126 @@ class ZipFs(FsInterface):
         :param name: file path
         :return: file stream or None
         """
-        zipfile = self._zip.zip()
+        return io.BytesIO(self.get_bytes(name))
+
+    def open_stream(self, name: str):
+        """
+        Open a file for reading
+        Contents are decompressed incrementally, as the returned object is read; the caller is responsible for
+        closing it
+        :param name: file path
+        :return: file-like object
+        """
+        name = self._clean_path(name)
+        if self._entry_cache is not None:
+            # streamed files are not cached, so a missing entry is not a cache miss
+            data = self._entry_cache.get(name, count_miss=False)
+            if data is not None:
+                return io.BytesIO(data)
+        try:
+            return self._zip.open(name)
+        except (KeyError, ValueError):
+            raise FsError(
+                "Error reading file '{}'. Maybe it doesn't exist?".format(name)
+            )
+
+    def get_bytes(self, name: str) -> bytes:
+        """
+        Read the contents of a file
+        :param name: file path
+        :return: bytes
+        """
+        name = self._clean_path(name)
+        generation = None
+        if self._entry_cache is not None:
+            data = self._entry_cache.get(name)
+            if data is not None:
+                return data
+            # contents replaced while reading are not cached
+            generation = self._entry_cache.generation(name)
         try:
-            info = zipfile.getinfo(self._clean_path(name))
-            with zipfile.open(info) as zf:
-                return io.BytesIO(zf.read())
-        except ValueError:
+            data = self._zip.read(name)
+        except (KeyError, ValueError):
             raise FsError(
                 "Error reading file '{}'. Maybe it doesn't exist?".format(name)
             )
+        if self._entry_cache is not None:
+            self._entry_cache.put(name, data, generation)
+        return data
 
     def add(self, name: str, content):
         """
         Add a file
+        Safe to call from several threads; add operations are serialized, but don't block readers
         :param name: filename to create
         :param content: file contents
         :return:
         """
-        zfile = self._zip.zip()
         name = self._clean_path(name)
-        # convert BytesIO to bytes
+        with self._write_lock:
+            try:
+                self._zip.getinfo(name)
+                raise FsError("File'{}' already exists".format(name))
+            except KeyError:
+                pass
+            self._write(name, content)
+
+    def replace(self, name: str, content):
+        """
+        Add a file, replacing it if it already exists
+        Replaced contents are discarded when the zip file is exported
+        :param name: filename to create or replace
+        :param content: file contents
+        :return:
+        """
+        name = self._clean_path(name)
+        with self._write_lock:
+            self._write(name, content)
+
+    def remove(self, name: str):
+        """
+        Remove a file
+        Removed contents are discarded when the zip file is exported
+        :param name: filename to remove
+        :return:
+        """
+        name = self._clean_path(name)
+        with self._write_lock:
+            try:
+                self._zip.remove(name)
+            except KeyError:
+                raise FsError("File '{}' does not exist".format(name))
+            except Exception as e:
+                raise FsError("Error removing '{}' from Zip: {}".format(name, e))
+            self._cache.remove(name)
+            self._forget(name)
+
+    def add_dedup(self, name: str, content) -> str:
+        """
+        Add a file, unless deduplication is enabled and a file with the same contents and extension was already added
+        via add_dedup()
+        Useful for generated files with random names (eg. images); callers must use the returned path
+        :param name: filename to create
+        :param content: file contents
+        :return: path of the stored file; either name or the path of an identical file
+        """
+        name = self._clean_path(name)
         if isinstance(content, io.BytesIO):
-            content.seek(0)
-            content = content.read()
-        try:
-            zfile.getinfo(name)
-            raise FsError("File'{}' already exists".format(name))
-        except KeyError:
-            pass
-        try:
-            zfile.writestr(name, content, compress_type=ZIP_DEFLATED)
-            self._cache.add(name)
-        except Exception as e:
-            raise FsError("Error adding '{}' to  Zip: {}".format(name, e))
+            content = content.getvalue()
+        elif isinstance(content, str):
+            content = content.encode("utf-8")
+        if not self._dedupe:
+            self.add(name, content)
+            return name
+
+        key = (hashlib.sha256(content).digest(), posixpath.splitext(name)[1])
+        with self._write_lock:
+            existing = self._digests.get(key, None)
+            if existing is not None:
+                return existing
+            self.add(name, content)
+            self._digests[key] = name
+        return name
 
     def mkdir(self, name: str):
         raise FsError("ZipFs does not support creation of explicit directories")
@@ -114,14 +251,107 @@ class ZipFs(FsInterface):
     def get_backend(self) -> any:
         return self._zip
 
-    def _build_cache(self):
+    def set_compression(self, compression: CompressionPolicy):
+        """
+        Set compression policy for new files
+        :param compression: CompressionPolicy
+        :return:
+        """
+        self._zip.set_compression(compression)
+
+    def set_dedupe(self, dedupe: bool):
+        """
+        Enable or disable content deduplication in add_dedup()
+        :param dedupe: if True, add_dedup() reuses existing files with the same contents
+        :return:
+        """
+        self._dedupe = dedupe
+
+    def is_dedupe(self) -> bool:
+        """
+        Check if content deduplication is enabled
+        :return: bool
+        """
+        return self._dedupe
+
+    def stats(self, top: int = 5) -> ZipStats:
+        """
+        Compute size information from the zip index, without reading any file
+        Buffer sizes refer to the backend buffer; for forks, the base contents are shared and not accounted for
+        :param top: number of largest files to include
+        :return: ZipStats
+        """
+        infos = self._zip.infolist()
+        largest = sorted(infos, key=lambda i: i.file_size, reverse=True)[:top]
+        backend = self._zip
+        return ZipStats(
+            entries=len(infos),
+            compressed_size=sum(i.compress_size for i in infos),
+            uncompressed_size=sum(i.file_size for i in infos),
+            largest=[(i.filename, i.file_size, i.compress_size) for i in largest],
+            added_size=self._added_size,
+            garbage_size=backend.get_garbage_size(),
+            buffer_size=backend.get_buffer_size(),
+            peak_buffer_size=backend.get_peak_buffer_size(),
+        )
+
+    def get_entry_cache(self) -> EntryCache:
+        """
+        Get decompressed file cache
+        :return: EntryCache or None if caching is disabled
+        """
+        return self._entry_cache
+
+    def fork(self):
+        """
+        Create a copy-on-write ZipFs sharing the contents of this one
+        Existing contents are shared read-only; files added to the fork are kept in a private in-memory overlay.
+        Forking freezes this ZipFs - no files can be added to it afterwards
+        :return: ZipFs
+        """
+        self._zip.freeze()
+        result = ZipFs(
+            OverlayZip(self._zip),
+            cache=self._cache.fork(),
+            dedupe=self._dedupe,
+            entry_cache_size=(
+                self._entry_cache.max_size() if self._entry_cache is not None else 0
+            ),
+        )
+        result._digests = dict(self._digests)
+        return result
+
+    def _write(self, name: str, content):
+        """
+        Write a file to the backend, and update caches
+        :param name: clean file path
+        :param content: file contents
+        :return:
+        """
+        # convert BytesIO and str to bytes
+        if isinstance(content, io.BytesIO):
+            content.seek(0)
+            content = content.read()
+        elif isinstance(content, str):
+            content = content.encode("utf-8")
+        try:
+            self._zip.writestr(name, content)
+            self._cache.add(name)
+            self._forget(name)
+            self._added_size += len(content)
+        except Exception as e:
+            raise FsError("Error adding '{}' to  Zip: {}".format(name, e))
+
+    def _forget(self, name: str):
         """
-        Build path cache
+        Discard cached information about a modified file
+        :param name: clean file path
         :return:
         """
-        zipfile = self._zip.zip()
-        for item in zipfile.namelist():
-            self._cache.add(item)
+        if self._entry_cache is not None:
+            self._entry_cache.invalidate(name)
+        if name in self._digests.values():
+            self._digests = {k: v for k, v in self._digests.items() if v != name}
 
     def _clean_path(self, path):
         """
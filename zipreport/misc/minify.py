@@ -0,0 +1,477 @@
+import posixpath
+import re
+
+# Jinja delimiters
+JINJA_DELIMITERS = {"{{": "}}", "{%": "%}", "{#": "#}"}
+
+_re_jinja_raw = re.compile(r"\{%-?\s*raw\s*-?%\}")
+_re_jinja_endraw = re.compile(r"\{%-?\s*endraw\s*-?%\}")
+_re_html_element = re.compile(r"<(pre|textarea|script|style)\b", re.I)
+_re_html_tag = re.compile(r"</?[a-z]", re.I)
+_re_html_text = re.compile(r"[^{<\s]+")
+_re_whitespace = re.compile(r"\s+")
+_re_js_script_type = re.compile(
+    r"""\btype\s*=\s*["']?(text/javascript|application/javascript|module)["'\s>]""",
+    re.I,
+)
+
+# characters that do not need whitespace before or after them in CSS
+_css_no_space_before = "{};,>"
+_css_no_space_after = "{};,>:"
+
+# characters after which a JS token starting with / is a regular expression literal
+_js_regex_prefix = "(,=:[!&|?{};+-*%<>~^"
+_js_regex_keywords = {
+    "await",
+    "case",
+    "delete",
+    "do",
+    "else",
+    "in",
+    "instanceof",
+    "new",
+    "return",
+    "throw",
+    "typeof",
+    "void",
+    "yield",
+}
+# characters after which a JS newline can be removed without side effects
+_js_newline_safe = "{;,([=:"
+
+
+def has_jinja(text: str) -> bool:
+    """
+    Check if text contains Jinja delimiters
+    :param text: text to check
+    :return: bool
+    """
+    return any(delimiter in text for delimiter in JINJA_DELIMITERS)
+
+
+def minify_css(text: str) -> str:
+    """
+    Remove comments and superfluous whitespace from a CSS stylesheet
+    Comments starting with /*! are kept
+    :param text: css source
+    :return: str
+    """
+    out = []
+    space = False
+    i = 0
+    size = len(text)
+    while i < size:
+        c = text[i]
+        if c.isspace():
+            space = True
+            i += 1
+            continue
+        if text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            if end < 0:
+                raise ValueError("Unterminated comment")
+            if text.startswith("/*!", i):
+                out.append(text[i : end + 2])
+            space = True
+            i = end + 2
+            continue
+
+        if c in "\"'":
+            end = _skip_string(text, i)
+            token = text[i:end]
+        else:
+            end = i + 1
+            token = c
+        if c == "}" and out and out[-1] == ";":
+            out.pop()
+        if (
+            space
+            and out
+            and out[-1][-1] not in _css_no_space_after
+            and c not in _css_no_space_before
+        ):
+            out.append(" ")
+        out.append(token)
+        space = False
+        i = end
+    return "".join(out)
+
+
+def minify_js(text: str) -> str:
+    """
+    Remove comments and superfluous whitespace from a JavaScript source
+    Newlines are kept where they may terminate a statement, so automatic semicolon insertion is not affected
+    :param text: javascript source
+    :return: str
+    """
+    out = []
+    # pending whitespace: None, " " or "\n"
+    space = None
+    last = None
+    i = 0
+    size = len(text)
+    while i < size:
+        c = text[i]
+        if c.isspace():
+            if c == "\n" or space == "\n":
+                space = "\n"
+            else:
+                space = " "
+            i += 1
+            continue
+        if text.startswith("//", i):
+            end = text.find("\n", i)
+            i = size if end < 0 else end
+            continue
+        if text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            if end < 0:
+                raise ValueError("Unterminated comment")
+            if "\n" in text[i:end] or space == "\n":
+                space = "\n"
+            elif space is None:
+                space = " "
+            i = end + 2
+            continue
+
+        if c in "\"'`":
+            end = _skip_string(text, i)
+        elif c == "/" and (
+            last is None or last[-1] in _js_regex_prefix or last in _js_regex_keywords
+        ):
+            end = _skip_regex(text, i)
+        elif _is_ident(c):
+            end = i + 1
+            while end < size and _is_ident(text[end]):
+                end += 1
+        else:
+            end = i + 1
+        token = text[i:end]
+
+        if space is not None and out:
+            prev = out[-1][-1]
+            if space == "\n" and prev not in _js_newline_safe:
+                out.append("\n")
+            elif (
+                (_is_ident(prev) and _is_ident(c))
+                or (prev == c and c in "+-/")
+                or (prev.isdigit() and c == ".")
+            ):
+                out.append(" ")
+        out.append(token)
+        last = token
+        space = None
+        i = end
+    return "".join(out)
+
+
+def minify_html(text: str) -> str:
+    """
+    Remove comments and collapse whitespace in an HTML document or Jinja template
+    Jinja tags, expressions and comments are kept as-is, as well as conditional comments, comments with Jinja
+    syntax, quoted attribute values and the contents of <pre> and <textarea> elements; <style> and <script> contents
+    are minified unless they contain Jinja syntax
+    :param text: html source
+    :return: str
+    """
+    out = []
+    lower = text.lower()
+    i = 0
+    size = len(text)
+    while i < size:
+        match = _re_html_text.match(text, i)
+        if match:
+            out.append(match.group(0))
+            i = match.end()
+            continue
+
+        c = text[i]
+        if c.isspace():
+            match = _re_whitespace.match(text, i)
+            space = "\n" if "\n" in match.group(0) else " "
+            # merge with whitespace left by a removed comment
+            if out and out[-1] in (" ", "\n"):
+                out[-1] = "\n" if "\n" in (out[-1], space) else " "
+            else:
+                out.append(space)
+            i = match.end()
+            continue
+
+        delimiter = text[i : i + 2]
+        if delimiter in JINJA_DELIMITERS:
+            match = _re_jinja_raw.match(text, i)
+            if match:
+                match = _re_jinja_endraw.search(text, match.end())
+                if match is None:
+                    raise ValueError("Unterminated raw block")
+                end = match.end()
+            else:
+                end = text.find(JINJA_DELIMITERS[delimiter], i + 2)
+                if end < 0:
+                    raise ValueError("Unterminated Jinja tag")
+                end += 2
+            out.append(text[i:end])
+            i = end
+            continue
+
+        if text.startswith("<!--", i):
+            end = text.find("-->", i + 4)
+            if end < 0:
+                raise ValueError("Unterminated comment")
+            comment = text[i : end + 3]
+            if comment.startswith("<!--[if") or has_jinja(comment):
+                out.append(comment)
+            i = end + 3
+            continue
+
+        match = _re_html_element.match(text, i)
+        if match:
+            tag = match.group(1).lower()
+            start = _skip_html_tag(text, i)
+            end = lower.find("</" + tag, start)
+            if end < 0:
+                raise ValueError("Unterminated <{}> element".format(tag))
+            opening = _minify_html_tag(text[i:start])
+            content = text[start:end]
+            if not has_jinja(content):
+                if tag == "style":
+                    content = minify_css(content)
+                elif tag == "script" and (
+                    "type" not in opening.lower() or _re_js_script_type.search(opening)
+                ):
+                    content = minify_js(content)
+            out.append(opening)
+            out.append(content)
+            i = end
+            continue
+
+        if _re_html_tag.match(text, i):
+            end = _skip_html_tag(text, i)
+            out.append(_minify_html_tag(text[i:end]))
+            i = end
+            continue
+
+        # "{" or "<" not starting a special block
+        out.append(c)
+        i += 1
+    return "".join(out)
+
+
+_minifiers = {
+    ".css": minify_css,
+    ".js": minify_js,
+    ".mjs": minify_js,
+    ".htm": minify_html,
+    ".html": minify_html,
+}
+
+
+def can_minify(name: str) -> bool:
+    """
+    Check if a file can be minified, based on its extension
+    :param name: file name
+    :return: bool
+    """
+    return posixpath.splitext(name)[1].lower() in _minifiers
+
+
+def minify(name: str, content: bytes) -> bytes:
+    """
+    Minify the contents of a HTML, CSS or JavaScript file
+    Files with Jinja syntax (templates, or CSS and JavaScript files included from templates) are not modified, as
+    whitespace may be significant when rendering; other file types, files not encoded in UTF-8 and files that cannot
+    be parsed are returned unmodified
+    :param name: file name
+    :param content: file contents
+    :return: bytes
+    """
+    ext = posixpath.splitext(name)[1].lower()
+    minifier = _minifiers.get(ext, None)
+    if minifier is None:
+        return content
+    try:
+        text = content.decode("utf-8")
+    except UnicodeDecodeError:
+        return content
+    if has_jinja(text):
+        return content
+    try:
+        result = minifier(text).encode("utf-8")
+    except ValueError:
+        return content
+    if len(result) < len(content):
+        return result
+    return content
+
+
+def _is_ident(c: str) -> bool:
+    """
+    Check if a character can be part of a JavaScript identifier or number
+    :param c: character
+    :return: bool
+    """
+    return c.isalnum() or c in "_$\\" or ord(c) > 127
+
+
+def _skip_string(text: str, start: int) -> int:
+    """
+    Find the end of a quoted string or JavaScript template literal
+    :param text: source
+    :param start: position of the opening quote
+    :return: position after the closing quote
+    """
+    quote = text[start]
+    i = start + 1
+    size = len(text)
+    while i < size:
+        c = text[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == quote:
+            return i + 1
+        if quote == "`":
+            if text.startswith("${", i):
+                i = _skip_placeholder(text, i + 2)
+                continue
+        elif c == "\n":
+            break
+        i += 1
+    raise ValueError("Unterminated string")
+
+
+def _skip_html_tag(text: str, start: int) -> int:
+    """
+    Find the end of an HTML tag
+    Quoted attribute values and Jinja syntax may contain ">"
+    :param text: source
+    :param start: position of the opening "<"
+    :return: position after the closing ">"
+    """
+    i = start + 1
+    size = len(text)
+    while i < size:
+        c = text[i]
+        if c == ">":
+            return i + 1
+        if c in "\"'":
+            i = _skip_attribute_value(text, i)
+            continue
+        delimiter = text[i : i + 2]
+        if delimiter in JINJA_DELIMITERS:
+            end = text.find(JINJA_DELIMITERS[delimiter], i + 2)
+            if end < 0:
+                raise ValueError("Unterminated Jinja tag")
+            i = end + 2
+            continue
+        i += 1
+    raise ValueError("Unterminated tag")
+
+
+def _skip_attribute_value(text: str, start: int) -> int:
+    """
+    Find the end of a quoted HTML attribute value
+    Jinja syntax inside the value may contain quotes
+    :param text: source
+    :param start: position of the opening quote
+    :return: position after the closing quote
+    """
+    quote = text[start]
+    i = start + 1
+    size = len(text)
+    while i < size:
+        c = text[i]
+        if c == quote:
+            return i + 1
+        delimiter = text[i : i + 2]
+        if delimiter in JINJA_DELIMITERS:
+            end = text.find(JINJA_DELIMITERS[delimiter], i + 2)
+            if end < 0:
+                raise ValueError("Unterminated Jinja tag")
+            i = end + 2
+            continue
+        i += 1
+    raise ValueError("Unterminated attribute value")
+
+
+def _minify_html_tag(tag: str) -> str:
+    """
+    Collapse whitespace between the attributes of an HTML tag
+    Quoted attribute values and Jinja syntax are kept as-is
+    :param tag: tag source, as found by _skip_html_tag()
+    :return: str
+    """
+    out = []
+    i = 0
+    size = len(tag)
+    while i < size:
+        c = tag[i]
+        if c.isspace():
+            match = _re_whitespace.match(tag, i)
+            out.append("\n" if "\n" in match.group(0) else " ")
+            i = match.end()
+            continue
+        if c in "\"'":
+            end = _skip_attribute_value(tag, i)
+        elif tag[i : i + 2] in JINJA_DELIMITERS:
+            end = tag.find(JINJA_DELIMITERS[tag[i : i + 2]], i + 2) + 2
+        else:
+            end = i + 1
+        out.append(tag[i:end])
+        i = end
+    return "".join(out)
+
+
+def _skip_placeholder(text: str, start: int) -> int:
+    """
+    Find the end of a JavaScript template literal placeholder
+    :param text: source
+    :param start: position after the opening ${
+    :return: position after the closing brace
+    """
+    depth = 1
+    i = start
+    size = len(text)
+    while i < size:
+        c = text[i]
+        if c in "\"'`":
+            i = _skip_string(text, i)
+            continue
+        if c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    raise ValueError("Unterminated template literal")
+
+
+def _skip_regex(text: str, start: int) -> int:
+    """
+    Find the end of a JavaScript regular expression literal, including flags
+    :param text: source
+    :param start: position of the opening slash
+    :return: position after the last flag
+    """
+    i = start + 1
+    size = len(text)
+    in_class = False
+    while i < size:
+        c = text[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == "\n":
+            break
+        if c == "[":
+            in_class = True
+        elif c == "]":
+            in_class = False
+        elif c == "/" and not in_class:
+            i += 1
+            while i < size and _is_ident(text[i]):
+                i += 1
+            return i
+        i += 1
+    raise ValueError("Unterminated regular expression")
@@ -66,7 +66,7 @@ class MIMEProcessor(ProcessorInterface):
         """
         opts = job.get_options()
         rpt = job.get_report()
-        html = str(rpt.get(opts[OPT_MAIN_SCRIPT]).read(), encoding="utf-8")
+        html = str(rpt.get_bytes(opts[OPT_MAIN_SCRIPT]), encoding="utf-8")
 
         mime_msg = EmailMessage()
         parser = ResourceParser()
@@ -85,11 +85,10 @@ class MIMEProcessor(ProcessorInterface):
         # add related resources
         payload = mime_msg.get_payload()[0]
         for cid, fname in resources.items():
-            res = rpt.get(fname)
             ctype, encoding = mimetypes.guess_type(fname)
             if ctype is None or encoding is not None:
                 ctype = "application/octet-stream"
             maintype, subtype = ctype.split("/", 1)
-            payload.add_related(res.read(), maintype, subtype, cid=cid)
+            payload.add_related(rpt.get_bytes(fname), maintype, subtype, cid=cid)
 
         return JobResult(mime_msg, True, "")
@@ -56,7 +56,7 @@ class WeasyPrintProcessor(ProcessorInterface):
 
         rpt = HTML(
             base_url="",
-            string=io.TextIOWrapper(zpt.get(REPORT_FILE_NAME), encoding="utf-8").read(),
+            string=zpt.get_bytes(REPORT_FILE_NAME).decode("utf-8"),
             url_fetcher=f,
         ).write_pdf(None, stylesheets=self._css, font_config=self._fconfig)
         return JobResult(io.BytesIO(rpt), True, "")
@@ -77,6 +77,7 @@ class WeasyPrintProcessor(ProcessorInterface):
             url = url[7:]
 
         if zpt.exists(url):
-            return {"string": zpt.get(url).read()}
+            # WeasyPrint closes file_obj after reading it
+            return {"file_obj": zpt.open_stream(url)}
 
         return default_url_fetcher(fallback)
@@ -1,17 +1,51 @@
+import hashlib
 import json
 import os
+import stat
 import sys
+import tempfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy
 from pathlib import Path
-from typing import Tuple, Union
+from typing import Callable, Tuple, Union
+from zipfile import ZipFile, ZipInfo
 
 from zipreport.fileutils import ZipFs, FsInterface, DiskFs
-from zipreport.fileutils.backend.zip import InMemoryZip
+from zipreport.fileutils.backend.compression import CompressionPolicy
+from zipreport.fileutils.backend.mapped import MappedZip
+from zipreport.fileutils.backend.overlay import OverlayZip
+from zipreport.fileutils.backend.zip import (
+    RAW_CHUNK_SIZE,
+    InMemoryZip,
+    InMemoryZipError,
+    zip_iter_raw,
+    zip_write_raw,
+    zip_write_stream,
+)
+from zipreport.misc.minify import can_minify, minify as minify_file
 from zipreport.report.const import (
     MANIFEST_FILE_NAME,
     ZIPREPORT_FILE_EXTENSION,
     INDEX_FILE_NAME,
     MANIFEST_REQUIRED_FIELDS,
+    BYTECODE_CACHE_PATH,
+    CONTENT_INDEX_FILE_NAME,
+    IGNORE_FILE_NAME,
 )
+from zipreport.report.prune import IgnoreRules, unreferenced_assets
+
+# files larger than this are compressed or copied in chunks when streaming
+STREAM_FILE_SIZE = 16 * 1024 * 1024
+
+# timestamp and attributes of all entries, so identical templates produce identical report files
+ARCHIVE_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+ARCHIVE_FILE_ATTR = (stat.S_IFREG | 0o644) << 16
+
+
+class ReportFileBuilderError(Exception):
+    pass
 
 
 class BuildResult:
@@ -45,14 +79,34 @@ class ReportFileBuilder:
         console=sys.stdout,
         overwrite: bool = False,
         follow_links: bool = False,
+        compression: CompressionPolicy = None,
+        workers: int = 1,
+        incremental: bool = False,
+        minify: bool = False,
+        precompile: bool = False,
+        stream: bool = False,
+        prune: bool = False,
     ) -> BuildResult:
         """
         Assemble a report file from a specific path
+        If incremental is True and the destination exists, entries of unchanged files are copied from the existing
+        report file in compressed form, and only new or modified files are compressed; the size and modification time
+        of the source files are stored in the content index, so the next incremental build only reads modified files
+        If stream is True, entries are written directly to a temporary file that atomically replaces the destination,
+        instead of assembling the report file in memory
+        Files matching the rules in the report .zptignore file are skipped; see build_zipfs() for details on prune
         :param path: report dir path
         :param output_file: destination report file
         :param console: console writer
         :param overwrite: if True, overwrite destination if exists
         :param follow_links: if True, symlinks are followed
+        :param compression: optional compression policy
+        :param workers: number of compression threads
+        :param incremental: if True, update destination if exists
+        :param minify: if True, minify HTML, CSS and JavaScript files
+        :param precompile: if True, store precompiled Jinja templates in the report file
+        :param stream: if True, write entries directly to disk
+        :param prune: if True, skip unreferenced assets
         :return: BuildResult
         """
         status = BuildResult()
@@ -79,7 +133,7 @@ class ReportFileBuilder:
                         output_file
                     )
                 )
-            if not overwrite:
+            if not overwrite and not incremental:
                 return status.add_error(
                     "Output file '{}' already exists".format(output_file)
                 )
@@ -89,10 +143,49 @@ class ReportFileBuilder:
                     "Invalid path for output file: '{}'".format(output_file)
                 )
 
+        previous = None
+        if incremental and output_file.exists():
+            try:
+                previous = MappedZip(output_file)
+            except InMemoryZipError as e:
+                console.write(
+                    "Cannot reuse existing report file, rebuilding: {}\n".format(e)
+                )
+
+        if stream:
+            status = ReportFileBuilder._build_stream(
+                path,
+                output_file,
+                console,
+                follow_links=follow_links,
+                compression=compression,
+                workers=workers,
+                previous=previous,
+                minify=minify,
+                precompile=precompile,
+                prune=prune,
+                sources=incremental,
+            )
+            del previous
+            if status.success():
+                console.write("Done!\n")
+            return status
+
         # build ZipFs
         zfs_status, zfs = ReportFileBuilder.build_zipfs(
-            path, console, follow_links=follow_links
+            path,
+            console,
+            follow_links=follow_links,
+            compression=compression,
+            workers=workers,
+            previous=previous,
+            minify=minify,
+            precompile=precompile,
+            prune=prune,
+            sources=incremental,
         )
+        # release existing report file before overwriting it
+        del previous
         if not zfs_status.success():
             return zfs_status
 
@@ -112,23 +205,216 @@ class ReportFileBuilder:
 
     @staticmethod
     def build_zipfs(
-        path: str, console=sys.stdout, follow_links=False
+        path: str,
+        console=sys.stdout,
+        follow_links=False,
+        compression: CompressionPolicy = None,
+        workers: int = 1,
+        previous: InMemoryZip = None,
+        minify: bool = False,
+        precompile: bool = False,
+        prune: bool = False,
+        sources: bool = False,
     ) -> Tuple[BuildResult, Union[ZipFs, None]]:
         """
         Assemble a ZipFs structure from a specific path
+        Files are compressed using up to workers threads; the result is the same regardless of the number of workers
+        If a previous build is specified, entries of unchanged files are copied from it instead of being compressed
+        If minify is True, HTML, CSS and JavaScript files without Jinja syntax are minified; templates are not modified
+        If precompile is True, Jinja templates are compiled and stored in the ZipFs (see JinjaRender.precompile())
+        The result is deterministic: files are sorted by name and stored with fixed timestamps and attributes, followed
+        by precompiled templates (if any) and a content index with the SHA-256 hash of each file and the report
+        fingerprint (see fingerprint()); if sources is True, the content index also holds the size and modification
+        time of each source file, and is no longer the same across machines
+        Files matching the rules in the report .zptignore file (using the .gitignore format) are skipped; if prune is
+        True, stylesheets, scripts, images, fonts and other assets not referenced by templates, stylesheets, scripts
+        or json files are also skipped (see prune.unreferenced_assets())
         :param path: report dir path
         :param console: console writer
         :param follow_links: if true, follow symlinks
+        :param compression: optional compression policy
+        :param workers: number of compression threads
+        :param previous: optional previous build of the same path
+        :param minify: if True, minify HTML, CSS and JavaScript files
+        :param precompile: if True, store precompiled Jinja templates
+        :param prune: if True, skip unreferenced assets
+        :param sources: if True, store the size and modification time of the source files in the content index
         :return: [BuildResult, ZipFs]
         """
-        status = BuildResult()
         path = Path(path)
+        status, names, manifest = ReportFileBuilder._prepare(
+            path, console, follow_links, prune
+        )
+        if not status.success():
+            return status, None
+
+        zip = InMemoryZip(compression=compression)
+        hashes = {}
+        stats = {}
+        try:
+            for name, reused, entry, digest, file_stat in ReportFileBuilder._entries(
+                path, names, zip.get_compression(), workers, previous, minify
+            ):
+                if reused:
+                    console.write("Unchanged {}...\n".format(name.relative_to(path)))
+                else:
+                    console.write("Copying {}...\n".format(name.relative_to(path)))
+                zip.write_raw(*entry)
+                hashes[entry[0].filename] = digest
+                stats[entry[0].filename] = file_stat
+        except ReportFileBuilderError as e:
+            return status.add_error(str(e)), None
+
+        if precompile:
+            for entry in ReportFileBuilder._precompile(
+                ZipFs(OverlayZip(zip)), manifest, console
+            ):
+                zip.write_raw(*entry)
+        zip.write_raw(
+            *ReportFileBuilder._content_index(
+                hashes, zip.get_compression(), stats if sources else None
+            )
+        )
+        return status, ZipFs(zip)
+
+    @staticmethod
+    def _build_stream(
+        path: Path,
+        output_file: Path,
+        console=sys.stdout,
+        follow_links=False,
+        compression: CompressionPolicy = None,
+        workers: int = 1,
+        previous: InMemoryZip = None,
+        minify: bool = False,
+        precompile: bool = False,
+        prune: bool = False,
+        sources: bool = False,
+    ) -> BuildResult:
+        """
+        Assemble a report file from a specific path, writing entries directly to disk
+        Entries are written to a temporary file in the destination directory, which then replaces the destination;
+        files larger than STREAM_FILE_SIZE are compressed and copied in chunks, so memory usage doesn't depend on the
+        size of the report
+        :param path: report dir path
+        :param output_file: destination report file
+        :param console: console writer
+        :param follow_links: if true, follow symlinks
+        :param compression: optional compression policy
+        :param workers: number of compression threads
+        :param previous: optional previous build of the same path
+        :param minify: if True, minify HTML, CSS and JavaScript files
+        :param precompile: if True, store precompiled Jinja templates
+        :param prune: if True, skip unreferenced assets
+        :param sources: if True, store the size and modification time of the source files in the content index
+        :return: BuildResult
+        """
+        status, names, manifest = ReportFileBuilder._prepare(
+            path, console, follow_links, prune
+        )
+        if not status.success():
+            return status
+        if compression is None:
+            compression = CompressionPolicy()
 
+        console.write("Generating {}...\n".format(output_file))
+        fd, tmp_file = tempfile.mkstemp(
+            suffix=".tmp",
+            prefix=".{}.".format(output_file.name),
+            dir=output_file.parent,
+        )
+        hashes = {}
+        stats = {}
+        try:
+            # mkstemp() creates files only accessible by the owner
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp_file, 0o666 & ~umask)
+            with os.fdopen(fd, "wb") as f:
+                with ZipFile(f, "w", strict_timestamps=False) as zf:
+                    for name, reused, (
+                        info,
+                        data,
+                    ), digest, file_stat in ReportFileBuilder._entries(
+                        path,
+                        names,
+                        compression,
+                        workers,
+                        previous,
+                        minify,
+                        STREAM_FILE_SIZE,
+                    ):
+                        arcname = name.relative_to(path)
+                        if reused:
+                            console.write("Unchanged {}...\n".format(arcname))
+                        else:
+                            console.write("Copying {}...\n".format(arcname))
+                        if data is not None:
+                            zip_write_raw(zf, info, data)
+                        elif reused:
+                            # large unchanged file, copy in chunks
+                            source = previous.zip()
+                            data = zip_iter_raw(source, source.getinfo(info.filename))
+                            zip_write_raw(zf, info, data)
+                        else:
+                            # large file, compress in chunks
+                            digest = ReportFileBuilder._write_file(
+                                zf, name, info, compression
+                            )
+                        hashes[info.filename] = digest
+                        stats[info.filename] = file_stat
+
+            entries = []
+            if precompile:
+                # compile templates from the written entries
+                written = MappedZip(tmp_file)
+                try:
+                    entries = ReportFileBuilder._precompile(
+                        ZipFs(OverlayZip(written)), manifest, console
+                    )
+                finally:
+                    # release the mapping before appending to the file
+                    written.close()
+            entries.append(
+                ReportFileBuilder._content_index(
+                    hashes, compression, stats if sources else None
+                )
+            )
+            with ZipFile(tmp_file, "a") as zf:
+                for info, data in entries:
+                    zip_write_raw(zf, info, data)
+
+            if output_file.exists():
+                console.write("Report file exists, overwriting...\n")
+            os.replace(tmp_file, output_file)
+
+        except ReportFileBuilderError as e:
+            status.add_error(str(e))
+        except Exception as e:
+            status.add_error("Error saving zpt file: {}".format(e))
+        finally:
+            if os.path.exists(tmp_file):
+                os.unlink(tmp_file)
+        return status
+
+    @staticmethod
+    def _prepare(
+        path: Path, console, follow_links: bool, prune: bool = False
+    ) -> Tuple[BuildResult, list, dict]:
+        """
+        Validate a report dir path, and list the files to build
+        :param path: report dir path
+        :param console: console writer
+        :param follow_links: if true, follow symlinks
+        :param prune: if True, skip unreferenced assets
+        :return: [BuildResult, list of file paths, manifest]
+        """
+        status = BuildResult()
         if not path.exists():
-            return status.add_error("Path '{}' not found".format(path)), None
+            return status.add_error("Path '{}' not found".format(path)), [], {}
 
         if not path.is_dir():
-            return status.add_error("Path '{}' is not a directory".format(path)), None
+            return status.add_error("Path '{}' is not a directory".format(path)), [], {}
 
         # inform symlink status
         console.write("Follow Symlinks: {}\n".format(follow_links))
@@ -137,32 +423,401 @@ class ReportFileBuilder:
         console.write("Checking manifest & index file...\n")
 
         # valid_zpt() works only on FsInterface
-        dfs = DiskFs(path)
-        fstatus, _ = ReportFileBuilder.valid_zpt(dfs)
-        if not fstatus.success():
-            return fstatus, None
+        dfs = DiskFs(path, index=True, follow_links=follow_links)
+        status, manifest = ReportFileBuilder.valid_zpt(dfs)
+        if not status.success():
+            return status, [], {}
+
+        names = [path / name for name in dfs.list("") if not name.endswith(os.sep)]
+        names.sort(key=lambda name: name.relative_to(path).as_posix())
+        try:
+            names = ReportFileBuilder._exclude(path, names, console, prune)
+        except Exception as e:
+            return status.add_error("Error excluding files: {}".format(e)), [], {}
 
-        # build ZPT and copy files
         console.write("Building...\n")
-        zfs = ZipFs(InMemoryZip())
-        names = []
-        for dirname, dirs, files in os.walk(path, followlinks=follow_links):
-            dirname = Path(dirname)
-            for f in files:
-                names.append(dirname / Path(f))
+        return status, names, manifest
 
+    @staticmethod
+    def _exclude(path: Path, names: list, console, prune: bool = False) -> list:
+        """
+        Remove files matching the .zptignore rules and, optionally, unreferenced assets
+        Files using names reserved for generated entries are always removed; the manifest and index files are never
+        removed
+        :param path: report dir path
+        :param names: list of file paths
+        :param console: console writer
+        :param prune: if True, remove unreferenced assets
+        :return: list of file paths
+        """
+        required = [
+            path / MANIFEST_FILE_NAME,
+            path / INDEX_FILE_NAME,
+        ]
+        excluded = []
+        # entries generated by the builder
         for name in names:
-            dest_name = name.relative_to(path)
-            console.write("Copying {}...\n".format(dest_name))
-            try:
+            arcname = name.relative_to(path).as_posix()
+            if arcname == CONTENT_INDEX_FILE_NAME or arcname.startswith(
+                BYTECODE_CACHE_PATH
+            ):
+                console.write("Ignoring reserved file {}...\n".format(arcname))
+                excluded.append(name)
+        names = [name for name in names if name not in excluded]
+
+        ignore_file = path / IGNORE_FILE_NAME
+        if ignore_file in names:
+            rules = IgnoreRules.from_file(ignore_file)
+            for name in names:
+                if name == ignore_file or (
+                    name not in required
+                    and rules.ignored(name.relative_to(path).as_posix())
+                ):
+                    console.write("Ignoring {}...\n".format(name.relative_to(path)))
+                    excluded.append(name)
+            names = [name for name in names if name not in excluded]
+
+        if prune:
+            console.write("Checking asset references...\n")
+            unused = unreferenced_assets(path, names)
+            for name in unused:
+                console.write("Pruning {}...\n".format(name.relative_to(path)))
+            excluded.extend(unused)
+            unused = set(unused)
+            names = [name for name in names if name not in unused]
+
+        if len(excluded) > 0:
+            size = sum(name.stat().st_size for name in excluded)
+            console.write(
+                "Excluded {} files, {} bytes saved\n".format(len(excluded), size)
+            )
+        return names
+
+    @staticmethod
+    def _entries(
+        path: Path,
+        names: list,
+        compression: CompressionPolicy,
+        workers: int = 1,
+        previous: InMemoryZip = None,
+        minify: bool = False,
+        max_size: int = None,
+    ):
+        """
+        Compress files, using up to workers threads
+        Entries are normalized (see _normalize()); the SHA-256 hash of each file is computed from its (possibly
+        minified) contents, or taken from the content index of the previous build for unchanged files
+        The size and modification time of each file are retrieved before reading it, so changes made while building
+        are detected by the next incremental build
+        If max_size is specified, files larger than max_size are not read; the resulting entry has no contents nor
+        hash, and must be copied by the caller
+        :param path: report dir path
+        :param names: list of file paths
+        :param compression: compression policy
+        :param workers: number of compression threads
+        :param previous: optional previous build of the same path
+        :param minify: if True, minify HTML, CSS and JavaScript files
+        :param max_size: optional maximum file size to read
+        :return: iterator of (file path, True if reused from previous build, (ZipInfo, compressed contents), hash,
+        [size, modification time in ns])
+        """
+        hashes = {}
+        sources = {}
+        if previous is not None:
+            hashes, sources = ReportFileBuilder._previous_index(previous)
+
+        def compress(name: Path):
+            st = os.stat(name)
+            source = [st.st_size, st.st_mtime_ns]
+            info = ZipInfo.from_file(
+                name, name.relative_to(path), strict_timestamps=False
+            )
+            large = max_size is not None and info.file_size > max_size
+            content = None
+            if minify and not large and can_minify(info.filename):
+                with open(name, "rb") as f:
+                    content = minify_file(info.filename, f.read())
+            if previous is not None:
+                digest = hashes.get(info.filename, None)
+                entry = ReportFileBuilder._reuse_entry(
+                    previous,
+                    info,
+                    name,
+                    compression,
+                    content,
+                    not large,
+                    source,
+                    sources.get(info.filename, None),
+                    digest,
+                )
+                if entry is not None:
+                    if digest is None:
+                        digest = ReportFileBuilder._entry_hash(previous, info.filename)
+                    return True, ReportFileBuilder._normalize(entry), digest, source
+            ReportFileBuilder._normalize((info, None))
+            if large:
+                return False, (info, None), None, source
+            if content is None:
                 with open(name, "rb") as f:
-                    zfs.add(dest_name, f.read())
+                    content = f.read()
+            digest = hashlib.sha256(content).hexdigest()
+            return False, compression.compress(info, content), digest, source
+
+        for name, (reused, entry, digest, source) in ReportFileBuilder._map_ordered(
+            compress, names, workers
+        ):
+            yield name, reused, entry, digest, source
+
+    @staticmethod
+    def _precompile(zfs: ZipFs, manifest: dict, console) -> list:
+        """
+        Store precompiled Jinja templates in a ZipFs
+        :param zfs: ZipFs
+        :param manifest: report manifest
+        :param console: console writer
+        :return: list of normalized (ZipInfo, compressed contents) of the compiled templates, sorted by name
+        """
+        # imported here to avoid circular imports
+        from zipreport.report.reportfile import ReportFile
+        from zipreport.template import JinjaRender
+
+        console.write("Compiling templates...\n")
+        errors = JinjaRender(ReportFile(zfs, manifest)).precompile()
+        for name, error in errors.items():
+            console.write("Cannot compile {}: {}\n".format(name, error))
+        zip = zfs.get_backend()
+        return [
+            ReportFileBuilder._normalize(zip.read_raw(name))
+            for name in sorted(zip.namelist())
+            if name.startswith(BYTECODE_CACHE_PATH)
+        ]
+
+    @staticmethod
+    def _content_index(
+        hashes: dict, compression: CompressionPolicy, sources: dict = None
+    ):
+        """
+        Generate the content index entry
+        :param hashes: dict of file name: SHA-256 hex digest
+        :param compression: compression policy
+        :param sources: optional dict of file name: [size, modification time in ns] of the source files
+        :return: (ZipInfo, compressed contents)
+        """
+        index = {
+            "algorithm": "sha256",
+            "fingerprint": ReportFileBuilder.fingerprint(hashes),
+            "files": hashes,
+        }
+        if sources is not None:
+            index["sources"] = sources
+        content = json.dumps(index, indent=1, sort_keys=True).encode("utf-8")
+        info, _ = ReportFileBuilder._normalize(
+            (ZipInfo(CONTENT_INDEX_FILE_NAME, ARCHIVE_DATE_TIME), None)
+        )
+        return compression.compress(info, content)
+
+    @staticmethod
+    def fingerprint(hashes: dict) -> str:
+        """
+        Compute a report fingerprint
+        The fingerprint only depends on the names and contents of the files, so identical templates have the same
+        fingerprint regardless of file timestamps, entry order or compression settings
+        :param hashes: dict of file name: SHA-256 hex digest
+        :return: SHA-256 hex digest
+        """
+        digest = hashlib.sha256()
+        for name in sorted(hashes.keys()):
+            digest.update("{}\0{}\n".format(name, hashes[name]).encode("utf-8"))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _normalize(entry: tuple) -> tuple:
+        """
+        Set fixed timestamp and attributes on an entry, so builds are reproducible
+        The ZipInfo is modified in-place
+        :param entry: (ZipInfo, compressed contents)
+        :return: entry
+        """
+        info = entry[0]
+        info.date_time = ARCHIVE_DATE_TIME
+        info.external_attr = ARCHIVE_FILE_ATTR
+        info.create_system = 3
+        return entry
+
+    @staticmethod
+    def _previous_index(previous: InMemoryZip) -> Tuple[dict, dict]:
+        """
+        Read the file hashes and source file information from the content index of a previous build
+        :param previous: previous build
+        :return: (dict of file name: SHA-256 hex digest, dict of file name: [size, modification time in ns]); each
+        dict is empty if not available
+        """
+        try:
+            index = json.loads(previous.read(CONTENT_INDEX_FILE_NAME))
+        except Exception:
+            return {}, {}
+        if not isinstance(index, dict):
+            return {}, {}
+        hashes = index.get("files", None)
+        sources = index.get("sources", None)
+        return (
+            hashes if isinstance(hashes, dict) else {},
+            sources if isinstance(sources, dict) else {},
+        )
+
+    @staticmethod
+    def _entry_hash(zip: InMemoryZip, name: str) -> str:
+        """
+        Compute the SHA-256 hash of a zip entry, decompressing it in chunks
+        :param zip: zip backend
+        :param name: entry name
+        :return: SHA-256 hex digest
+        """
+        digest = hashlib.sha256()
+        with zip.open(name) as f:
+            for chunk in iter(lambda: f.read(RAW_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _write_file(
+        zf: ZipFile, name: Path, info: ZipInfo, compression: CompressionPolicy
+    ) -> str:
+        """
+        Compress a file into a ZipFile in chunks
+        :param zf: ZipFile opened for writing, on a seekable file
+        :param name: file path
+        :param info: entry ZipInfo, with the file size
+        :param compression: compression policy
+        :return: SHA-256 hex digest of the file
+        """
+        info.compress_type, compressor = compression.compressor(
+            info.filename, info.file_size
+        )
+        digest = hashlib.sha256()
+
+        def chunks():
+            for chunk in iter(lambda: src.read(RAW_CHUNK_SIZE), b""):
+                digest.update(chunk)
+                yield chunk
+
+        with open(name, "rb") as src:
+            zip_write_stream(zf, info, chunks(), compressor)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _reuse_entry(
+        previous: InMemoryZip,
+        info: ZipInfo,
+        name: Path,
+        compression: CompressionPolicy,
+        content: bytes = None,
+        read: bool = True,
+        source: list = None,
+        old_source: list = None,
+        old_digest: str = None,
+    ):
+        """
+        Retrieve the compressed entry of an unchanged file from a previous build
+        A file is unchanged if its size and modification time match the ones stored by the previous build; otherwise,
+        the file is read and its SHA-256 hash is compared with the stored one (or its CRC with the existing entry, if
+        the previous build has no content index)
+        If content is specified (eg. minified file contents), its size and CRC are compared instead
+        :param previous: previous build
+        :param info: ZipInfo of the file
+        :param name: file path
+        :param compression: compression policy in use
+        :param content: optional contents to compare
+        :param read: if False, the compressed contents are not read
+        :param source: optional [size, modification time in ns] of the file
+        :param old_source: optional [size, modification time in ns] of the file, as stored by the previous build
+        :param old_digest: optional SHA-256 hex digest of the file, as stored by the previous build
+        :return: (ZipInfo, compressed contents or None) or None
+        """
+        try:
+            old = previous.getinfo(info.filename)
+        except KeyError:
+            return None
+        size = info.file_size if content is None else len(content)
+        if old.file_size != size:
+            return None
+        # entries using a different compression method are rebuilt
+        if compression.select(info.filename, size)[0] != old.compress_type:
+            return None
+        if content is not None:
+            if zlib.crc32(content) != old.CRC:
+                return None
+        elif source is None or source != old_source:
+            if old_digest is not None:
+                if ReportFileBuilder._file_hash(name) != old_digest:
+                    return None
+            elif ReportFileBuilder._file_crc(name) != old.CRC:
+                return None
+        data = None
+        if read:
+            old, data = previous.read_raw(info.filename)
+        return copy(old), data
+
+    @staticmethod
+    def _file_hash(name: Path) -> str:
+        """
+        Compute the SHA-256 hash of a file, reading it in chunks
+        :param name: file path
+        :return: SHA-256 hex digest
+        """
+        digest = hashlib.sha256()
+        with open(name, "rb") as f:
+            for chunk in iter(lambda: f.read(RAW_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _file_crc(name: Path) -> int:
+        """
+        Compute the CRC32 of a file, reading it in chunks
+        :param name: file path
+        :return: int
+        """
+        crc = 0
+        with open(name, "rb") as f:
+            for chunk in iter(lambda: f.read(RAW_CHUNK_SIZE), b""):
+                crc = zlib.crc32(chunk, crc)
+        return crc
+
+    @staticmethod
+    def _map_ordered(fn: Callable, items: list, workers: int = 1):
+        """
+        Apply fn to each item, using up to workers threads
+        Results are yielded in the same order as items; at most 2 * workers results are kept in memory
+        :param fn: callable to apply
+        :param items: list of items
+        :param workers: number of threads
+        :return: iterator of (item, result)
+        """
+
+        def call(item):
+            try:
+                return fn(item)
             except Exception as e:
-                return (
-                    status.add_error("Error copying file {}: {}".format(name, e)),
-                    None,
+                raise ReportFileBuilderError(
+                    "Error copying file {}: {}".format(item, e)
                 )
-        return status, zfs
+
+        if workers is None or workers < 2:
+            for item in items:
+                yield item, call(item)
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for item in items:
+                pending.append((item, executor.submit(call, item)))
+                if len(pending) >= 2 * workers:
+                    item, future = pending.popleft()
+                    yield item, future.result()
+            while pending:
+                item, future = pending.popleft()
+                yield item, future.result()
 
     @staticmethod
     def valid_zpt(fs: FsInterface) -> Tuple[BuildResult, Union[dict, None]]:
@@ -194,10 +849,12 @@ class ReportFileBuilder:
         if not status.success():
             return status, None
 
-        # check index.html
+        # check index.html; only metadata is read
         try:
-            fs.get(INDEX_FILE_NAME)
-        except Exception as e:
+            found = fs.exists(INDEX_FILE_NAME) and not fs.is_dir(INDEX_FILE_NAME)
+        except Exception:
+            found = False
+        if not found:
             return (
                 status.add_error("Index file '{}' not found".format(INDEX_FILE_NAME)),
                 None,
@@ -0,0 +1,157 @@
+import collections
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+
+from zipreport.report.reportfile import ReportFile
+
+# default maximum size of cached templates, in bytes
+DEFAULT_TEMPLATE_CACHE_SIZE = 256 * 1024 * 1024
+
+TemplateCacheStats = collections.namedtuple(
+    "TemplateCacheStats",
+    [
+        "hits",
+        "misses",
+        "evictions",
+        "entries",
+        "size",
+        "max_size",
+    ],
+)
+
+
+class TemplateCache:
+    """
+    ReportFile template cache
+    Loaded templates are kept in memory, keyed by source path and load options, and validated against the size and
+    modification time of the source; the least recently used templates are evicted when the total size exceeds
+    max_size. Callers get a fork of the cached template, so files added when rendering are private to each caller
+    The size of a template is its compressed plus uncompressed size, as forks share decompressed files
+    """
+
+    def __init__(self, max_size: int = DEFAULT_TEMPLATE_CACHE_SIZE):
+        """
+        Constructor
+        :param max_size: maximum total size of cached templates, in bytes
+        """
+        self._max_size = max_size
+        self._size = 0
+        # key: (signature, ReportFile, size)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def load(
+        self, key: tuple, signature, loader: Callable[[], ReportFile]
+    ) -> ReportFile:
+        """
+        Retrieve a fork of a cached template, loading it if not cached or if its signature changed
+        :param key: cache key (eg. source path and load options)
+        :param signature: source signature (eg. modification time and size)
+        :param loader: callable that loads the template
+        :return: ReportFile
+        """
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[1].fork()
+            self._misses += 1
+
+        # load outside the lock, so other templates can be retrieved meanwhile
+        template = loader()
+        stats = template.stats(0)
+        size = stats.compressed_size + stats.uncompressed_size
+        if size > self._max_size:
+            self.invalidate(key)
+            return template
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old[2]
+            while self._entries and self._size + size > self._max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted[2]
+                self._evictions += 1
+            self._entries[key] = (signature, template, size)
+            self._size += size
+        return template.fork()
+
+    def invalidate(self, key: tuple):
+        """
+        Remove a template
+        :param key: cache key
+        :return:
+        """
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old[2]
+
+    def clear(self):
+        """
+        Remove all templates and reset counters
+        :return:
+        """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            self._hits = 0
+            self._misses = 0
+            self._evictions = 0
+
+    def stats(self) -> TemplateCacheStats:
+        """
+        Retrieve cache statistics
+        :return: TemplateCacheStats
+        """
+        with self._lock:
+            return TemplateCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                size=self._size,
+                max_size=self._max_size,
+            )
+
+    @staticmethod
+    def file_signature(path: Path) -> tuple:
+        """
+        Compute the signature of a file
+        :param path: file path
+        :return: (inode, size, modification time)
+        """
+        st = os.stat(path)
+        return st.st_ino, st.st_size, st.st_mtime_ns
+
+    @staticmethod
+    def dir_signature(path: Path, follow_links: bool = False) -> tuple:
+        """
+        Compute the signature of a directory tree, from the size and modification time of its files
+        Only file metadata is read
+        :param path: directory path
+        :param follow_links: if True, symlinked directories are followed
+        :return: tuple
+        """
+        result = []
+        for root, dirs, files in os.walk(path, followlinks=follow_links):
+            dirs.sort()
+            for name in sorted(files):
+                name = os.path.join(root, name)
+                try:
+                    st = os.stat(name)
+                except OSError:
+                    continue
+                result.append((name, st.st_ino, st.st_size, st.st_mtime_ns))
+        return tuple(result)
+
+    def __len__(self) -> int:
+        return len(self._entries)
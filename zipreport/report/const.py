@@ -5,8 +5,16 @@ MANIFEST_FILE_NAME = "manifest.json"
 DATA_FILE_NAME = "data.json"
 INDEX_FILE_NAME = "index.html"
 REPORT_FILE_NAME = "report.html"
+IGNORE_FILE_NAME = ".zptignore"
 PDF_FILE_NAME = "report.pdf"
 
+# SHA-256 hashes of report files, and report fingerprint
+CONTENT_INDEX_FILE_NAME = ".contents.json"
+
+# Precompiled Jinja templates
+BYTECODE_CACHE_PATH = ".bytecode/"
+TEMPLATE_EXTENSIONS = [".html", ".htm", ".xml", ".j2", ".jinja", ".jinja2"]
+
 # Manifest Constants
 MANIFEST_TITLE = "title"
 MANIFEST_AUTHOR = "author"
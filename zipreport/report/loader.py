@@ -1,12 +1,17 @@
 import json
 from io import StringIO
 from pathlib import Path
+from typing import Union
 from zipfile import BadZipFile
 
-from zipreport.fileutils import ZipFs, FsError
+from zipreport.fileutils import DiskFs, FsError, OverlayFs, ZipFs
+from zipreport.fileutils.backend.lazy import LazyZip
+from zipreport.fileutils.backend.mapped import MappedZip
+from zipreport.fileutils.backend.overlay import OverlayZip
 from zipreport.fileutils.backend.zip import InMemoryZip, InMemoryZipError
 from zipreport.report.builder import ReportFileBuilder
-from zipreport.report.const import MANIFEST_FILE_NAME
+from zipreport.report.cache import TemplateCache, DEFAULT_TEMPLATE_CACHE_SIZE
+from zipreport.report.const import MANIFEST_FILE_NAME, CONTENT_INDEX_FILE_NAME
 from zipreport.report.reportfile import ReportFile
 
 
@@ -15,28 +20,112 @@ class ReportFileLoaderError(Exception):
 
 
 class ReportFileLoader:
+    # process-wide template cache; disabled by default
+    _cache = None
+
+    @staticmethod
+    def enable_cache(max_size: int = DEFAULT_TEMPLATE_CACHE_SIZE) -> TemplateCache:
+        """
+        Enable the process-wide template cache
+        While enabled, load_file() and load_dir() (with pack=True) keep loaded templates in memory, and return a fork
+        of the cached template if its source didn't change; forks are cheap, and files added when rendering are
+        private to each fork. An existing cache is replaced
+        :param max_size: maximum total size of cached templates, in bytes
+        :return: TemplateCache
+        """
+        ReportFileLoader._cache = TemplateCache(max_size)
+        return ReportFileLoader._cache
+
+    @staticmethod
+    def disable_cache():
+        """
+        Disable the process-wide template cache, releasing cached templates
+        :return:
+        """
+        ReportFileLoader._cache = None
+
     @staticmethod
-    def load(source: str) -> ReportFile:
+    def get_cache() -> Union[TemplateCache, None]:
+        """
+        Retrieve the process-wide template cache
+        :return: TemplateCache, or None if disabled
+        """
+        return ReportFileLoader._cache
+
+    @staticmethod
+    def load(
+        source: str, mapped: bool = False, pack: bool = True, lazy: bool = False
+    ) -> ReportFile:
         """
         Load ReportFile from a source (either directory or a ZPT)
         :param source:
+        :param mapped: if True, ZPT files are memory-mapped (see load_file())
+        :param pack: if False, directories are used in place (see load_dir())
+        :param lazy: if True, ZPT files are loaded on demand (see load_file())
         :return: ReportFile
         """
         source = Path(source)
         if source.is_dir():
-            return ReportFileLoader.load_dir(source)
-        return ReportFileLoader.load_file(source)
+            return ReportFileLoader.load_dir(source, pack=pack)
+        return ReportFileLoader.load_file(source, mapped=mapped, lazy=lazy)
 
     @staticmethod
-    def load_dir(path: str, follow_links: bool = False) -> ReportFile:
+    def load_dir(
+        path: str, follow_links: bool = False, workers: int = 1, pack: bool = True
+    ) -> ReportFile:
         """
         Generate ReportFile from a directory with a valid report template
+        If pack is False, the template files are read from the directory as needed, and new files (such as the
+        rendered report) are kept in a private in-memory layer; the directory contents are only compressed if the
+        report is saved (eg. to be sent to a rendering server)
+        :param path: template path
+        :follow_links: if True, symlinked directories are followed
+        :param workers: number of compression threads
+        :param pack: if True, the directory contents are packed into a zip file upfront (and cached, if the template
+        cache is enabled)
+        :return: ReportFile
+        """
+        if not pack:
+            path = Path(path)
+            if not path.is_dir():
+                raise ReportFileLoaderError(
+                    "Error loading report from path '{}': not a directory".format(path)
+                )
+            fs = OverlayFs(DiskFs(path, index=True, follow_links=follow_links))
+            status, manifest = ReportFileBuilder.valid_zpt(fs)
+            if not status.success():
+                raise ReportFileLoaderError(
+                    "Error loading report from path '{}': '{}'".format(
+                        path, "; ".join(status.get_errors())
+                    )
+                )
+            return ReportFile(fs, manifest)
+
+        cache = ReportFileLoader._cache
+        if cache is not None:
+            path = Path(path)
+            if not path.is_dir():
+                raise ReportFileLoaderError(
+                    "Error loading report from path '{}': not a directory".format(path)
+                )
+            return cache.load(
+                ("dir", str(path.resolve()), follow_links),
+                TemplateCache.dir_signature(path, follow_links),
+                lambda: ReportFileLoader._pack_dir(path, follow_links, workers),
+            )
+        return ReportFileLoader._pack_dir(path, follow_links, workers)
+
+    @staticmethod
+    def _pack_dir(path: str, follow_links: bool, workers: int) -> ReportFile:
+        """
+        Generate ReportFile from a directory, packing its contents into a zip file
         :param path: template path
-        :follow_links: if True, symlinks are followed
+        :follow_links: if True, symlinked directories are followed
+        :param workers: number of compression threads
         :return: ReportFile
         """
         zstatus, zfs = ReportFileBuilder.build_zipfs(
-            path, StringIO(), follow_links=follow_links
+            path, StringIO(), follow_links=follow_links, workers=workers
         )
         if not zstatus.success():
             error_msg = "; ".join(zstatus.get_errors())
@@ -50,18 +139,56 @@ class ReportFileLoader:
         return ReportFile(zfs, manifest)
 
     @staticmethod
-    def load_file(file: str) -> ReportFile:
+    def load_file(file: str, mapped: bool = False, lazy: bool = False) -> ReportFile:
         """
         Load ReportFile from a zpt file
+        If mapped is True, the file is memory-mapped read-only instead of being copied to memory; new files (such as
+        the rendered report) are kept in a separate in-memory layer
+        If lazy is True, only the zip central directory and the manifest are read when loading; the file is loaded
+        into memory on first access to other files, so reading the manifest (eg. to list reports) doesn't depend on
+        the report size. Ignored if mapped is True, as memory-mapped files are already read on demand
+        If the template cache is enabled (see enable_cache()), a fork of the cached template is returned, unless the
+        file was modified
         :param file: zpt file path
+        :param mapped: if True, use a memory-mapped backend
+        :param lazy: if True, use an on-demand backend
         :return: ReportFile
         """
         file = Path(file)
         if not file.exists() or not file.is_file():
             raise ReportFileLoaderError("Cannot find file '{}".format(file))
 
+        cache = ReportFileLoader._cache
+        if cache is not None:
+            try:
+                signature = TemplateCache.file_signature(file)
+            except OSError as e:
+                raise ReportFileLoaderError("Error: {}".format(e))
+            lazy = lazy and not mapped
+            return cache.load(
+                ("file", str(file.resolve()), mapped, lazy),
+                signature,
+                lambda: ReportFileLoader._open_file(file, mapped, lazy),
+            )
+        return ReportFileLoader._open_file(file, mapped, lazy)
+
+    @staticmethod
+    def _open_file(file: Path, mapped: bool, lazy: bool = False) -> ReportFile:
+        """
+        Open a zpt file
+        :param file: zpt file path
+        :param mapped: if True, use a memory-mapped backend
+        :param lazy: if True, use an on-demand backend
+        :return: ReportFile
+        """
         try:
-            zfs = ZipFs(InMemoryZip(file))
+            if mapped:
+                zfs = ZipFs(OverlayZip(MappedZip(file)))
+            elif lazy:
+                preload = [MANIFEST_FILE_NAME, CONTENT_INDEX_FILE_NAME]
+                zfs = ZipFs(LazyZip(file, preload=preload))
+            else:
+                zfs = ZipFs(InMemoryZip(file))
         except (FsError, InMemoryZipError, BadZipFile, ValueError) as e:
             raise ReportFileLoaderError("Error: {}".format(e))
 
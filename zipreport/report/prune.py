@@ -0,0 +1,336 @@
+import posixpath
+import re
+from pathlib import Path
+from urllib.parse import unquote
+
+from zipreport.misc.minify import JINJA_DELIMITERS, has_jinja
+from zipreport.report.const import TEMPLATE_EXTENSIONS
+
+# file types that are removed if not referenced
+ASSET_EXTENSIONS = [
+    # stylesheets & scripts
+    ".css",
+    ".js",
+    ".mjs",
+    ".map",
+    # images
+    ".apng",
+    ".avif",
+    ".bmp",
+    ".gif",
+    ".ico",
+    ".jpeg",
+    ".jpg",
+    ".png",
+    ".svg",
+    ".tif",
+    ".tiff",
+    ".webp",
+    # fonts
+    ".eot",
+    ".otf",
+    ".ttf",
+    ".woff",
+    ".woff2",
+    # media
+    ".mp3",
+    ".mp4",
+    ".ogg",
+    ".wav",
+    ".webm",
+]
+
+# file types scanned for src, href and url() references
+_markup_extensions = TEMPLATE_EXTENSIONS + [".css", ".svg"]
+# file types searched for file names
+_text_extensions = [".js", ".mjs", ".json"]
+
+_re_reference = re.compile(
+    r"""(?:\b(?:src|href|xlink:href|poster|data)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+)))"""
+    r"""|(?:\burl\(\s*(?:"([^"]*)"|'([^']*)'|([^)]*?))\s*\))"""
+    r"""|(?:@import\s+(?:"([^"]*)"|'([^']*)'))"""
+    r"""|(?:\bsrcset\s*=\s*(?:"([^"]*)"|'([^']*)'))""",
+    re.I,
+)
+# index of the srcset groups in _re_reference
+_srcset_groups = (9, 10)
+_re_jinja_code = re.compile(r"\{\{.*?\}\}|\{%.*?%\}", re.S)
+_re_string = re.compile(r""""([^"\n]+)"|'([^'\n]+)'""")
+_re_source_map = re.compile(r"^\s*(?://|/\*)[#@]\s*sourceMappingURL=.*$", re.M)
+_re_scheme = re.compile(r"^[a-z][a-z0-9+.-]*:", re.I)
+
+
+class IgnoreRules:
+    """
+    Glob exclusion rules, using the .gitignore pattern format:
+    - blank lines and lines starting with # are ignored;
+    - patterns starting with ! re-include previously excluded files;
+    - patterns ending with / only match directories;
+    - patterns without a slash (other than a trailing one) match at any level, otherwise they are relative to the
+    report root;
+    - * and ? do not match /, ** matches any number of directories
+    Files inside an excluded directory cannot be re-included
+    """
+
+    def __init__(self, patterns: list = None):
+        """
+        Constructor
+        :param patterns: list of pattern lines
+        """
+        self._rules = []
+        for pattern in patterns or []:
+            self.add(pattern)
+
+    @staticmethod
+    def from_file(path: Path) -> "IgnoreRules":
+        """
+        Load rules from a file
+        :param path: ignore file path
+        :return: IgnoreRules
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            return IgnoreRules(f.read().splitlines())
+
+    def add(self, pattern: str):
+        """
+        Add a pattern
+        :param pattern: pattern line
+        :return:
+        """
+        pattern = pattern.rstrip("\n\r")
+        # trailing spaces are ignored unless escaped
+        while pattern.endswith(" ") and not pattern.endswith("\\ "):
+            pattern = pattern[:-1]
+        if pattern == "" or pattern.startswith("#"):
+            return
+        negate = pattern.startswith("!")
+        if negate or pattern.startswith("\\!") or pattern.startswith("\\#"):
+            pattern = pattern[1:]
+        dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        if pattern == "":
+            return
+        anchored = "/" in pattern
+        pattern = pattern.lstrip("/")
+        regex = self._translate(pattern)
+        if not anchored:
+            regex = "(?:.*/)?" + regex
+        self._rules.append((re.compile("^" + regex + "$"), negate, dir_only))
+
+    def match(self, path: str, is_dir: bool = False) -> bool:
+        """
+        Check if a path is excluded, without checking its parent directories
+        :param path: relative path, using / as separator
+        :param is_dir: True if path is a directory
+        :return: bool
+        """
+        result = False
+        for regex, negate, dir_only in self._rules:
+            if dir_only and not is_dir:
+                continue
+            if result == negate and regex.match(path):
+                result = not negate
+        return result
+
+    def ignored(self, path: str) -> bool:
+        """
+        Check if a file is excluded, either directly or because a parent directory is excluded
+        :param path: relative file path, using / as separator
+        :return: bool
+        """
+        parts = path.split("/")
+        for i in range(1, len(parts)):
+            if self.match("/".join(parts[:i]), True):
+                return True
+        return self.match(path)
+
+    def _translate(self, pattern: str) -> str:
+        """
+        Convert a glob pattern to a regular expression
+        :param pattern: glob pattern
+        :return: str
+        """
+        result = []
+        i = 0
+        size = len(pattern)
+        while i < size:
+            c = pattern[i]
+            if c == "*":
+                if pattern.startswith("**", i) and (i == 0 or pattern[i - 1] == "/"):
+                    if i + 2 == size:
+                        result.append(".*")
+                        i += 2
+                        continue
+                    if pattern[i + 2] == "/":
+                        result.append("(?:.*/)?")
+                        i += 3
+                        continue
+                result.append("[^/]*")
+            elif c == "?":
+                result.append("[^/]")
+            elif c == "[":
+                end = pattern.find("]", i + 2)
+                if end < 0:
+                    result.append(re.escape(c))
+                else:
+                    chars = pattern[i + 1 : end]
+                    if chars.startswith("!"):
+                        chars = "^" + chars[1:]
+                    result.append("[" + chars.replace("\\", "\\\\") + "]")
+                    i = end
+            elif c == "\\" and i + 1 < size:
+                i += 1
+                result.append(re.escape(pattern[i]))
+            else:
+                result.append(re.escape(c))
+            i += 1
+        return "".join(result)
+
+
+def find_references(content: str) -> list:
+    """
+    Extract local file references from a template, stylesheet or SVG file
+    References are src, href, srcset, poster and data attributes, css url() and @import statements; external URLs
+    and anchors are skipped
+    :param content: file contents
+    :return: list of references, as found
+    """
+    result = []
+    for match in _re_reference.finditer(content):
+        for group, value in enumerate(match.groups(), 1):
+            if value is None:
+                continue
+            if group in _srcset_groups:
+                # comma-separated list of "url [descriptor]"
+                result.extend(
+                    item.split()[0] for item in value.split(",") if item.strip()
+                )
+            else:
+                result.append(value.strip())
+            break
+    return [
+        item
+        for item in result
+        if item != ""
+        and not item.startswith("#")
+        and not item.startswith("//")
+        and not _re_scheme.match(item)
+    ]
+
+
+def find_literals(content: str) -> list:
+    """
+    Extract string literals that may be local file paths from the Jinja expressions and statements of a template
+    Catches paths passed to Jinja filters and functions (eg. {{ 'images/logo.png'|png }}); strings with whitespace,
+    external URLs and anchors are skipped
+    :param content: file contents
+    :return: list of strings, as found
+    """
+    result = []
+    for code in _re_jinja_code.finditer(content):
+        for match in _re_string.finditer(code.group(0)):
+            value = match.group(1) if match.group(1) is not None else match.group(2)
+            if (
+                any(c.isspace() for c in value)
+                or value.startswith("#")
+                or value.startswith("//")
+                or _re_scheme.match(value)
+            ):
+                continue
+            result.append(value)
+    return result
+
+
+def resolve_reference(base: str, reference: str, files: set) -> set:
+    """
+    Resolve a reference to the report files it may point to
+    References with Jinja syntax (eg. "images/{{ name }}.png") match every file with the same static prefix and
+    suffix
+    :param base: relative path of the directory references are relative to, using / as separator
+    :param reference: reference
+    :param files: set of relative file paths, using / as separator
+    :return: set of matching file paths
+    """
+    reference = unquote(reference.split("#", 1)[0].split("?", 1)[0])
+    prefix = reference
+    suffix = ""
+    dynamic = has_jinja(reference)
+    if dynamic:
+        start = min(
+            pos for pos in (reference.find(d) for d in JINJA_DELIMITERS) if pos >= 0
+        )
+        end = max(reference.rfind(d) for d in JINJA_DELIMITERS.values())
+        prefix = reference[:start]
+        suffix = reference[end + 2 :] if end > start else ""
+
+    if prefix.startswith("/"):
+        path = prefix.lstrip("/")
+    else:
+        path = posixpath.join(base, prefix)
+    if not dynamic:
+        path = posixpath.normpath(path)
+        return {path} if path in files else set()
+
+    # normalize the static prefix, keeping the trailing slash of directories
+    prefix = posixpath.normpath(path) if path != "" else ""
+    if prefix == ".":
+        prefix = ""
+    elif path.endswith("/"):
+        prefix += "/"
+    return {item for item in files if item.startswith(prefix) and item.endswith(suffix)}
+
+
+def unreferenced_assets(root: Path, names: list) -> list:
+    """
+    Find asset files not referenced by the report
+    Files that are not assets (see ASSET_EXTENSIONS), such as templates and json files, are always kept; kept and
+    referenced templates, stylesheets and SVG files are scanned for references, templates are also scanned for quoted
+    file paths, and kept or referenced script and json files are searched for file names (except sourceMappingURL
+    comments)
+    Template references are resolved relative to both the report root and the template directory
+    :param root: report dir path
+    :param names: list of file paths in the report
+    :return: list of unreferenced file paths
+    """
+    paths = {Path(name).relative_to(root).as_posix(): Path(name) for name in names}
+    files = set(paths.keys())
+    assets = {
+        item
+        for item in files
+        if posixpath.splitext(item)[1].lower() in ASSET_EXTENSIONS
+    }
+    kept = files - assets
+    pending = list(kept)
+    while pending and assets:
+        item = pending.pop()
+        ext = posixpath.splitext(item)[1].lower()
+        if ext not in _markup_extensions and ext not in _text_extensions:
+            continue
+        try:
+            with open(paths[item], "rb") as f:
+                content = f.read().decode("utf-8", errors="replace")
+        except OSError:
+            continue
+
+        found = set()
+        if ext in _markup_extensions:
+            # templates are rendered at the report root, but may also be used from their own directory
+            bases = {posixpath.dirname(item)}
+            if ext in TEMPLATE_EXTENSIONS:
+                bases.add("")
+            references = find_references(content)
+            if ext in TEMPLATE_EXTENSIONS:
+                # file paths passed to filters, such as the image filters
+                references.extend(find_literals(content))
+            for reference in references:
+                for base in bases:
+                    found.update(resolve_reference(base, reference, assets))
+        else:
+            content = _re_source_map.sub("", content)
+            for asset in assets:
+                if asset in content or posixpath.basename(asset) in content:
+                    found.add(asset)
+        assets -= found
+        pending.extend(found)
+
+    return sorted(paths[item] for item in assets)
@@ -1,9 +1,14 @@
 import io
+import json
+from copy import deepcopy
 from io import StringIO
 from pathlib import Path
 
-from zipreport.fileutils import ZipFs
+from typing import Union
+
+from zipreport.fileutils import OverlayFs, ZipFs, ZipStats
 from zipreport.report.builder import ReportFileBuilder
+from zipreport.report.const import CONTENT_INDEX_FILE_NAME
 
 
 class ReportFileError(Exception):
@@ -11,10 +16,15 @@ class ReportFileError(Exception):
 
 
 class ReportFile:
-    def __init__(self, source: ZipFs, manifest: dict):
+    def __init__(self, source: Union[ZipFs, OverlayFs], manifest: dict):
+        """
+        Constructor
+        :param source: report contents; either a ZipFs or an OverlayFs (eg. on top of a template directory)
+        :param manifest: manifest contents
+        """
         if not isinstance(manifest, dict):
             raise ReportFileError("Invalid manifest format")
-        if not isinstance(source, ZipFs):
+        if not isinstance(source, (ZipFs, OverlayFs)):
             raise ReportFileError("Invalid source type")
         self._manifest = manifest
         self._fs = source
@@ -30,11 +40,74 @@ class ReportFile:
             return self._manifest[name]
         return default
 
-    def get_fs(self) -> ZipFs:
+    def fork(self):
+        """
+        Create a new ReportFile sharing the contents of this one
+        Forking is cheap, and is the preferred way of rendering a template several times; files added during rendering
+        (such as the report output or generated images) are private to each fork.
+        The original ReportFile becomes read-only
+        :return: ReportFile
+        """
+        return ReportFile(self._fs.fork(), deepcopy(self._manifest))
+
+    def stats(self, top: int = 5) -> ZipStats:
+        """
+        Retrieve report size information, such as compressed and uncompressed size, number of files, largest files
+        and bytes added since the report was loaded (or forked)
+        Computed from the zip index; no files are decompressed
+        :param top: number of largest files to include
+        :return: ZipStats
+        """
+        return self._fs.stats(top)
+
+    def get_content_index(self) -> Union[dict, None]:
+        """
+        Retrieve the content index stored by ReportFileBuilder
+        The index has the SHA-256 hash of each template file ("files") and the report fingerprint ("fingerprint");
+        incremental builds also store the size and modification time of each source file ("sources")
+        :return: dict, or None if not available (eg. reports loaded from a directory without packing)
+        """
+        if not self._fs.exists(CONTENT_INDEX_FILE_NAME):
+            return None
+        try:
+            index = json.loads(self._fs.get_bytes(CONTENT_INDEX_FILE_NAME))
+        except ValueError:
+            return None
+        if not isinstance(index, dict):
+            return None
+        return index
+
+    def get_fingerprint(self) -> Union[str, None]:
+        """
+        Retrieve the report fingerprint
+        The fingerprint is computed when the report file is built, from the names and contents of the template files;
+        identical templates have the same fingerprint, and files added afterwards (eg. when rendering) don't change it.
+        It can be used as a cache key without hashing the report contents
+        :return: str, or None if not available
+        """
+        index = self.get_content_index()
+        if index is None:
+            return None
+        fingerprint = index.get("fingerprint", None)
+        if not isinstance(fingerprint, str):
+            return None
+        return fingerprint
+
+    def get_fs(self) -> Union[ZipFs, OverlayFs]:
         """
-        Retrieve internal ZipFs object
+        Retrieve internal ZipFs or OverlayFs object
+        :return: ZipFs or OverlayFs
+        """
+        return self._fs
+
+    def get_zipfs(self) -> ZipFs:
+        """
+        Retrieve report contents as a ZipFs
+        Reports backed by an OverlayFs are packed into a new zip file
         :return: ZipFs
         """
+        if isinstance(self._fs, OverlayFs):
+            return self._fs.pack()
         return self._fs
 
     def exists(self, path) -> bool:
@@ -53,6 +126,23 @@ class ReportFile:
         """
         return self._fs.get(name)
 
+    def open_stream(self, name: str):
+        """
+        Open a file from the report for reading, without reading it into a buffer first
+        The caller is responsible for closing the returned object
+        :param name: path to file
+        :return: file-like object
+        """
+        return self._fs.open_stream(name)
+
+    def get_bytes(self, name: str) -> bytes:
+        """
+        Read the contents of a file from the report
+        :param name: path to file
+        :return: bytes
+        """
+        return self._fs.get_bytes(name)
+
     def add(self, name: str, content):
         """
         Add a file to the report
@@ -62,9 +152,54 @@ class ReportFile:
         """
         return self._fs.add(name, content)
 
-    def save(self) -> io.BytesIO:
+    def replace(self, name: str, content):
+        """
+        Add a file to the report, replacing it if it already exists
+        :param name: file path
+        :param content: contents of file
+        :return:
+        """
+        return self._fs.replace(name, content)
+
+    def remove(self, name: str):
+        """
+        Remove a file from the report
+        :param name: file path
+        :return:
+        """
+        return self._fs.remove(name)
+
+    def add_dedup(self, name: str, content) -> str:
+        """
+        Add a file to the report, reusing an existing file with the same contents if possible
+        :param name: file path
+        :param content: contents of file
+        :return: path of the stored file
+        """
+        return self._fs.add_dedup(name, content)
+
+    def save(self) -> io.IOBase:
         """
         Saves current report to a buffer
-        :return: io.BytesIO
+        Reports using a spooled backend that was moved to disk return the temporary file instead, so contents are not
+        read back into memory; use save_file() or write_to() to export large reports
+        :return: io.BytesIO, or a seekable binary file object
+        """
+        return self.get_zipfs().get_backend().save_stream()
+
+    def save_file(self, dest_file: Union[str, Path]):
+        """
+        Saves current report to a file
+        Spooled backends are copied in chunks, with bounded memory usage
+        :param dest_file: destination file path
+        :return:
+        """
+        self.get_zipfs().get_backend().save(dest_file)
+
+    def write_to(self, dest) -> int:
+        """
+        Writes current report to a file-like object or socket, without intermediate copies
+        :param dest: writable file-like object or socket
+        :return: number of bytes written
         """
-        return self._fs.get_backend().save_stream()
+        return self.get_zipfs().get_backend().write_to(dest)
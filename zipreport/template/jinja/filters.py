@@ -70,8 +70,8 @@ def dynamic_image(args: list, kwargs: Union[dict, None], extension: str):
     zpt = loader.get_report()
     if callable_generator:
         result = generator(img_args[ARG_DATA])
-        name = Path("data") / (uuid4().hex + extension)
-        zpt.add(name, result)
+        # identical images are stored only once, if deduplication is enabled in the report ZipFs
+        name = zpt.add_dedup(Path("data") / (uuid4().hex + extension), result)
     else:
         # if generator is string, skip image generation and use specified file
         name = generator
@@ -0,0 +1,123 @@
+import io
+import sys
+from hashlib import sha1
+
+import jinja2
+from jinja2 import BytecodeCache, Environment
+from jinja2.bccache import Bucket
+
+from zipreport.report import ReportFile
+from zipreport.report.const import BYTECODE_CACHE_PATH
+
+
+class ReportBytecodeCache(BytecodeCache):
+    """
+    Jinja bytecode cache stored inside a ReportFile
+
+    Entries are keyed by template name, Jinja and Python versions, and the Environment settings that affect
+    compilation; Jinja also validates the source checksum when loading an entry. If any of these differ, the template
+    is compiled from source as usual.
+    Environments with a finalize function are not supported (see supports()), as Jinja applies it to constant
+    expressions at compile time
+    Note: compiled templates are unmarshalled when loaded; only use precompiled report files from trusted sources
+    """
+
+    def __init__(self, zpt: ReportFile, write: bool = False):
+        """
+        Constructor
+        :param zpt: ReportFile to use
+        :param write: if True, compiled templates are stored in the ReportFile
+        """
+        self.zpt = zpt
+        self.write = write
+
+    def get_bucket(
+        self, environment: Environment, name: str, filename: str, source: str
+    ) -> Bucket:
+        """
+        Return a cache bucket for the given template
+        :param environment: Jinja Environment
+        :param name: template name
+        :param filename: template file name
+        :param source: template source
+        :return: Bucket
+        """
+        bucket = Bucket(
+            environment,
+            self.get_environment_key(environment, name),
+            self.get_source_checksum(source),
+        )
+        self.load_bytecode(bucket)
+        return bucket
+
+    def load_bytecode(self, bucket: Bucket):
+        """
+        Load compiled template from the ReportFile, if available
+        :param bucket: Bucket
+        :return:
+        """
+        name = BYTECODE_CACHE_PATH + bucket.key
+        if self.zpt.exists(name):
+            bucket.load_bytecode(io.BytesIO(self.zpt.get_bytes(name)))
+
+    def dump_bytecode(self, bucket: Bucket):
+        """
+        Store compiled template in the ReportFile, if write is enabled
+        :param bucket: Bucket
+        :return:
+        """
+        if not self.write:
+            return
+        buffer = io.BytesIO()
+        bucket.write_bytecode(buffer)
+        self.zpt.replace(BYTECODE_CACHE_PATH + bucket.key, buffer.getvalue())
+
+    @staticmethod
+    def supports(environment: Environment) -> bool:
+        """
+        Check if compiled templates can be cached for an Environment
+        The output of finalize for constant expressions is stored in the compiled code, and cannot be validated
+        :param environment: Jinja Environment
+        :return: bool
+        """
+        return environment.finalize is None
+
+    @staticmethod
+    def get_environment_key(environment: Environment, name: str) -> str:
+        """
+        Generate cache key for a template
+        :param environment: Jinja Environment
+        :param name: template name
+        :return: str
+        """
+        autoescape = environment.autoescape
+        if callable(autoescape):
+            autoescape = autoescape(name)
+        finalize = environment.finalize
+        generator = environment.code_generator_class
+        settings = (
+            jinja2.__version__,
+            sys.version_info[:2],
+            environment.block_start_string,
+            environment.block_end_string,
+            environment.variable_start_string,
+            environment.variable_end_string,
+            environment.comment_start_string,
+            environment.comment_end_string,
+            environment.line_statement_prefix,
+            environment.line_comment_prefix,
+            environment.trim_blocks,
+            environment.lstrip_blocks,
+            environment.newline_sequence,
+            environment.keep_trailing_newline,
+            environment.optimized,
+            environment.is_async,
+            sorted(environment.extensions.keys()),
+            bool(autoescape),
+            # the finalize call is generated according to how it is declared (eg. @pass_context)
+            finalize is not None,
+            str(getattr(finalize, "jinja_pass_arg", None)),
+            "{}.{}".format(generator.__module__, generator.__qualname__),
+            name,
+        )
+        return sha1(repr(settings).encode("utf-8")).hexdigest()
@@ -1,7 +1,6 @@
-import io
-
 from jinja2 import BaseLoader, TemplateNotFound
 from zipreport.report import ReportFile
+from zipreport.report.const import BYTECODE_CACHE_PATH
 
 
 class JinjaReportLoader(BaseLoader):
@@ -14,7 +13,7 @@ class JinjaReportLoader(BaseLoader):
 
         if not self.zpt.exists(template):
             raise TemplateNotFound(template)
-        source = io.TextIOWrapper(self.zpt.get(template), encoding="utf-8").read()
+        source = self.zpt.get_bytes(template).decode("utf-8")
         return source, template, updated
 
     def get_report(self):
@@ -25,7 +24,12 @@ class JinjaReportLoader(BaseLoader):
         return self.zpt
 
     def list_templates(self):
-        """Iterates over all templates.  If the loader does not support that
-        it should raise a :exc:`TypeError` which is the default behavior.
         """
-        raise TypeError("this loader cannot iterate over all templates")
+        List all files in the report, except precompiled templates
+        :return: sorted list of names
+        """
+        return sorted(
+            name
+            for name in self.zpt.get_fs().list("")
+            if not name.endswith("/") and not name.startswith(BYTECODE_CACHE_PATH)
+        )
@@ -5,6 +5,7 @@ from typing import Callable
 from jinja2 import select_autoescape, Environment
 
 from zipreport.template import EnvironmentWrapper
+from zipreport.template.jinjacache import ReportBytecodeCache
 from zipreport.template.jinjaloader import JinjaReportLoader
 from zipreport.report import ReportFile
 from zipreport.report.const import (
@@ -12,6 +13,7 @@ from zipreport.report.const import (
     MANIFEST_PARAMETERS,
     REPORT_FILE_NAME,
     DATA_FILE_NAME,
+    TEMPLATE_EXTENSIONS,
 )
 
 # register filters
@@ -21,10 +23,13 @@ from zipreport.template.jinja import filters
 class JinjaRender:
     OPT_EXTENSIONS = "extensions"
     OPT_STRICT_PARAMS = "strict_params"
+    OPT_BYTECODE_CACHE = "bytecode_cache"
 
     DEFAULT_OPTIONS = {
         OPT_EXTENSIONS: [],
         OPT_STRICT_PARAMS: True,
+        # use precompiled templates, if available
+        OPT_BYTECODE_CACHE: True,
     }
 
     def __init__(
@@ -53,14 +58,21 @@ class JinjaRender:
 
         :return:  Environment
         """
+        bytecode_cache = None
+        if self.options[self.OPT_BYTECODE_CACHE]:
+            bytecode_cache = ReportBytecodeCache(self.zpt)
         env = Environment(
             loader=JinjaReportLoader(self.zpt),
             autoescape=select_autoescape(["html", "xml"]),
             extensions=self.options[self.OPT_EXTENSIONS],
+            bytecode_cache=bytecode_cache,
         )
         env = self.wrapper.wrap(env)
         if not isinstance(env, Environment):
             raise ValueError("wrapped Environment result is not a jinja Environment object")
+        if env.bytecode_cache is not None and not ReportBytecodeCache.supports(env):
+            # wrapper changed compile-time settings that cannot be cached
+            env.bytecode_cache = None
 
         return env
 
@@ -105,9 +117,34 @@ class JinjaRender:
 
         template = self.get_env().get_template(template)
         contents = template.render(**data)
-        self.zpt.add(REPORT_FILE_NAME, contents)
+        # replace previous render, if any
+        self.zpt.replace(REPORT_FILE_NAME, contents)
         return contents
 
+    def precompile(self, extensions: list = None) -> dict:
+        """
+        Compile all templates, and store the compiled code inside the ReportFile
+        Compiled templates are used by render() if the Jinja version and Environment settings match; otherwise,
+        templates are compiled from source. Nothing is stored if the Environment has a finalize function
+
+        :param extensions: optional list of template file extensions
+        :return: dict of template name: error message, for templates that failed to compile
+        """
+        if extensions is None:
+            extensions = TEMPLATE_EXTENSIONS
+        env = self.get_env()
+        if not ReportBytecodeCache.supports(env):
+            return {}
+        env.bytecode_cache = ReportBytecodeCache(self.zpt, write=True)
+        extensions = [ext.lstrip(".") for ext in extensions]
+        errors = {}
+        for name in env.list_templates(extensions=extensions):
+            try:
+                env.get_template(name)
+            except Exception as e:
+                errors[name] = str(e)
+        return errors
+
     def _discover_data(self, data_file: str = DATA_FILE_NAME) -> dict:
         """
         Loads default data from json, if data_file exists